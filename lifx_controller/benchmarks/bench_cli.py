@@ -0,0 +1,57 @@
+"""Cold start to first packet for one-shot commands, fast path vs the full controller.
+
+Starts a fresh Python process per run against local fake bulbs and measures the time
+from spawning it to the first packet arriving at the fake bulbs.
+
+Run from the lifx_controller directory:  python benchmarks/bench_cli.py
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sim import FakeBulbServer
+
+RUNS = 10
+
+FULL_CONTROLLER = ("import sys; sys.path.insert(0, %r)\n"
+                   "from controllers.light_controller import LightController\n"
+                   "LightController().turn_all_on()" % ROOT)
+
+
+def measure(server, cwd, command):
+    samples = []
+    for _ in range(RUNS):
+        server.reset_counts()
+        start = time.monotonic()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, check=False)
+        if server.first_packet_at is not None:
+            samples.append(server.first_packet_at - start)
+    return samples
+
+
+def main():
+    with FakeBulbServer(5) as server, tempfile.TemporaryDirectory() as tmp:
+        config = {f"light{i + 1}": {'mac_addr': mac_addr, 'ip_addr': server.host, 'port': server.port}
+                  for i, mac_addr in enumerate(server.bulbs)}
+        with open(os.path.join(tmp, "lights_config.json"), 'w') as f:
+            json.dump(config, f)
+
+        main_py = os.path.join(ROOT, "main.py")
+        for label, command in (
+                ("fast path, fire-and-forget", [sys.executable, main_py, "on", "--wait", "0"]),
+                ("fast path, wait for acks", [sys.executable, main_py, "on"]),
+                ("full LightController", [sys.executable, "-c", FULL_CONTROLLER])):
+            samples = measure(server, tmp, command)
+            print(f"{label:>28}: median {statistics.median(samples) * 1000:6.1f} ms to first packet "
+                  f"(min {min(samples) * 1000:.1f} ms, {len(samples)}/{RUNS} runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Micro-benchmark of batch color conversion against the original per-color functions.
+
+Run from the lifx_controller directory:  python benchmarks/bench_color.py
+"""
+import colorsys
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.scenes import SCENES
+from ui.color_utils import hex_to_rgb, hexes_to_hsbk, hexes_to_terminal, rgb_to_lab
+
+
+# The per-color conversions as they were before the batch engine, for comparison
+def legacy_hex_to_hsbk(hex_color):
+    hex_color = hex_color.lstrip('#')
+    rgb = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    hsv = colorsys.rgb_to_hsv(rgb[0]/255.0, rgb[1]/255.0, rgb[2]/255.0)
+    return [int(hsv[0] * 65535), int(hsv[1] * 65535), int(hsv[2] * 65535), 3500]
+
+
+def legacy_rgb_to_256(r, g, b):
+    if r == g == b:
+        if r < 8: return 16
+        if r > 248: return 231
+        return round(((r - 8) / 247) * 24) + 232
+    return 16 + (36 * round(r / 255 * 5)) + (6 * round(g / 255 * 5)) + round(b / 255 * 5)
+
+
+def xterm_rgb(number):
+    if number >= 232:
+        return (8 + 10 * (number - 232),) * 3
+    levels = (0, 95, 135, 175, 215, 255)
+    number -= 16
+    return levels[number // 36], levels[number // 6 % 6], levels[number % 6]
+
+
+def mean_error(hex_colors, numbers):
+    """Average CIELAB distance between each color and the terminal color it was mapped to."""
+    total = 0.0
+    for hex_color, number in zip(hex_colors, numbers):
+        want, got = rgb_to_lab(*hex_to_rgb(hex_color)), rgb_to_lab(*xterm_rgb(number))
+        total += sum((w - g) ** 2 for w, g in zip(want, got)) ** 0.5
+    return total / len(hex_colors)
+
+
+def main():
+    scene_colors = [settings['color'] for scene in SCENES.values() for settings in scene.values()]
+    random.seed(1)
+    random_colors = ['%06x' % random.randrange(1 << 24) for _ in range(5000)]
+
+    for label, colors in (("scene colors", scene_colors * 100), ("random colors", random_colors)):
+        runs = 5
+        legacy_hsbk = timeit.timeit(lambda: [legacy_hex_to_hsbk(c) for c in colors], number=runs) / runs
+        batch_hsbk = timeit.timeit(lambda: hexes_to_hsbk(colors), number=runs) / runs
+        legacy_256 = timeit.timeit(lambda: [legacy_rgb_to_256(*hex_to_rgb(c)) for c in colors], number=runs) / runs
+        # The first pass fills the nearest-color table; later passes only look it up
+        cold_256 = timeit.timeit(lambda: hexes_to_terminal(colors), number=1)
+        batch_256 = timeit.timeit(lambda: hexes_to_terminal(colors), number=runs) / runs
+        print(f"{label} ({len(colors)} values)")
+        print(f"  hex -> HSBK      per-color {legacy_hsbk * 1e3:8.2f} ms   batch {batch_hsbk * 1e3:8.2f} ms")
+        print(f"  hex -> xterm-256 per-color {legacy_256 * 1e3:8.2f} ms   batch {batch_256 * 1e3:8.2f} ms"
+              f"   (first pass {cold_256 * 1e3:.2f} ms)")
+        print(f"  mean CIELAB error  naive {mean_error(colors, [legacy_rgb_to_256(*hex_to_rgb(c)) for c in colors]):6.2f}"
+              f"   perceptual {mean_error(colors, hexes_to_terminal(colors)):6.2f}")
+
+
+if __name__ == "__main__":
+    main()
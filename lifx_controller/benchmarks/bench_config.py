@@ -0,0 +1,54 @@
+"""Cost of registering many lights one at a time: rewrite-per-change vs the batched config store.
+
+Run from the lifx_controller directory:  python benchmarks/bench_config.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.config_store import LightConfigStore
+
+
+def record(i):
+    return {'mac_addr': f"d0:73:d5:00:{i >> 8:02x}:{i & 0xff:02x}", 'ip_addr': f"10.0.{i >> 8}.{i & 0xff}",
+            'label': f"Bulb {i}", 'firmware': "3.70"}
+
+
+def rewrite_each_time(path, count):
+    config = {}
+    for i in range(count):
+        config[f"light{i + 1}"] = record(i)
+        with open(path, 'w') as f:
+            json.dump(config, f, indent=4)
+    return count
+
+
+def batched(path, count):
+    store = LightConfigStore(path)
+    for i in range(count):
+        store.put(f"light{i + 1}", **record(i))
+    store.close()
+    return store.writes
+
+
+def main():
+    print(f"{'lights':>7} {'rewrite each':>13} {'writes':>7} {'batched':>9} {'writes':>7}")
+    for count in (100, 1000, 3000):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lights_config.json")
+            start = time.perf_counter()
+            naive_writes = rewrite_each_time(path, count)
+            naive = time.perf_counter() - start
+            os.remove(path)
+            start = time.perf_counter()
+            writes = batched(path, count)
+            elapsed = time.perf_counter() - start
+            print(f"{count:>7} {naive:>12.3f}s {naive_writes:>7} {elapsed:>8.3f}s {writes:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Round trips through the daemon vs one-shot processes that talk to the bulbs directly.
+
+Starts a daemon against local fake bulbs and measures IPC latency for cached reads
+and acknowledged writes, then whole `main.py on` invocations with and without it.
+
+Run from the lifx_controller directory:  python benchmarks/bench_daemon.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from controllers.latency import percentile
+from daemon import DaemonClient
+from sim import FakeBulbServer
+
+CALLS = 500
+RUNS = 10
+
+
+def percentiles(samples):
+    return percentile(samples, 0.5) * 1000, percentile(samples, 0.99) * 1000
+
+
+def time_calls(client, method, **params):
+    samples = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        client.call(method, **params)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_processes(cwd, command, env):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, check=False)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    with FakeBulbServer(5) as server, tempfile.TemporaryDirectory() as tmp:
+        config = {f"light{i + 1}": {'mac_addr': mac_addr, 'ip_addr': server.host, 'port': server.port}
+                  for i, mac_addr in enumerate(server.bulbs)}
+        with open(os.path.join(tmp, "lights_config.json"), 'w') as f:
+            json.dump(config, f)
+        socket_path = os.path.join(tmp, "daemon.sock")
+        env = dict(os.environ, LIFX_TUI_SOCKET=socket_path)
+
+        main_py = os.path.join(ROOT, "main.py")
+        daemon = subprocess.Popen([sys.executable, main_py, "daemon"], cwd=tmp, env=env,
+                                  stdout=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(socket_path):
+                time.sleep(0.01)
+            client = DaemonClient(socket_path)
+            for label, method, params in (("ping", "ping", {}),
+                                          ("get_all_lights (cached)", "get_all_lights", {}),
+                                          ("set_light_power (acked)", "set_light_power",
+                                           {'light_id': 'light1', 'power_state': True})):
+                p50, p99 = percentiles(time_calls(client, method, **params))
+                print(f"{label:>28}: p50 {p50:6.3f} ms  p99 {p99:6.3f} ms")
+            client.close()
+
+            for label, extra in (("main.py on via daemon", []), ("main.py on --direct", ["--direct"])):
+                p50, p99 = percentiles(time_processes(tmp, [sys.executable, main_py, "on"] + extra, env))
+                print(f"{label:>28}: p50 {p50:6.1f} ms  p99 {p99:6.1f} ms (whole process)")
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Discovery time and completeness against a local fleet of fake bulbs.
+
+Run from the lifx_controller directory:  python benchmarks/bench_discovery.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.light_controller import LightController
+from sim import FakeBulbServer
+
+
+def main():
+    print(f"{'bulbs':>6} {'found':>6} {'labelled':>9} {'time':>8}   first pass | after every IP changed")
+    for count in (10, 100, 300):
+        with FakeBulbServer(count) as server, tempfile.TemporaryDirectory() as tmp:
+            light_controller = LightController(config_file=os.path.join(tmp, "lights_config.json"))
+            light_controller.broadcast_addr = server.host
+            light_controller.broadcast_port = server.port
+
+            start = time.perf_counter()
+            success, message = light_controller.discover_lights()
+            elapsed = time.perf_counter() - start
+            labelled = sum(1 for light_id in light_controller.lights
+                           if (light_controller.state_cache.get(light_id) or {}).get('label'))
+
+            # Pretend every bulb moved to a new address, then re-resolve
+            for light in light_controller.lights.values():
+                light.ip_addr = "192.0.2.1"
+            _, moved_message = light_controller.discover_lights()
+            print(f"{count:>6} {len(light_controller.lights):>6} {labelled:>9} {elapsed:>7.2f}s"
+                  f"   {message.split(': ')[1]} | {moved_message.split(': ')[1]}")
+
+
+if __name__ == "__main__":
+    main()
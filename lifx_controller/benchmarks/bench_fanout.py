@@ -0,0 +1,58 @@
+"""Wall-clock time of turn_all_on against simulated bulbs of fixed latency.
+
+Run from the lifx_controller directory:  python benchmarks/bench_fanout.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.light_controller import LightController
+
+LATENCY = 0.05  # seconds per packet round trip
+
+
+class SlowLight:
+    """Stand-in for lifxlan.Light that blocks like a real ack round trip."""
+
+    def __init__(self, mac_addr, ip_addr):
+        self.mac_addr = mac_addr
+        self.ip_addr = ip_addr
+
+    def set_power(self, power):
+        time.sleep(LATENCY)
+
+    def set_color(self, color):
+        time.sleep(LATENCY)
+
+
+def make_controller(count):
+    controller = LightController()
+    controller.lights = {f"light{i}": SlowLight(f"d0:73:d5:00:00:{i:02x}", f"10.0.0.{i}")
+                         for i in range(count)}
+    return controller
+
+
+def sequential(controller):
+    for light in controller.lights.values():
+        light.set_power(True)
+        light.set_color([0, 0, 65535, 5500])
+
+
+def main():
+    print(f"{'bulbs':>6} {'sequential':>12} {'fan-out':>10}")
+    for count in (1, 5, 10, 20, 40, 100):
+        controller = make_controller(count)
+        start = time.perf_counter()
+        sequential(controller)
+        seq = time.perf_counter() - start
+        start = time.perf_counter()
+        controller.turn_all_on()
+        fan = time.perf_counter() - start
+        print(f"{count:>6} {seq:>11.3f}s {fan:>9.3f}s")
+        controller.dispatcher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Latency percentiles and packets per operation against a simulated LIFX fleet.
+
+Runs the real controllers against FakeBulbServer with the given fleet size, reply
+latency and packet loss, and reports p50/p99 wall-clock time and the packets the
+bulbs received for each operation. Menu redraws run in a pseudo-terminal. With
+--trace, every controller, transport and draw_menu call is also written to a Chrome
+trace (open it in chrome://tracing or https://ui.perfetto.dev).
+
+Run from the lifx_controller directory:
+    python benchmarks/bench_fleet.py [--bulbs 30] [--latency 0.005] [--loss 0.0]
+                                     [--rounds 50] [--trace trace.json]
+"""
+import argparse
+import fcntl
+import itertools
+import json
+import os
+import pty
+import select
+import struct
+import sys
+import termios
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.scene_store import SceneStore
+from config.scenes import SCENES
+from controllers.latency import percentile
+from controllers.scene_controller import SceneController
+from controllers.tracing import Tracer
+from sim import FakeBulbServer, fleet_controller
+
+SCENE = 'sunset'
+SETTLE = 0.02  # Seconds for fire-and-forget packets to reach the server before counting
+
+
+def make_scene_controller(light_controller):
+    # Scenes name light1..light3; repeat them across the fleet
+    base = SCENES[SCENE]
+    return SceneController(SceneStore(paths=(), builtin={SCENE: {
+        light_id: base[f"light{i % 3 + 1}"] for i, light_id in enumerate(light_controller.lights)}}))
+
+
+def measure(server, operation, rounds):
+    """Run operation rounds times; returns ([seconds, ...], [packets, ...])."""
+    times, packets = [], []
+    for _ in range(rounds):
+        server.reset_counts()
+        start = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - start)
+        time.sleep(SETTLE)
+        packets.append(server.packet_count())
+    return times, packets
+
+
+def controller_operations(light_controller, scene_controller):
+    levels = iter(range(1 << 30))
+
+    def brightness():
+        # What +/- in the TUI does: queue every light's new level, then wait for the sends
+        level = 20000 + next(levels) % 2 * 20000
+        for light_id in light_controller.lights:
+            light_controller.queue_light_brightness(light_id, level)
+        light_controller.command_queue.flush()
+
+    return {
+        'turn_all_on': light_controller.turn_all_on,
+        'turn_all_off': light_controller.turn_all_off,
+        'apply_scene': lambda: scene_controller.apply_scene(SCENE, light_controller),
+        'apply_scene_batched': lambda: scene_controller.apply_scene_batched(SCENE, light_controller),
+        'set_light_brightness': lambda: light_controller.set_light_brightness(
+            'light1', 20000 + next(levels) % 2 * 20000),
+        'brightness_all': brightness,
+    }
+
+
+def redraw_in_terminal(args, result_fd):
+    """Child side of measure_redraw: time draw_menu inside curses and report over result_fd."""
+    import curses
+    from ui.tui import TUI
+
+    def run(stdscr):
+        curses.start_color()
+        curses.use_default_colors()
+        curses.curs_set(0)
+        with FakeBulbServer(args.bulbs, latency=args.latency, loss=args.loss, seed=1) as server, \
+                fleet_controller(server) as light_controller:
+            scene_controller = make_scene_controller(light_controller)
+            tui = TUI(light_controller, scene_controller)
+            tracer = Tracer()
+            if args.trace:
+                tracer.instrument_controllers(light_controller, scene_controller)
+            for light_id in light_controller.lights:
+                try:
+                    light_controller.refresh_light_state(light_id)  # Warm the cache as the poller would
+                except Exception:
+                    pass  # Lost to --loss; draw_menu will refresh it in the background
+
+            steps = itertools.cycle((1, -1))
+
+            def redraw():
+                tui.light_list.move(next(steps))  # Like a keypress: one row changes
+                start = time.perf_counter()
+                tui.draw_menu(stdscr)
+                tracer.record('TUI.draw_menu', start, time.perf_counter())
+
+            times, packets = measure(server, redraw, args.rounds)
+        return {'times': times, 'packets': packets, 'spans': tracer.spans}
+
+    try:
+        result = curses.wrapper(run)
+    except Exception:
+        result = {'error': traceback.format_exc()}
+    with os.fdopen(result_fd, 'w') as f:
+        json.dump(result, f)
+
+
+def measure_redraw(args):
+    read_fd, write_fd = os.pipe()
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.close(read_fd)
+        os.environ['TERM'] = 'xterm-256color'
+        fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack('HHHH', 40, 100, 0, 0))
+        try:
+            redraw_in_terminal(args, write_fd)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    output = b''
+    while True:  # Keep reading the terminal so the child never blocks writing to it
+        ready, _, _ = select.select([fd, read_fd], [], [])
+        if fd in ready:
+            try:
+                os.read(fd, 65536)
+            except OSError:
+                pass
+        if read_fd in ready:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            output += chunk
+    os.waitpid(pid, 0)
+    os.close(read_fd)
+    result = json.loads(output)
+    if 'error' in result:
+        raise RuntimeError(f"menu redraw benchmark failed:\n{result['error']}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--bulbs', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.005, help="seconds before each reply")
+    parser.add_argument('--loss', type=float, default=0.0, help="fraction of packets dropped")
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--trace', help="write a Chrome trace of every call to this file")
+    args = parser.parse_args()
+
+    tracer = Tracer(args.trace)
+    results = {}
+    with FakeBulbServer(args.bulbs, latency=args.latency, loss=args.loss, seed=1) as server, \
+            fleet_controller(server) as light_controller:
+        scene_controller = make_scene_controller(light_controller)
+        if args.trace:
+            tracer.instrument_controllers(light_controller, scene_controller)
+        for name, operation in controller_operations(light_controller, scene_controller).items():
+            results[name] = measure(server, operation, args.rounds)
+    redraw = measure_redraw(args)
+    results['menu_redraw'] = (redraw['times'], redraw['packets'])
+    for span in redraw['spans']:
+        tracer.record(span[0], span[2], span[3])
+
+    print(f"{args.bulbs} bulbs, {args.latency * 1000:g} ms latency, {args.loss:.0%} loss, "
+          f"{args.rounds} rounds each")
+    print(f"{'operation':>22} {'p50 ms':>9} {'p99 ms':>9} {'packets/op':>11}")
+    for name, (times, packets) in results.items():
+        print(f"{name:>22} {percentile(times, 0.5) * 1000:>9.2f} {percentile(times, 0.99) * 1000:>9.2f} "
+              f"{sum(packets) / len(packets):>11.1f}")
+    if args.trace:
+        print(f"\nWrote {tracer.export()} spans to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Cost of repeated commands and state refreshes when one bulb has stopped answering.
+
+Simulated bulbs answer on localhost; one configured bulb does not exist. Without the
+circuit breaker every operation waits out that bulb's timeout; with it only the
+first few do, and the rest skip it until its next probe.
+
+Run from the lifx_controller directory:  python benchmarks/bench_health.py
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim import FakeBulbServer, fleet_controller
+
+BULBS = 10
+ROUNDS = 8
+
+
+def add_dead_light(controller, server, breaker):
+    if not breaker:
+        controller.health.threshold = float('inf')  # Never opens
+    controller.lights["dead"] = controller.make_light("d0:73:d5:ff:ff:ff", server.host, server.port)
+
+
+def run(controller):
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        controller.turn_all_off()
+        with contextlib.redirect_stdout(io.StringIO()):  # get_light_info prints its errors
+            controller.get_light_info("dead")
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    with FakeBulbServer(BULBS) as server:
+        print(f"{'breaker':>8} {'first':>8} {'last':>8} {'total':>8}")
+        for breaker in (False, True):
+            with fleet_controller(server) as controller:
+                add_dead_light(controller, server, breaker)
+                times = run(controller)
+                print(f"{'on' if breaker else 'off':>8} {times[0]:>7.3f}s {times[-1]:>7.3f}s {sum(times):>7.3f}s")
+                health = controller.get_cached_light_info('dead')['health']
+        print(f"\nlight health after the breaker run: {health}")
+
+
+if __name__ == "__main__":
+    main()
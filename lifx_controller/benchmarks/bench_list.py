@@ -0,0 +1,39 @@
+"""Cost of filtering and windowing a long list, per keystroke.
+
+Run from the lifx_controller directory:  python benchmarks/bench_list.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.list_view import ListView
+
+QUERY = "kitchen 4"
+
+
+def main():
+    for count in (1000, 10000, 100000):
+        items = [f"light{i}: {('Kitchen', 'Hall', 'Bedroom', 'Office')[i % 4]} {i}" for i in range(count)]
+        view = ListView(items)
+        view.start_filter()
+        timings = []
+        for char in QUERY:
+            start = time.perf_counter()
+            view.set_query(view.query + char)
+            view.window(20)
+            timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        view.set_query(view.query[:-1])  # Backspace reuses the cached matches
+        backspace = time.perf_counter() - start
+        start = time.perf_counter()
+        view.window(20)
+        view.move(20)
+        window = time.perf_counter() - start
+        print(f"{count:>7} items: first key {timings[0] * 1000:7.2f} ms, last key {timings[-1] * 1000:6.3f} ms "
+              f"({len(view)} matches), backspace {backspace * 1000:6.3f} ms, page {window * 1000:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
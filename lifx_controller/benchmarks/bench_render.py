@@ -0,0 +1,85 @@
+"""Bytes written to the terminal per keystroke while moving the menu selection.
+
+Runs the TUI inside a pseudo-terminal against local fake bulbs and compares the
+differential renderer with a full clear-and-redraw on every frame.
+
+Run from the lifx_controller directory:  python benchmarks/bench_render.py
+"""
+import fcntl
+import os
+import pty
+import select
+import struct
+import sys
+import termios
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+KEYS = [b'\x1bOB'] * 4 + [b'\x1bOA'] * 4  # Down x4, up x4 (application keypad mode)
+
+
+def run_tui(full_repaint):
+    import curses
+    from controllers.scene_controller import SceneController
+    from sim import FakeBulbServer, fleet_controller
+    from ui.tui import TUI
+
+    with FakeBulbServer(3) as server, fleet_controller(server) as light_controller:
+        tui = TUI(light_controller, SceneController())
+        if full_repaint:
+            draw_menu = tui.draw_menu
+
+            def draw_everything(stdscr):
+                stdscr.clear()
+                if tui.renderer is not None:
+                    tui.renderer.invalidate()
+                return draw_menu(stdscr)
+            tui.draw_menu = draw_everything
+        curses.wrapper(tui.run)
+
+
+def read_until_quiet(fd, quiet=0.3):
+    data = b''
+    while True:
+        ready, _, _ = select.select([fd], [], [], quiet)
+        if not ready:
+            return data
+        try:
+            chunk = os.read(fd, 65536)
+        except OSError:
+            return data
+        if not chunk:
+            return data
+        data += chunk
+
+
+def measure(full_repaint):
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.environ['TERM'] = 'xterm-256color'
+        fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack('HHHH', 40, 100, 0, 0))
+        try:
+            run_tui(full_repaint)
+        finally:
+            os._exit(0)
+    time.sleep(0.5)
+    read_until_quiet(fd, quiet=1.0)  # Initial paint and first light refresh
+    sizes = []
+    for key in KEYS:
+        os.write(fd, key)
+        sizes.append(len(read_until_quiet(fd)))
+    os.write(fd, b'q')
+    read_until_quiet(fd)
+    os.waitpid(pid, 0)
+    return sizes
+
+
+def main():
+    for label, full_repaint in (("differential", False), ("full repaint", True)):
+        sizes = measure(full_repaint)
+        print(f"{label:>13}: {sum(sizes) / len(sizes):8.1f} bytes/keystroke  {sizes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Packets and wall-clock time per scene application against local fake bulbs.
+
+Run from the lifx_controller directory:  python benchmarks/bench_scene_packets.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.scene_store import SceneStore
+from config.scenes import SCENES
+from controllers.scene_controller import SceneController
+from sim import FakeBulbServer, fleet_controller
+
+
+def measure(server, apply):
+    server.reset_counts()
+    start = time.perf_counter()
+    apply()
+    elapsed = time.perf_counter() - start
+    time.sleep(0.2)  # Let fire-and-forget packets land before counting
+    return server.packet_count(), elapsed
+
+
+def main():
+    print(f"{'scene':>8} {'bulbs':>6} {'acked pkts':>11} {'acked time':>11} "
+          f"{'batched pkts':>13} {'batched time':>13} {'verified pkts':>14}")
+    for scene_name in ('night', 'sunset'):
+        for count in (3, 30):
+            with FakeBulbServer(count) as server, fleet_controller(server) as light_controller:
+                # Scenes name light1..light3; repeat them across the fleet
+                base = SCENES[scene_name]
+                scene_controller = SceneController(SceneStore(paths=(), builtin={scene_name: {
+                    light_id: base[f"light{i % 3 + 1}"] for i, light_id in enumerate(light_controller.lights)}}))
+
+                acked = measure(server, lambda: scene_controller.apply_scene(scene_name, light_controller))
+                batched = measure(server, lambda: scene_controller.apply_scene_batched(scene_name, light_controller))
+                verified = measure(server, lambda: scene_controller.apply_scene_batched(
+                    scene_name, light_controller, verify=True))
+                print(f"{scene_name:>8} {count:>6} {acked[0]:>11} {acked[1]:>10.3f}s "
+                      f"{batched[0]:>13} {batched[1]:>12.3f}s {verified[0]:>14}")
+
+
+if __name__ == "__main__":
+    main()
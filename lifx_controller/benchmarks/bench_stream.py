@@ -0,0 +1,118 @@
+"""Streaming mode: frame conversion cost and end-to-end latency against fake bulbs.
+
+First compares converting frames of RGB samples one colorsys call per sample with
+rgbs_to_hsbk over the whole frame. Then feeds frames through a pipe faster than the
+bulbs may take them and compares the streamer (newest frame only, fire-and-forget,
+rate limited) with sending every frame through blocking set_light_color calls.
+
+Run from the lifx_controller directory:  python benchmarks/bench_stream.py
+"""
+import colorsys
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controllers.stream import FrameStreamer
+from sim import FakeBulbServer, fleet_controller
+from ui.color_utils import rgbs_to_hsbk
+
+BULBS = 32
+INPUT_FPS = 120
+SECONDS = 3.0
+
+
+def make_frames(count, palette=64):
+    """Frames of a slowly changing feed: colors drawn from a small, drifting palette."""
+    rng = random.Random(1)
+    colors = [bytes(rng.randrange(256) for _ in range(3)) for _ in range(palette)]
+    frames = []
+    for index in range(count):
+        colors[index % palette] = bytes(rng.randrange(256) for _ in range(3))
+        frames.append(b''.join(rng.choice(colors) for _ in range(BULBS)))
+    return frames
+
+
+def per_sample(frame):
+    return [tuple(int(v * 65535) for v in colorsys.rgb_to_hsv(frame[i] / 255.0, frame[i + 1] / 255.0,
+                                                               frame[i + 2] / 255.0)) + (3500,)
+            for i in range(0, len(frame), 3)]
+
+
+def conversion():
+    frames = make_frames(2000)
+    start = time.perf_counter()
+    for frame in frames:
+        per_sample(frame)
+    slow = time.perf_counter() - start
+    start = time.perf_counter()
+    for frame in frames:
+        rgbs_to_hsbk(frame[0::3], frame[1::3], frame[2::3])
+    fast = time.perf_counter() - start
+    print(f"convert {BULBS}-light frames: per sample {slow / len(frames) * 1e6:.1f} us/frame, "
+          f"rgbs_to_hsbk {fast / len(frames) * 1e6:.1f} us/frame")
+
+
+def feed(write_fd, frames):
+    """Write frames to the pipe at INPUT_FPS from a drift-free clock."""
+    start = time.monotonic()
+    with os.fdopen(write_fd, 'wb', buffering=0) as pipe:
+        for index, frame in enumerate(frames):
+            pipe.write(frame)
+            time.sleep(max(0.0, start + (index + 1) / INPUT_FPS - time.monotonic()))
+
+
+def streamed(server, light_controller, frames):
+    streamer = FrameStreamer(light_controller)
+    read_fd, write_fd = os.pipe()
+    server.reset_counts()
+    with os.fdopen(read_fd, 'rb') as pipe:
+        streamer.start(pipe, raw=True)
+        feed(write_fd, frames)
+        streamer.wait()
+    metrics = streamer.metrics()
+    print(f"streamer: {metrics['frames_in']} frames in, {metrics['frames_sent']} sent, "
+          f"{metrics['frames_dropped']} dropped, {server.packet_count() / max(1, metrics['frames_sent']):.1f} "
+          f"packets/frame, latency p50 {metrics['latency_p50_ms']:.1f} ms p99 {metrics['latency_p99_ms']:.1f} ms")
+
+
+def blocking(server, light_controller, frames):
+    """Every frame in order, one acknowledged set_light_color per light, as before streaming mode."""
+    read_fd, write_fd = os.pipe()
+    writer = threading.Thread(target=feed, args=(write_fd, frames))
+    latencies = []
+    server.reset_counts()
+    writer.start()
+    with os.fdopen(read_fd, 'rb') as pipe:
+        while True:
+            frame = pipe.read(3 * BULBS)
+            if len(frame) < 3 * BULBS:
+                break
+            received_at = time.monotonic()
+            for light_id, hsbk in zip(light_controller.lights, per_sample(frame)):
+                light_controller.set_light_color(light_id, list(hsbk))
+            latencies.append(time.monotonic() - received_at)
+    writer.join()
+    latencies.sort()
+    print(f"blocking: {len(frames)} frames, took {sum(latencies):.1f}s of sending for "
+          f"{len(frames) / INPUT_FPS:g}s of input, "
+          f"{server.packet_count() / len(frames):.1f} packets/frame, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms per frame")
+
+
+def main():
+    conversion()
+    frames = make_frames(int(INPUT_FPS * SECONDS))
+    with FakeBulbServer(BULBS, latency=0.002) as server:
+        with fleet_controller(server) as light_controller:
+            streamed(server, light_controller, frames)
+        with fleet_controller(server) as light_controller:
+            # One second of input is enough to see it fall behind
+            blocking(server, light_controller, frames[:INPUT_FPS])
+
+
+if __name__ == "__main__":
+    main()
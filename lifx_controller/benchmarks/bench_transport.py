@@ -0,0 +1,43 @@
+"""Socket churn and latency of the shared transport against lifxlan's per-request sockets.
+
+Run from the lifx_controller directory:  python benchmarks/bench_transport.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim import FakeBulbServer, fleet_controller
+
+ROUNDS = 5
+
+
+def run(server, pooled):
+    with fleet_controller(server) as light_controller:
+        if not pooled:
+            light_controller.lights = server.make_lights()  # Plain lifxlan lights, a socket per request
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            light_controller.turn_all_on()
+            for light_id in light_controller.lights:
+                light_controller.refresh_light_state(light_id)
+        elapsed = time.perf_counter() - start
+        metrics = light_controller.transport.metrics()
+        light_controller.transport.close()
+    return elapsed, metrics
+
+
+def main():
+    with FakeBulbServer(50) as server:
+        operations = ROUNDS * 50 * 3  # set_power + set_color + get_color per bulb per round
+        elapsed, _ = run(server, pooled=False)
+        print(f"lifxlan sockets : {elapsed:6.2f}s  sockets opened {operations}")
+        elapsed, metrics = run(server, pooled=True)
+        print(f"shared transport: {elapsed:6.2f}s  sockets opened {metrics['sockets_opened']}")
+        print("  " + ", ".join(f"{name}={value if not isinstance(value, float) else round(value, 3)}"
+                               for name, value in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+from controllers import protocol
+from controllers.paths import default_socket_path
+import json
+import os
+import random
+import select
+import socket
+import sys
+import time
+
+CONFIG_FILE = "lights_config.json"
+DEFAULT_PORT = 56700
+DEFAULT_WAIT = 0.5  # Seconds to wait for acknowledgements; 0 sends fire-and-forget
+READ_WAIT = 0.5  # Minimum wait for commands that need an answer from the bulbs
+
+USAGE = """Usage: python main.py [command] [--wait SECONDS]
+
+  on | off                                  all lights
+  <scene> on                                apply a scene
+  light <id> on | off                       one light
+  light <id> color <hex> [brightness]       brightness is 0-65535 or a percentage
+  light <id> brightness <value>
+  group <name> on | off                     every light in a group
+  group <name> color <hex> [brightness]
+  group <name> scene <scene>                apply a scene to the group's lights only
+  group <name> add | remove <id> [<id> ...] change a group's members
+  groups                                    every group and its lights as JSON
+  list                                      state of every light as JSON
+  daemon                                    keep state warm and serve other commands
+  stream [<file> | -] [--fps N] [--raw]     stream frames of colors (stdin by default): one
+                                            line of hex colors per frame, one per light, or
+                                            with --raw 3 bytes (R, G, B) per light
+
+--wait sets how long to wait for bulbs to acknowledge (default 0.5, 0 = don't wait).
+When a daemon is running, commands are forwarded to it; --direct talks to the bulbs instead."""
+
+class OneShotSender:
+    """Sends a batch of packets from a single socket and collects the replies.
+
+    Bulbs that have not answered halfway through the wait are sent the same packet
+    once more; whatever is still unanswered at the end is reported as failed.
+    """
+
+    def __init__(self):
+        self.source_id = random.randrange(2, 1 << 32)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.sock.bind(("", 0))
+        self.sock.setblocking(False)
+        self.seq_num = 0
+        self.outstanding = {}  # (mac_addr, seq_num) -> (light_id, packet, address)
+        self.replies = {}  # (mac_addr, seq_num) -> (msg_type, payload)
+        self.sent_at = {}  # (mac_addr, seq_num) -> time.monotonic() of the first send
+        self.latencies = {}  # (mac_addr, seq_num) -> seconds from the first send to the reply
+
+    def send(self, light_id, light, msg_type, payload=b'', ack=False, response=False):
+        mac_addr, ip_addr, port = light
+        seq_num = self.seq_num
+        self.seq_num = (self.seq_num + 1) % 256
+        packet = protocol.pack_message(msg_type, mac_addr, self.source_id, seq_num, payload,
+                                       ack_requested=ack, response_requested=response)
+        self.sock.sendto(packet, (ip_addr, port))
+        if ack or response:
+            self.outstanding[(mac_addr, seq_num)] = (light_id, packet, (ip_addr, port))
+            self.sent_at[(mac_addr, seq_num)] = time.monotonic()
+        return (mac_addr, seq_num)
+
+    def collect(self, wait):
+        """Wait up to wait seconds for replies; return the ids of lights that never answered."""
+        start = time.monotonic()
+        resend_at, deadline = start + wait / 2, start + wait
+        resent = False
+        while self.outstanding:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if not resent and now >= resend_at:
+                for _, packet, address in self.outstanding.values():
+                    self.sock.sendto(packet, address)
+                resent = True
+            timeout = (deadline if resent else resend_at) - now
+            ready, _, _ = select.select([self.sock], [], [], max(0.0, timeout))
+            while ready:
+                try:
+                    data = self.sock.recv(1024)
+                except (BlockingIOError, InterruptedError):
+                    break
+                header = protocol.unpack_header(data)
+                if header is None or header[2] != self.source_id:
+                    continue
+                msg_type, mac_addr, _, seq_num, payload = header
+                if (mac_addr, seq_num) in self.outstanding:
+                    del self.outstanding[(mac_addr, seq_num)]
+                    self.replies[(mac_addr, seq_num)] = (msg_type, payload)
+                    self.latencies[(mac_addr, seq_num)] = time.monotonic() - self.sent_at[(mac_addr, seq_num)]
+        failed = sorted({light_id for light_id, _, _ in self.outstanding.values()})
+        self.outstanding.clear()
+        return failed
+
+    def close(self):
+        self.sock.close()
+
+def load_lights(config_file=CONFIG_FILE):
+    """Read lights_config.json into {light_id: (mac_addr, ip_addr, port)} without lifxlan."""
+    if not os.path.exists(config_file):
+        return {}
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+    return {light_id: (info['mac_addr'].lower(), info['ip_addr'], info.get('port', DEFAULT_PORT))
+            for light_id, info in config.items()}
+
+def load_groups(config_file=CONFIG_FILE):
+    """Read the groups in lights_config.json as {group: [light_id, ...]}."""
+    if not os.path.exists(config_file):
+        return {}
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+    groups = {}
+    for light_id, info in config.items():
+        for group in info.get('groups', ()):
+            groups.setdefault(group, []).append(light_id)
+    return {group: sorted(light_ids) for group, light_ids in sorted(groups.items())}
+
+class UsageError(Exception):
+    pass
+
+def parse_brightness(value):
+    """0-65535 or a percentage, clamped to what a bulb accepts."""
+    try:
+        brightness = float(value[:-1]) / 100 * 65535 if value.endswith('%') else float(value)
+    except ValueError:
+        raise UsageError(f"Invalid brightness {value}: expected 0-65535 or a percentage") from None
+    if brightness != brightness:  # NaN
+        raise UsageError(f"Invalid brightness {value}: expected 0-65535 or a percentage")
+    return int(max(0, min(65535, brightness)))
+
+def parse_color(args):
+    """Turn [hex] or [hex, brightness] into HSBK."""
+    from ui.color_utils import hex_to_hsbk
+    hex_color = args[0].lstrip('#')
+    if len(hex_color) != 6 or any(c not in '0123456789abcdefABCDEF' for c in hex_color):
+        raise UsageError(f"Invalid color {args[0]}: expected a hex color like ff8800")
+    hsbk = hex_to_hsbk(hex_color)
+    if len(args) == 2:
+        hsbk[2] = parse_brightness(args[1])
+    return hsbk
+
+def change_group_direct(group, light_ids, add):
+    """Edit group membership in lights_config.json when no daemon owns it."""
+    from controllers.config_store import LightConfigStore
+    store = LightConfigStore(CONFIG_FILE)
+    store.load()
+    status = 0
+    for light_id in light_ids:
+        record = store.get(light_id)
+        if record is None:
+            print(f"Light {light_id} not found", file=sys.stderr)
+            status = 1
+            continue
+        groups = set(record.get('groups', ()))
+        if not add and group not in groups:
+            print(f"Light {light_id} is not in {group}", file=sys.stderr)
+            status = 1
+            continue
+        groups = groups | {group} if add else groups - {group}
+        store.put(light_id, groups=sorted(groups) or None)
+    if not store.close():
+        print(f"Could not save {CONFIG_FILE}: {store.last_error}", file=sys.stderr)
+        return 1
+    return status
+
+def scene_targets(scene_name, lights):
+    """Map a static scene onto the given lights as send_state targets, or None if there is no such scene."""
+    from config.scene_store import SceneStore
+    store = SceneStore(terminal_colors=False)
+    if store.error:
+        print(f"Scene file error: {store.error}", file=sys.stderr)
+    scene = store.scenes.get(scene_name)
+    if scene is None:
+        return None
+    return {light_id: (lights[light_id], list(hsbk)) for light_id, hsbk in scene.hsbk.items() if light_id in lights}
+
+def send_state(sender, targets, hsbk=None, power=None, ack=True):
+    """Send color (first, so bulbs don't flash their old color) and/or power to each target."""
+    for light_id, (light, light_hsbk) in targets.items():
+        color = light_hsbk if light_hsbk is not None else hsbk
+        if color is not None:
+            sender.send(light_id, light, protocol.LIGHT_SET_COLOR, protocol.set_color_payload(color), ack=ack)
+        if power is not None:
+            sender.send(light_id, light, protocol.LIGHT_SET_POWER, protocol.set_power_payload(power), ack=ack)
+
+def read_states(sender, lights, wait, health=None):
+    """Ask every light for its state; returns {light_id: state or None}.
+
+    With a HealthTracker, each light's reply, or the lack of one, is recorded in it, so
+    its snapshot() has the same fields as the daemon's list.
+    """
+    keys = {light_id: sender.send(light_id, light, protocol.LIGHT_GET, response=True)
+            for light_id, light in lights.items()}
+    wait = max(wait, READ_WAIT)
+    sender.collect(wait)
+    states = {}
+    for light_id, key in keys.items():
+        reply = sender.replies.get(key)
+        states[light_id] = protocol.unpack_light_state(reply[1]) \
+            if reply is not None and reply[0] == protocol.LIGHT_STATE else None
+        if health is not None:
+            if states[light_id] is not None:
+                health.success(key[0], sender.latencies[key])
+            else:
+                health.failure(key[0], f"no response within {wait:g}s")
+    return states
+
+def run_full_controller(args):
+    """Commands that need the full controllers (e.g. dynamic scenes) take the slow path."""
+    from controllers.light_controller import LightController
+    from controllers.scene_controller import SceneController
+    light_controller = LightController()
+    scene_controller = SceneController()
+    success, message = scene_controller.start_dynamic_scene(args[0], light_controller)
+    print(message)
+    try:
+        scene_controller.animation.wait()
+    except KeyboardInterrupt:
+        scene_controller.stop_dynamic_scene()
+    animation = scene_controller.animation
+    if animation is not None and animation.send_errors:
+        print(f"{animation.send_errors} packets failed; last: {animation.last_error}", file=sys.stderr)
+    return 0 if success else 1
+
+def run_stream(argv):
+    """Stream frames of colors to the lights until the input ends or Ctrl-C, showing live metrics."""
+    from controllers.light_controller import LightController
+    from controllers.stream import DEFAULT_FPS, FrameStreamer
+    fps = DEFAULT_FPS
+    if '--fps' in argv:
+        index = argv.index('--fps')
+        try:
+            fps = float(argv[index + 1])
+        except (IndexError, ValueError):
+            print(USAGE)
+            return 2
+        del argv[index:index + 2]
+    raw = '--raw' in argv
+    if raw:
+        argv.remove('--raw')
+    if len(argv) > 2 or fps <= 0:
+        print(USAGE)
+        return 2
+    path = argv[1] if len(argv) == 2 else '-'
+
+    light_controller = LightController()
+    if not light_controller.lights:
+        print("No lights configured", file=sys.stderr)
+        return 1
+    streamer = FrameStreamer(light_controller, fps)
+    if path == '-':
+        stream, pace = sys.stdin.buffer, None
+    else:
+        try:
+            stream = open(path, 'rb')
+        except OSError as e:
+            print(f"Error opening {path}: {str(e)}", file=sys.stderr)
+            return 1
+        # A recording plays back at the frame rate; a FIFO is live input like stdin
+        pace = 1.0 / streamer.fps if os.path.isfile(path) else None
+    def show_metrics():
+        metrics = streamer.metrics()
+        latency = "-" if metrics['latency_p50_ms'] is None else \
+            f"{metrics['latency_p50_ms']:.1f}/{metrics['latency_p99_ms']:.1f} ms"
+        print(f"\rframes {metrics['frames_in']} in, {metrics['frames_sent']} sent, "
+              f"{metrics['frames_dropped']} dropped | packets {metrics['packets_sent']} | "
+              f"latency p50/p99 {latency}   ", end='', file=sys.stderr, flush=True)
+
+    streamer.start(stream, raw=raw, pace=pace)
+    try:
+        while streamer.running:
+            streamer.wait(0.5)
+            show_metrics()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        streamer.stop()
+        show_metrics()
+        print(file=sys.stderr)
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        light_controller.close()
+    if streamer.bad_frames:
+        print(f"Skipped {streamer.bad_frames} malformed frames", file=sys.stderr)
+    if streamer.last_error is not None:
+        print(f"Last error: {streamer.last_error}", file=sys.stderr)
+    return 0
+
+def run_via_daemon(client, argv, args):
+    """Forward a command to the running daemon, which already has sockets and state warm."""
+    command = args[0]
+    if command in ("on", "off") and len(args) == 1:
+        results = client.call("turn_all_on" if command == "on" else "turn_all_off")
+    elif command == "list" and len(args) == 1:
+        output = {}
+        for light_id, info in client.call("get_all_lights").items():
+            reachable = info.get('power') is not None and info.get('health', {}).get('circuit') != 'open'
+            output[light_id] = {'mac_addr': info['mac_addr'], 'ip_addr': info['ip_addr'],
+                                'reachable': reachable}
+            output[light_id].update({field: info[field] for field in ('hsbk', 'power', 'label', 'health')
+                                     if field in info})
+        print(json.dumps(output, indent=4))
+        return 0
+    elif command == "light" and len(args) >= 3:
+        light_id, action = argv[1], args[2]
+        if action in ("on", "off") and len(args) == 3:
+            results = [client.call("set_light_power", light_id=light_id, power_state=action == "on")]
+        elif action == "color" and len(args) in (4, 5):
+            results = [client.call("set_light_color", light_id=light_id, hsbk=parse_color(args[3:]))]
+        elif action == "brightness" and len(args) == 4:
+            results = [client.call("set_light_brightness", light_id=light_id,
+                                   brightness=parse_brightness(args[3]))]
+        else:
+            print("Invalid command")
+            return 2
+    elif command == "groups" and len(args) == 1:
+        print(json.dumps(client.call("list_groups"), indent=4))
+        return 0
+    elif command == "group" and len(args) >= 3:
+        group, action = argv[1], args[2]
+        if action in ("on", "off") and len(args) == 3:
+            results = client.call("set_group_power", group=group, power_state=action == "on")
+        elif action == "color" and len(args) in (4, 5):
+            results = client.call("set_group_color", group=group, hsbk=parse_color(args[3:]))
+        elif action == "scene" and len(args) == 4:
+            results = [client.call("apply_scene", scene_name=args[3], verify=False, group=group)]
+        elif action in ("add", "remove") and len(args) >= 4:
+            method = "add_to_group" if action == "add" else "remove_from_group"
+            results = [client.call(method, light_id=light_id, group=group) for light_id in argv[3:]]
+        else:
+            print("Invalid command")
+            return 2
+    elif len(args) == 2 and args[1] == "on":
+        scenes = client.call("list_scenes")
+        if command in scenes['dynamic_scenes']:
+            results = [client.call("start_dynamic_scene", scene_name=command)]
+        elif command in scenes['scenes']:
+            results = [client.call("apply_scene", scene_name=command, verify=False)]
+        else:
+            print("Invalid command")
+            return 2
+    else:
+        print("Invalid command")
+        return 2
+
+    for success, message in results:
+        if not success:
+            print(message, file=sys.stderr)
+    return 0 if all(success for success, _ in results) else 1
+
+def run_cli(argv):
+    """Run a one-shot command and return the process exit code."""
+    argv = list(argv)
+    wait = DEFAULT_WAIT
+    if '--wait' in argv:
+        index = argv.index('--wait')
+        try:
+            wait = float(argv[index + 1])
+        except (IndexError, ValueError):
+            print(USAGE)
+            return 2
+        del argv[index:index + 2]
+    direct = '--direct' in argv
+    if direct:
+        argv.remove('--direct')
+    args = [arg.lower() for arg in argv]
+    if not args or args[0] in ('-h', '--help', 'help'):
+        print(USAGE)
+        return 0 if args else 2
+
+    if args == ["daemon"]:
+        from daemon import DaemonError, run_daemon
+        try:
+            run_daemon()
+        except DaemonError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+    if args[0] == "stream":
+        return run_stream(argv)  # Straight to the bulbs: a round trip via the daemon would add latency
+    client = None
+    if not direct and os.path.exists(default_socket_path()):
+        from daemon import DaemonClient  # Only worth importing when a daemon may be listening
+        client = DaemonClient.connect()
+    if client is not None:
+        from daemon import DaemonError
+        try:
+            return run_via_daemon(client, argv, args)
+        except UsageError as e:
+            print(e, file=sys.stderr)
+            return 2
+        except DaemonError as e:
+            print(e, file=sys.stderr)
+            return 1
+        finally:
+            client.close()
+
+    lights = load_lights()
+    sender = OneShotSender()
+    ack = wait > 0
+    try:
+        command = args[0]
+        if command == "on" and len(args) == 1:
+            send_state(sender, {light_id: (light, None) for light_id, light in lights.items()},
+                       hsbk=[0, 0, 65535, 5500], power=True, ack=ack)  # Full brightness, 5500K white
+        elif command == "off" and len(args) == 1:
+            send_state(sender, {light_id: (light, None) for light_id, light in lights.items()},
+                       power=False, ack=ack)
+        elif command == "list" and len(args) == 1:
+            from controllers.health import HealthTracker
+            health = HealthTracker()
+            states = read_states(sender, lights, wait, health)
+            output = {}
+            for light_id, (mac_addr, ip_addr, port) in lights.items():
+                output[light_id] = {'mac_addr': mac_addr, 'ip_addr': ip_addr,
+                                    'reachable': states[light_id] is not None}
+                output[light_id].update(states[light_id] or {})
+                output[light_id]['health'] = health.snapshot(mac_addr)
+            print(json.dumps(output, indent=4))
+            return 0
+        elif command == "light" and len(args) >= 3:
+            light_id, action = argv[1], args[2]
+            if light_id not in lights:
+                print(f"Light {light_id} not found")
+                return 1
+            if action in ("on", "off") and len(args) == 3:
+                send_state(sender, {light_id: (lights[light_id], None)}, power=action == "on", ack=ack)
+            elif action == "color" and len(args) in (4, 5):
+                send_state(sender, {light_id: (lights[light_id], parse_color(args[3:]))}, ack=ack)
+            elif action == "brightness" and len(args) == 4:
+                brightness = parse_brightness(args[3])
+                state = read_states(sender, {light_id: lights[light_id]}, wait)[light_id]
+                if state is None:
+                    print(f"Light {light_id} did not respond")
+                    return 1
+                state['hsbk'][2] = brightness
+                send_state(sender, {light_id: (lights[light_id], state['hsbk'])}, ack=ack)
+            else:
+                print("Invalid command")
+                return 2
+        elif command == "groups" and len(args) == 1:
+            print(json.dumps(load_groups(), indent=4))
+            return 0
+        elif command == "group" and len(args) >= 3:
+            group, action = argv[1], args[2]
+            if action in ("add", "remove") and len(args) >= 4:
+                return change_group_direct(group, argv[3:], add=action == "add")
+            members = {light_id: lights[light_id] for light_id in load_groups().get(group, ())
+                       if light_id in lights}
+            if not members:
+                print(f"Group {group} has no lights")
+                return 1
+            if action in ("on", "off") and len(args) == 3:
+                send_state(sender, {light_id: (light, None) for light_id, light in members.items()},
+                           power=action == "on", ack=ack)
+            elif action == "color" and len(args) in (4, 5):
+                send_state(sender, {light_id: (light, None) for light_id, light in members.items()},
+                           hsbk=parse_color(args[3:]), ack=ack)
+            elif action == "scene" and len(args) == 4:
+                targets = scene_targets(args[3], members)
+                if targets is None:
+                    print("Invalid command")
+                    return 2
+                send_state(sender, targets, power=True, ack=ack)
+            else:
+                print("Invalid command")
+                return 2
+        elif len(args) == 2 and args[1] == "on":
+            from config.scenes import DYNAMIC_SCENES
+            if command in DYNAMIC_SCENES:
+                return run_full_controller(args)
+            targets = scene_targets(command, lights)
+            if targets is None:
+                print("Invalid command")
+                return 2
+            send_state(sender, targets, power=True, ack=ack)
+        else:
+            print("Invalid command")
+            return 2
+
+        failed = sender.collect(wait) if ack else []
+        for light_id in failed:
+            print(f"No acknowledgement from {light_id}", file=sys.stderr)
+        return 1 if failed else 0
+    except UsageError as e:
+        print(e, file=sys.stderr)
+        return 2
+    finally:
+        sender.close()
@@ -1,3 +1,5 @@
-from .scenes import SCENES
+from .scenes import SCENES, DYNAMIC_SCENES
+from .scene_store import SceneStore, SceneError, CompiledScene, validate_dynamic_scenes
 
-__all__ = ['SCENES']
\ No newline at end of file
+__all__ = ['SCENES', 'DYNAMIC_SCENES', 'SceneStore', 'SceneError', 'CompiledScene',
+           'validate_dynamic_scenes']
\ No newline at end of file
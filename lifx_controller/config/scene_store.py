@@ -0,0 +1,194 @@
+from config.scenes import SCENES
+from ui.color_utils import hexes_to_hsbk, hexes_to_terminal
+import json
+import os
+import re
+import time
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 can still use scenes.json
+    tomllib = None
+
+SCENE_FILES = ("scenes.json", "scenes.toml")
+CHECK_INTERVAL = 1.0  # Seconds between checks of the scene files' modification times
+DEFAULT_KELVIN = 3500
+KELVIN_RANGE = (1500, 9000)
+HEX_COLOR = re.compile(r'#?[0-9a-fA-F]{6}')
+
+class SceneError(ValueError):
+    pass
+
+class CompiledScene(dict):
+    """A scene's settings (light_id -> {'color', 'brightness'}) with everything derived from them.
+
+    hsbk maps each light to the HSBK tuple to send and terminal maps each light to its
+    (256-color, truecolor) terminal color numbers, so applying or drawing a scene does
+    no color math.
+    """
+
+    def __init__(self, settings, terminal_colors=True):
+        super().__init__(settings)
+        light_ids = list(settings)
+        colors = [settings[light_id]['color'] for light_id in light_ids]
+        self.hsbk = {}
+        for light_id, hsbk in zip(light_ids, hexes_to_hsbk(colors)):
+            hsbk[2] = settings[light_id]['brightness']
+            hsbk[3] = settings[light_id].get('kelvin', DEFAULT_KELVIN)
+            self.hsbk[light_id] = tuple(hsbk)
+        self.terminal = {}
+        if terminal_colors:
+            self.terminal = dict(zip(light_ids, zip(hexes_to_terminal(colors),
+                                                    hexes_to_terminal(colors, truecolor=True))))
+
+def validate_lights(lights, where):
+    """Check a {light_id: {'color', 'brightness', 'kelvin'}} table."""
+    if not isinstance(lights, dict) or not lights:
+        raise SceneError(f"{where}: expected a table of lights")
+    for light_id, settings in lights.items():
+        light_where = f"{where}, light '{light_id}'"
+        if not isinstance(settings, dict):
+            raise SceneError(f"{light_where}: expected a table with color and brightness")
+        unknown = set(settings) - {'color', 'brightness', 'kelvin'}
+        if unknown:
+            raise SceneError(f"{light_where}: unknown setting {sorted(unknown)[0]!r}")
+        color = settings.get('color')
+        if not isinstance(color, str) or not HEX_COLOR.fullmatch(color):
+            raise SceneError(f"{light_where}: color must be a hex color like 'FB9062'")
+        brightness = settings.get('brightness')
+        if not isinstance(brightness, int) or isinstance(brightness, bool) or not 0 <= brightness <= 65535:
+            raise SceneError(f"{light_where}: brightness must be an integer from 0 to 65535")
+        kelvin = settings.get('kelvin', DEFAULT_KELVIN)
+        if not isinstance(kelvin, int) or isinstance(kelvin, bool) or \
+                not KELVIN_RANGE[0] <= kelvin <= KELVIN_RANGE[1]:
+            raise SceneError(f"{light_where}: kelvin must be an integer from "
+                             f"{KELVIN_RANGE[0]} to {KELVIN_RANGE[1]}")
+
+def validate_scenes(scenes, source="scenes"):
+    """Check a {scene_name: {light_id: settings}} mapping and return it with names lowercased."""
+    if not isinstance(scenes, dict):
+        raise SceneError(f"{source}: expected a table of scenes")
+    validated = {}
+    for scene_name, scene in scenes.items():
+        validate_lights(scene, f"{source}: scene '{scene_name}'")
+        validated[str(scene_name).lower()] = scene
+    return validated
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def validate_dynamic_scenes(scenes, source="dynamic scenes"):
+    """Check a {scene_name: {'keyframes', 'period', 'loop', 'easing'}} mapping.
+
+    Done when the scenes are loaded, so a bad keyframe is reported then rather than
+    when the scene starts playing on the animation thread.
+    """
+    from controllers.animation import EASINGS
+
+    if not isinstance(scenes, dict):
+        raise SceneError(f"{source}: expected a table of scenes")
+    validated = {}
+    for scene_name, scene in scenes.items():
+        where = f"{source}: scene '{scene_name}'"
+        if not isinstance(scene, dict):
+            raise SceneError(f"{where}: expected a table with keyframes")
+        unknown = set(scene) - {'keyframes', 'period', 'loop', 'easing'}
+        if unknown:
+            raise SceneError(f"{where}: unknown setting {sorted(unknown)[0]!r}")
+        keyframes = scene.get('keyframes')
+        if not isinstance(keyframes, list) or not keyframes:
+            raise SceneError(f"{where}: expected a list of keyframes")
+        for index, keyframe in enumerate(keyframes):
+            keyframe_where = f"{where}, keyframe {index}"
+            if not isinstance(keyframe, dict) or set(keyframe) != {'at', 'lights'}:
+                raise SceneError(f"{keyframe_where}: expected a table with at and lights")
+            if not _is_number(keyframe['at']) or keyframe['at'] < 0:
+                raise SceneError(f"{keyframe_where}: at must be a number of seconds from 0")
+            validate_lights(keyframe['lights'], keyframe_where)
+        last = max(keyframe['at'] for keyframe in keyframes)
+        period = scene.get('period', last)
+        if not _is_number(period) or period < last:
+            raise SceneError(f"{where}: period must be a number of seconds no earlier than the last keyframe")
+        if scene.get('loop', False) not in (True, False):
+            raise SceneError(f"{where}: loop must be true or false")
+        if scene.get('easing', 'linear') not in EASINGS:
+            raise SceneError(f"{where}: easing must be one of {', '.join(sorted(EASINGS))}")
+        validated[str(scene_name).lower()] = scene
+    return validated
+
+def compile_scenes(scenes, terminal_colors=True):
+    return {scene_name: CompiledScene(scene, terminal_colors) for scene_name, scene in scenes.items()}
+
+def load_scene_file(path):
+    """Parse and validate a scenes.json or scenes.toml file."""
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise SceneError(f"{path}: TOML scene files need Python 3.11 or newer")
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    return validate_scenes(data, path)
+
+class SceneStore:
+    """The built-in scenes plus any from the user's scene files, compiled once.
+
+    Scenes in the files are added to the built-in ones, replacing any with the same
+    name. The files are re-read when their modification time or size changes (checked
+    at most every check_interval seconds); a file that fails to parse or validate
+    leaves the previous scenes in place and is reported in error.
+    """
+
+    def __init__(self, paths=SCENE_FILES, builtin=SCENES, terminal_colors=True,
+                 check_interval=CHECK_INTERVAL):
+        self.paths = paths
+        self.terminal_colors = terminal_colors
+        self.check_interval = check_interval
+        self.version = 0
+        self.error = None
+        self._builtin = compile_scenes(builtin, terminal_colors)
+        self._scenes = self._builtin
+        self._stamp = None
+        self._checked_at = float('-inf')
+        self.reload()
+
+    @property
+    def scenes(self):
+        self.check()
+        return self._scenes
+
+    def _stat(self):
+        stamp = []
+        for path in self.paths:
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            stamp.append((path, info.st_mtime_ns, info.st_size))
+        return tuple(stamp)
+
+    def check(self):
+        """Reload if a scene file changed since the last look; returns the current version."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            stamp = self._stat()
+            if stamp != self._stamp:
+                self.reload(stamp)
+        return self.version
+
+    def reload(self, stamp=None):
+        """Re-read every scene file; returns False (keeping the old scenes) if one is invalid."""
+        self._stamp = stamp if stamp is not None else self._stat()
+        try:
+            scenes = dict(self._builtin)
+            for path, _, _ in self._stamp:
+                scenes.update(compile_scenes(load_scene_file(path), self.terminal_colors))
+        except (OSError, ValueError) as e:  # JSON and TOML decode errors are ValueErrors
+            self.error = str(e)
+            return False
+        self._scenes = scenes
+        self.error = None
+        self.version += 1
+        return True
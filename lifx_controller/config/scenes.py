@@ -35,3 +35,59 @@ SCENES = {
         'light3': {'color': '1a1a1a', 'brightness': 20000}   # Eerie black
     }
 }
+
+# Dynamic scenes are timed keyframe sequences played by the AnimationScheduler.
+# 'at' is seconds from the start; looping scenes wrap from the last keyframe back to
+# the first at 'period'. 'easing' is 'linear' (the bulbs fade on their own) or 'sine'
+# (we stream intermediate colors).
+DYNAMIC_SCENES = {
+    'breathe': {
+        'period': 8.0,
+        'loop': True,
+        'easing': 'sine',
+        'keyframes': [
+            {'at': 0.0, 'lights': {
+                'light1': {'color': 'EEAF61', 'brightness': 65535},
+                'light2': {'color': 'EEAF61', 'brightness': 65535},
+                'light3': {'color': 'EEAF61', 'brightness': 65535}}},
+            {'at': 4.0, 'lights': {
+                'light1': {'color': 'EEAF61', 'brightness': 8000},
+                'light2': {'color': 'EEAF61', 'brightness': 8000},
+                'light3': {'color': 'EEAF61', 'brightness': 8000}}}
+        ]
+    },
+    'cycle': {
+        'period': 30.0,
+        'loop': True,
+        'easing': 'linear',
+        'keyframes': [
+            {'at': 0.0, 'lights': {
+                'light1': {'color': 'CE4993', 'brightness': 65535},   # Mulberry
+                'light2': {'color': 'FB9062', 'brightness': 65535},   # Atomic Tangerine
+                'light3': {'color': 'EEAF61', 'brightness': 65535}}},  # Earth Yellow
+            {'at': 10.0, 'lights': {
+                'light1': {'color': 'FB9062', 'brightness': 65535},
+                'light2': {'color': 'EEAF61', 'brightness': 65535},
+                'light3': {'color': 'CE4993', 'brightness': 65535}}},
+            {'at': 20.0, 'lights': {
+                'light1': {'color': 'EEAF61', 'brightness': 65535},
+                'light2': {'color': 'CE4993', 'brightness': 65535},
+                'light3': {'color': 'FB9062', 'brightness': 65535}}}
+        ]
+    },
+    'dusk': {
+        'period': 600.0,
+        'loop': False,
+        'easing': 'linear',
+        'keyframes': [
+            {'at': 0.0, 'lights': {
+                'light1': {'color': '1A936F', 'brightness': 65535},   # Sea green
+                'light2': {'color': '88D498', 'brightness': 65535},   # Celadon
+                'light3': {'color': 'ffffff', 'brightness': 65535}}},  # Bright White
+            {'at': 600.0, 'lights': {
+                'light1': {'color': 'CE4993', 'brightness': 20000},   # Mulberry
+                'light2': {'color': 'FB9062', 'brightness': 20000},   # Atomic Tangerine
+                'light3': {'color': '1a1a1a', 'brightness': 20000}}}   # Eerie black
+        ]
+    }
+}
@@ -1,4 +1,14 @@
-from .light_controller import LightController
-from .scene_controller import SceneController
+import importlib
+
+# Loaded on first use so one-shot CLI commands don't pay for importing lifxlan
+_EXPORTS = {
+    'LightController': '.light_controller',
+    'SceneController': '.scene_controller',
+}
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = ['LightController', 'SceneController']
\ No newline at end of file
@@ -0,0 +1,175 @@
+import math
+import threading
+import time
+from ui.color_utils import hexes_to_hsbk
+
+MAX_MESSAGES_PER_SECOND = 20  # LIFX guidance for how fast a single bulb can take packets
+STREAM_RATE = 10  # Frames per second per bulb when we have to stream an eased fade
+
+EASINGS = {
+    'linear': lambda f: f,
+    'sine': lambda f: (1 - math.cos(math.pi * f)) / 2,
+}
+
+def interpolate_hsbk(start, end, fraction):
+    """Blend two HSBK colors, taking the short way round the hue circle."""
+    hue_delta = (end[0] - start[0] + 32768) % 65536 - 32768
+    hue = int(start[0] + hue_delta * fraction) % 65536
+    return [hue] + [int(a + (b - a) * fraction) for a, b in zip(start[1:], end[1:])]
+
+def compile_dynamic_scene(definition, light_ids):
+    """Precompute a keyframe definition into (period, initial, events).
+
+    initial maps each light to the color it starts at. events is a time-ordered list of
+    (at, light_id, hsbk, duration_ms), each telling one bulb to start fading to hsbk
+    over duration_ms at time at. Linear segments become a single packet that the bulb
+    fades on its own; eased segments are split into STREAM_RATE steps per second, each
+    still using the bulb-side duration so the steps blend smoothly.
+    """
+    keyframes = sorted(definition['keyframes'], key=lambda keyframe: keyframe['at'])
+    if not keyframes:
+        raise ValueError("Dynamic scene has no keyframes")
+    period = definition.get('period', keyframes[-1]['at'])
+    easing = EASINGS[definition.get('easing', 'linear')]
+    linear = definition.get('easing', 'linear') == 'linear'
+
+    initial = {}
+    events = []
+    for light_id in light_ids:
+        points = []
+        for keyframe in keyframes:
+            settings = keyframe['lights'].get(light_id)
+            if settings is not None:
+                hsbk = hexes_to_hsbk([settings['color']], settings.get('kelvin', 3500))[0]
+                hsbk[2] = settings['brightness']
+                points.append((keyframe['at'], hsbk))
+        if not points:
+            continue
+
+        initial[light_id] = points[0][1]
+        segments = list(zip(points, points[1:]))
+        if definition.get('loop') and len(points) > 1:
+            segments.append((points[-1], (period, points[0][1])))
+        for (start, start_hsbk), (end, end_hsbk) in segments:
+            length = end - start
+            steps = 1 if linear else max(1, int(length * STREAM_RATE))
+            for step in range(steps):
+                at = start + length * step / steps
+                fraction = easing((step + 1) / steps)
+                events.append((at, light_id, interpolate_hsbk(start_hsbk, end_hsbk, fraction),
+                               int(length / steps * 1000)))
+    events.sort(key=lambda event: event[0])
+    return period, initial, events
+
+class AnimationScheduler:
+    """Plays dynamic scenes on a background thread from a drift-free monotonic clock.
+
+    Send times are always computed from the start time rather than by accumulating
+    sleeps, and each bulb is held to max_rate packets per second. When a bulb is over
+    budget its newest pending color replaces any older one instead of queueing up.
+    Packets that fail to send are counted in send_errors and the latest failure kept
+    in last_error, since there is nobody on the playing thread to report them to.
+    """
+
+    def __init__(self, light_controller, max_rate=MAX_MESSAGES_PER_SECOND):
+        self.light_controller = light_controller
+        self.max_rate = max_rate
+        self.scene_name = None
+        self.packets_sent = 0
+        self.send_errors = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, scene_name, definition):
+        """Start playing a dynamic scene, replacing whatever was playing."""
+        self.stop()
+        light_ids = [light_id for light_id in self.light_controller.lights]
+        period, initial, events = compile_dynamic_scene(definition, light_ids)
+        if not initial:
+            return False, f"Scene {scene_name} has no configured lights"
+
+        self.scene_name = scene_name
+        self.send_errors = 0
+        self.last_error = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._play, name="lifx-animation", daemon=True,
+                                        args=(period, initial, events, definition.get('loop', False)))
+        self._thread.start()
+        return True, f"Playing {scene_name}"
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.scene_name = None
+
+    def wait(self, timeout=None):
+        """Block until a non-looping scene finishes or stop() is called."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _play(self, period, initial, events, loop):
+        lights = self.light_controller.lights
+        # Snap to the first keyframe before powering on so bulbs don't flash their old color
+        for light_id, hsbk in initial.items():
+            self._send_color(light_id, lights.get(light_id), hsbk, 0)
+        for light_id in initial:
+            self._send_power(lights.get(light_id))
+
+        start = time.monotonic()
+        cycle = 0
+        index = 0
+        interval = 1.0 / self.max_rate
+        next_allowed = {}
+        pending = {}  # light_id -> (hsbk, duration_ms) waiting for the bulb's budget
+        while not self._stop.is_set():
+            now = time.monotonic()
+            # Take every event that is due; a newer color for a bulb supersedes an older one
+            while index < len(events) and start + cycle * period + events[index][0] <= now:
+                _, light_id, hsbk, duration = events[index]
+                pending[light_id] = (hsbk, duration)
+                index += 1
+            if events and index == len(events) and loop and period > 0:
+                cycle += 1
+                index = 0
+                continue
+
+            for light_id in list(pending):
+                if next_allowed.get(light_id, 0) <= now:
+                    hsbk, duration = pending.pop(light_id)
+                    self._send_color(light_id, lights.get(light_id), hsbk, duration)
+                    next_allowed[light_id] = now + interval
+
+            if index == len(events) and not pending:
+                return  # Non-looping scene finished
+
+            wake = [start + cycle * period + events[index][0]] if index < len(events) else []
+            wake.extend(next_allowed[light_id] for light_id in pending)
+            self._stop.wait(max(0.0, min(wake) - time.monotonic()) if wake else interval)
+
+    def _send_power(self, light):
+        if light is None:
+            return
+        try:
+            light.set_power(True, rapid=True)
+            self.packets_sent += 1
+        except Exception as e:
+            self.send_errors += 1
+            self.last_error = f"Failed to power on {light.mac_addr}: {str(e)}"
+
+    def _send_color(self, light_id, light, hsbk, duration):
+        if light is None:
+            return
+        try:
+            light.set_color(hsbk, duration=duration, rapid=True)
+            self.packets_sent += 1
+            self.light_controller.state_cache.update(light_id, power=65535, hsbk=hsbk)
+        except Exception as e:
+            self.send_errors += 1
+            self.last_error = f"Failed to update {light_id}: {str(e)}"
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+import threading
+
+class CoalescingQueue:
+    """Latest-value-wins queue of light commands, drained by one worker thread.
+
+    Commands are keyed (e.g. by light and kind); putting a value for a key that has
+    not been sent yet replaces it, so a burst of brightness changes sends only the
+    value the user settled on instead of every step along the way. The worker takes
+    everything queued at once and hands it to send_batch([(key, value), ...]), which
+    returns [(key, error or None), ...], so a fleet-wide change can go out in parallel.
+    """
+
+    def __init__(self, send_batch):
+        self.send_batch = send_batch
+        self.sent = 0
+        self.superseded = 0
+        self.last_error = None
+        self._slots = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._busy = False
+
+    def put(self, key, value):
+        with self._condition:
+            if key in self._slots:
+                self.superseded += 1
+            self._slots[key] = value
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._drain, name="lifx-commands", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self, timeout=None):
+        """Wait until every queued command has been sent."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._slots and not self._busy, timeout)
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _drain(self):
+        while True:
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+                self._condition.wait_for(lambda: self._slots or self._stopping)
+                if self._stopping and not self._slots:
+                    return
+                batch = list(self._slots.items())
+                self._slots.clear()
+                self._busy = True
+            try:
+                results = self.send_batch(batch)
+            except Exception as e:
+                self.last_error = e
+                continue
+            for key, error in results:
+                if error is None:
+                    self.sent += 1
+                else:
+                    self.last_error = error
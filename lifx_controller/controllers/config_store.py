@@ -0,0 +1,163 @@
+import atexit
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+
+DEFAULT_DELAY = 1.0  # Seconds without changes before pending changes are written
+MAX_DELAY = 5.0  # Longest a change waits while more keep arriving
+
+class LightConfigStore:
+    """lights_config.json held in memory and written back in batches.
+
+    Each light's record keeps its address (mac_addr, ip_addr, optional port) and
+    whatever we have learned about it (label, groups, firmware). Changes are written
+    by a background thread once none have arrived for delay seconds, or max_delay
+    after the first, and on flush(), close() and interpreter exit. Writes go to a
+    temporary file that then replaces the config with os.replace, so a crash leaves
+    either the old file or the new one, never a partial one.
+    """
+
+    def __init__(self, path, delay=DEFAULT_DELAY, max_delay=MAX_DELAY):
+        self.path = path
+        self.delay = delay
+        self.max_delay = max_delay
+        self.records = {}
+        self.writes = 0
+        self.last_error = None
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._dirty_since = None
+        self._changed_at = None
+        self._thread = None
+        self._stopping = False
+        self._registered = False
+
+    def load(self):
+        """Read the file into memory; returns a copy of {light_id: record}."""
+        records = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                records = json.load(f)
+        with self._condition:
+            self.records = records
+            self._dirty_since = None
+            return {light_id: dict(record) for light_id, record in records.items()}
+
+    def get(self, light_id):
+        with self._condition:
+            record = self.records.get(light_id)
+            return dict(record) if record is not None else None
+
+    def put(self, light_id, **fields):
+        """Create or update a light's record; a field set to None is removed. Returns True if anything changed."""
+        with self._condition:
+            return self._apply(self.records.setdefault(light_id, {}), fields)
+
+    def update(self, light_id, **fields):
+        """Like put(), but only for lights that already have a record."""
+        with self._condition:
+            record = self.records.get(light_id)
+            return record is not None and self._apply(record, fields)
+
+    def remove(self, light_id):
+        with self._condition:
+            if self.records.pop(light_id, None) is not None:
+                self._mark_dirty()
+
+    def _apply(self, record, fields):
+        changed = False
+        for field, value in fields.items():
+            if value is None:
+                if field in record:
+                    del record[field]
+                    changed = True
+            elif record.get(field) != value:
+                record[field] = value
+                changed = True
+        if changed:
+            self._mark_dirty()
+        return changed
+
+    def _mark_dirty(self):
+        now = time.monotonic()
+        if self._dirty_since is None:
+            self._dirty_since = now
+        self._changed_at = now
+        if not self._registered:
+            atexit.register(self.flush)
+            self._registered = True
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="lifx-config", daemon=True)
+            self._thread.start()
+        self._condition.notify()
+
+    @property
+    def dirty(self):
+        return self._dirty_since is not None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._dirty_since is not None or self._stopping)
+                if self._stopping:
+                    return
+                due = min(self._changed_at + self.delay, self._dirty_since + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+            self.flush()
+
+    def flush(self):
+        """Write pending changes now; returns False if the write failed (they stay pending)."""
+        with self._write_lock:
+            with self._condition:
+                if self._dirty_since is None:
+                    return True
+                text = json.dumps(self.records, indent=4)
+                self._dirty_since = None
+            try:
+                self._write(text)
+            except OSError as e:
+                self.last_error = e
+                with self._condition:
+                    if self._dirty_since is None:
+                        self._dirty_since = self._changed_at = time.monotonic()
+                return False
+            self.writes += 1
+            return True
+
+    def _write(self, text):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".lights_config.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(self.path):
+                mode = stat.S_IMODE(os.stat(self.path).st_mode)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask  # What open() would have created
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def close(self):
+        """Stop the writer thread and write anything still pending."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.flush()
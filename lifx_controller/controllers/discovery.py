@@ -0,0 +1,90 @@
+from lifxlan.message import BROADCAST_MAC
+from lifxlan.msgtypes import GetHostFirmware, GetLabel, GetService, StateHostFirmware, StateLabel, \
+    StateService
+from lifxlan.unpack import unpack_lifx_message
+import random
+import select
+import socket
+import time
+
+DEFAULT_WINDOW = 1.0  # Seconds to collect GetService replies
+DEFAULT_ATTEMPTS = 2  # GetService broadcasts spread over the window, in case one is lost
+SERVICE_UDP = 1
+RECEIVE_BUFFER = 1 << 20  # Room for hundreds of replies arriving at once
+
+def firmware_version(version):
+    """Format a StateHostFirmware version as major.minor, e.g. '3.70'."""
+    return f"{version >> 16}.{version & 0xffff}"
+
+def discover(broadcast_addr="255.255.255.255", port=56700, window=DEFAULT_WINDOW,
+             attempts=DEFAULT_ATTEMPTS):
+    """Find every bulb on the LAN with a single socket.
+
+    Broadcasts GetService and collects StateService replies for a bounded window,
+    asking each bulb for its label and firmware as soon as it answers so those lookups
+    overlap with discovery. Returns {mac_addr: {'ip_addr', 'port', 'label', 'firmware'}};
+    label and firmware may be None if the bulb did not answer in time (only labels
+    are waited for).
+    """
+    source_id = random.randrange(2, 1 << 32)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    found = {}
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        sock.bind(("", 0))
+        sock.setblocking(False)
+
+        get_service = GetService(BROADCAST_MAC, source_id, seq_num=0, payload={},
+                                 ack_requested=False, response_requested=True)
+        start = time.monotonic()
+        deadline = start + window
+        # Late responders still get a little time to report their label
+        label_deadline = deadline + window / 2
+        sends = [start + window * i / attempts for i in range(attempts)]
+        while True:
+            now = time.monotonic()
+            while sends and sends[0] <= now:
+                sock.sendto(get_service.packed_message, (broadcast_addr, port))
+                sends.pop(0)
+            if now >= label_deadline or (now >= deadline and
+                                         all(info['label'] is not None for info in found.values())):
+                break
+
+            wake = min(sends[0] if sends else label_deadline,
+                       deadline if now < deadline else label_deadline)
+            ready, _, _ = select.select([sock], [], [], max(0.0, wake - now))
+            if not ready:
+                continue
+            while True:
+                try:
+                    data, (ip_addr, _) = sock.recvfrom(1024)
+                except (BlockingIOError, InterruptedError):
+                    break
+                try:
+                    message = unpack_lifx_message(data)
+                except Exception:
+                    continue
+                if message.source_id != source_id:
+                    continue
+                mac_addr = message.target_addr
+                if isinstance(message, StateService) and message.service == SERVICE_UDP:
+                    if mac_addr not in found:
+                        found[mac_addr] = {'ip_addr': ip_addr, 'port': message.port,
+                                           'label': None, 'firmware': None}
+                        get_label = GetLabel(mac_addr, source_id, seq_num=0, payload={},
+                                             ack_requested=False, response_requested=True)
+                        sock.sendto(get_label.packed_message, (ip_addr, message.port))
+                elif isinstance(message, StateLabel) and mac_addr in found:
+                    if found[mac_addr]['label'] is None:
+                        # Firmware is asked for only now, so a large fleet's replies arrive in waves
+                        get_firmware = GetHostFirmware(mac_addr, source_id, seq_num=0, payload={},
+                                                       ack_requested=False, response_requested=True)
+                        sock.sendto(get_firmware.packed_message, (found[mac_addr]['ip_addr'],
+                                                                  found[mac_addr]['port']))
+                    found[mac_addr]['label'] = message.label.rstrip('\x00')
+                elif isinstance(message, StateHostFirmware) and mac_addr in found:
+                    found[mac_addr]['firmware'] = firmware_version(message.version)
+    finally:
+        sock.close()
+    return found
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import threading
+import time
+
+DEFAULT_MAX_WORKERS = 256  # ThreadPoolExecutor starts threads only as calls need them
+DEFAULT_TIMEOUT = 3.0
+
+class Dispatcher:
+    """Fan a per-light operation out to many lights at once on a bounded thread pool."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, poll_interval=0.05):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Created lazily so one-shot commands that never fan out pay nothing
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="lifx-dispatch")
+            return self._executor
+
+    def run(self, targets, operation, timeout=None):
+        """Run operation(light_id, light) for every (light_id, light) in targets concurrently.
+
+        Returns a list of (light_id, error) in the order of targets, where error is
+        None on success. A light whose call hasn't finished within the timeout of
+        being submitted is reported as failed without waiting for it any further.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        targets = list(targets.items()) if hasattr(targets, 'items') else list(targets)
+        if not targets:
+            return []
+
+        submitted_at = time.monotonic()
+        futures = {self.executor.submit(operation, light_id, light): light_id
+                   for light_id, light in targets}
+        errors = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=self.poll_interval,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                errors[futures[future]] = future.exception()
+
+            # Timed from submission, so a call still queued behind a busy pool (and
+            # never started) also gives up instead of holding up the whole fan-out
+            if time.monotonic() - submitted_at > timeout:
+                for future in pending:
+                    future.cancel()  # Drops calls that haven't started yet
+                    errors[futures[future]] = TimeoutError(f"no response within {timeout:g}s")
+                pending = set()
+
+        return [(light_id, errors[light_id]) for light_id, _ in targets]
+
+    def shutdown(self):
+        """Release the worker threads without waiting for stragglers."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
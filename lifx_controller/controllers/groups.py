@@ -0,0 +1,54 @@
+import threading
+
+class GroupIndex:
+    """Named groups of lights (rooms, zones, ...) indexed both ways.
+
+    members maps each group to the set of its light ids and memberships maps each
+    light id to the set of its groups, so "which lights are in the kitchen" and
+    "which groups is light7 in" are both dictionary lookups. A light can be in any
+    number of groups; a group exists while it has at least one light.
+    """
+
+    def __init__(self):
+        self.members = {}
+        self.memberships = {}
+        self._lock = threading.Lock()
+
+    def add(self, light_id, group):
+        with self._lock:
+            self.members.setdefault(group, set()).add(light_id)
+            self.memberships.setdefault(light_id, set()).add(group)
+
+    def discard(self, light_id, group):
+        """Take a light out of a group; returns False if it was not in it."""
+        with self._lock:
+            if light_id not in self.members.get(group, ()):
+                return False
+            self._unlink(light_id, group)
+            return True
+
+    def drop_light(self, light_id):
+        """Forget a light entirely, e.g. when it is removed."""
+        with self._lock:
+            for group in list(self.memberships.get(light_id, ())):
+                self._unlink(light_id, group)
+
+    def _unlink(self, light_id, group):
+        self.members[group].discard(light_id)
+        if not self.members[group]:
+            del self.members[group]
+        self.memberships[light_id].discard(group)
+        if not self.memberships[light_id]:
+            del self.memberships[light_id]
+
+    def lights_in(self, group):
+        with self._lock:
+            return sorted(self.members.get(group, ()))
+
+    def groups_of(self, light_id):
+        with self._lock:
+            return sorted(self.memberships.get(light_id, ()))
+
+    def names(self):
+        with self._lock:
+            return sorted(self.members)
@@ -0,0 +1,140 @@
+import threading
+import time
+
+FAILURE_THRESHOLD = 3  # Consecutive failures before a light's circuit opens
+FIRST_BACKOFF = 2.0  # Seconds until the first probe of a light that stopped answering
+MAX_BACKOFF = 60.0
+ALPHA = 0.2  # Weight of the newest sample in the moving averages
+
+class LightUnavailable(Exception):
+    """Raised instead of sending to a light whose circuit is open."""
+
+class _Health:
+    """What we know about one light's recent behaviour."""
+
+    def __init__(self, backoff):
+        self.circuit = 'closed'
+        self.success_rate = None
+        self.latency = None  # Seconds, moving average
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.backoff = backoff
+        self.probe_at = None  # clock() of the next probe while the circuit is open
+
+class HealthTracker:
+    """Per-light success rate, latency and circuit breaker, keyed by MAC address.
+
+    After FAILURE_THRESHOLD failures in a row a light's circuit opens and requests to
+    it fail at once with LightUnavailable instead of waiting out a timeout. Once the
+    backoff has passed, a single request is let through as a probe ('half-open'): if
+    it succeeds the circuit closes, otherwise it opens again with the backoff doubled,
+    up to MAX_BACKOFF. on_change is called whenever a circuit opens or closes; clock
+    stands in for time.monotonic.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, first_backoff=FIRST_BACKOFF,
+                 max_backoff=MAX_BACKOFF, on_change=None, clock=time.monotonic):
+        self.threshold = threshold
+        self.first_backoff = first_backoff
+        self.max_backoff = max_backoff
+        self.on_change = on_change
+        self.clock = clock
+        self._lights = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        key = key.lower()
+        health = self._lights.get(key)
+        if health is None:
+            health = self._lights[key] = _Health(self.first_backoff)
+        return health
+
+    def acquire(self, key):
+        """Call before sending a request; raises LightUnavailable if the light should be skipped."""
+        with self._lock:
+            health = self._lights.get(key.lower())
+            if health is None or health.circuit == 'closed':
+                return
+            now = self.clock()
+            if health.circuit == 'open' and now >= health.probe_at:
+                health.circuit = 'half-open'  # This request is the probe
+                return
+            retry = "checking now" if health.circuit == 'half-open' else \
+                f"next try in {max(0.0, health.probe_at - now):.0f}s"
+            message = f"{key} is not responding ({health.last_error}); {retry}"
+        raise LightUnavailable(message)
+
+    def success(self, key, latency):
+        with self._lock:
+            health = self._get(key)
+            changed = health.circuit != 'closed'
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.success_rate = self._average(health.success_rate, 1.0)
+            health.latency = self._average(health.latency, latency)
+            health.circuit = 'closed'
+            health.backoff = self.first_backoff
+            health.probe_at = None
+        if changed and self.on_change is not None:
+            self.on_change()
+
+    def failure(self, key, error):
+        with self._lock:
+            health = self._get(key)
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.success_rate = self._average(health.success_rate, 0.0)
+            health.last_error = str(error)
+            changed = False
+            if health.circuit == 'half-open':
+                health.backoff = min(health.backoff * 2, self.max_backoff)
+                changed = True
+            elif health.circuit == 'closed' and health.consecutive_failures >= self.threshold:
+                changed = True
+            if changed:
+                health.circuit = 'open'
+                health.probe_at = self.clock() + health.backoff
+        if changed and self.on_change is not None:
+            self.on_change()
+
+    @staticmethod
+    def _average(current, sample):
+        return sample if current is None else current + ALPHA * (sample - current)
+
+    def available(self, key):
+        """True unless the light's circuit is open or being probed."""
+        with self._lock:
+            health = self._lights.get(key.lower())
+            return health is None or health.circuit == 'closed'
+
+    def probe_due(self, key):
+        """True if the light's circuit is open and its next probe may be sent."""
+        with self._lock:
+            health = self._lights.get(key.lower())
+            return health is not None and health.circuit == 'open' and self.clock() >= health.probe_at
+
+    def forget(self, key):
+        with self._lock:
+            self._lights.pop(key.lower(), None)
+
+    def snapshot(self, key):
+        """The light's health as plain data for the UI and JSON output, or None if never contacted."""
+        with self._lock:
+            health = self._lights.get(key.lower())
+            if health is None:
+                return None
+            retry_at = None
+            if health.probe_at is not None:
+                retry_at = time.time() + max(0.0, health.probe_at - self.clock())
+            return {
+                'circuit': health.circuit,
+                'success_rate': round(health.success_rate, 3),
+                'latency_ms': round(health.latency * 1000, 1) if health.latency is not None else None,
+                'successes': health.successes,
+                'failures': health.failures,
+                'consecutive_failures': health.consecutive_failures,
+                'last_error': health.last_error,
+                'retry_at': retry_at,
+            }
@@ -0,0 +1,31 @@
+import collections
+
+LATENCY_SAMPLES = 1024  # Most recent latencies kept for the metrics
+
+def percentile(samples, fraction):
+    """The sample fraction of the way through samples (nearest rank), or None if there are none."""
+    samples = sorted(samples)
+    if not samples:
+        return None
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+class LatencyWindow:
+    """The most recent latencies in seconds, reported as p50/p99 in milliseconds.
+
+    Not locked itself: owners add and read under the lock that guards their counters.
+    """
+
+    def __init__(self, size=LATENCY_SAMPLES):
+        self._samples = collections.deque(maxlen=size)
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+
+    def metrics(self):
+        """{'latency_p50_ms': ..., 'latency_p99_ms': ...}, None before the first sample."""
+        samples = sorted(self._samples)
+        metrics = {}
+        for name, fraction in (('latency_p50_ms', 0.5), ('latency_p99_ms', 0.99)):
+            value = percentile(samples, fraction)
+            metrics[name] = value * 1000 if value is not None else None
+        return metrics
@@ -1,93 +1,292 @@
-from lifxlan import Light
-import json
-import os
-from time import sleep
+from lifxlan.msgtypes import GetHostFirmware, StateHostFirmware
+from controllers.command_queue import CoalescingQueue
+from controllers.config_store import LightConfigStore
+from controllers.discovery import discover, firmware_version
+from controllers.dispatcher import Dispatcher
+from controllers.groups import GroupIndex
+from controllers.health import HealthTracker
+from controllers.state_cache import LightStateCache
+from controllers.transport import PooledLight, Transport
+import threading
+import time
+
+DEFAULT_PORT = 56700
+CONFIG_FILE = "lights_config.json"
 
 class LightController:
-    def __init__(self):
+    def __init__(self, config_file=CONFIG_FILE):
         self.lights = {}
-        self.config_file = "lights_config.json"
+        self.config_file = config_file
+        self.config = LightConfigStore(self.config_file)
+        self.groups = GroupIndex()
+        self.broadcast_addr = "255.255.255.255"
+        self.broadcast_port = DEFAULT_PORT
+        self.dispatcher = Dispatcher()
+        self.state_cache = LightStateCache()
+        self.health = HealthTracker(on_change=self.state_cache.changed)
+        self.transport = Transport(health=self.health)
+        self.command_queue = CoalescingQueue(self._send_queued)
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
         self.load_lights_config()
 
     def load_lights_config(self):
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
-            for light_id, light_info in config.items():
-                self.lights[light_id] = Light(light_info['mac_addr'], 
-                                            light_info['ip_addr'])
+        for light_id, light_info in self.config.load().items():
+            self.lights[light_id] = self.make_light(light_info['mac_addr'],
+                                                    light_info['ip_addr'],
+                                                    light_info.get('port', DEFAULT_PORT))
+            if light_info.get('label'):
+                self.state_cache.update(light_id, label=light_info['label'])  # Named before the first poll
+            for group in light_info.get('groups', ()):
+                self.groups.add(light_id, group)
 
     def save_lights_config(self):
-        config = {}
-        for light_id, light in self.lights.items():
-            config[light_id] = {
-                'mac_addr': light.mac_addr,
-                'ip_addr': light.ip_addr
-            }
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=4)
+        """Write every light's address to the config now rather than on the next batched write."""
+        for light_id in list(self.config.records):
+            if light_id not in self.lights:
+                self.config.remove(light_id)
+        for light_id in list(self.lights):
+            self.remember_light(light_id)
+        return self.config.flush()
+
+    def remember_light(self, light_id, **metadata):
+        """Queue a light's current address and any known metadata (label, groups, firmware) for saving."""
+        light = self.lights[light_id]
+        metadata = {field: value for field, value in metadata.items() if value is not None}
+        self.config.put(light_id, mac_addr=light.mac_addr, ip_addr=light.ip_addr,
+                        port=light.port if light.port != DEFAULT_PORT else None, **metadata)
+
+    def close(self):
+        """Send queued commands and write any unsaved config before exiting."""
+        self.command_queue.flush(timeout=1.0)
+        self.config.close()
+
+    def make_light(self, mac_addr, ip_addr, port=DEFAULT_PORT):
+        """Create a Light whose packets go through the shared transport."""
+        return PooledLight(mac_addr, ip_addr, self.transport, port=port)
 
     def add_light(self, light_id, mac_addr, ip_addr):
         """Add a new light to the controller."""
         try:
-            new_light = Light(mac_addr.strip(), ip_addr.strip())
+            new_light = self.make_light(mac_addr.strip(), ip_addr.strip())
             # Test connection by getting label
-            new_light.get_label()
+            label = new_light.get_label()
+            try:
+                firmware = firmware_version(new_light.req_with_resp(GetHostFirmware, StateHostFirmware).version)
+            except Exception:
+                firmware = None  # Nice to have; the light works without it
             self.lights[light_id.strip()] = new_light
-            self.save_lights_config()
+            self.state_cache.update(light_id.strip(), label=label)
+            self.remember_light(light_id.strip(), label=label, firmware=firmware)
             return True, "Light added successfully!"
         except Exception as e:
             return False, f"Error adding light: {str(e)}"
 
+    def discover_lights(self, window=None):
+        """Find bulbs on the LAN, register new ones and re-resolve moved ones."""
+        try:
+            kwargs = {} if window is None else {'window': window}
+            found = discover(self.broadcast_addr, self.broadcast_port, **kwargs)
+        except Exception as e:
+            return False, f"Error discovering lights: {str(e)}"
+        added, moved = self.register_discovered(found)
+        return True, f"Found {len(found)} lights: {added} new, {moved} with a new address"
+
+    def register_discovered(self, found):
+        """Register bulbs from discover() in one pass, batching the config changes into one write.
+
+        Bulbs we already know are matched by MAC address, so a bulb whose DHCP lease
+        gave it a new IP keeps its light id and just has its address updated.
+        """
+        known = {light.mac_addr.lower(): light_id for light_id, light in self.lights.items()}
+        numbers = [int(light_id[5:]) for light_id in self.lights
+                   if light_id.startswith('light') and light_id[5:].isdigit()]
+        next_number = max(numbers, default=0) + 1
+        added = moved = 0
+        for mac_addr, info in found.items():
+            light_id = known.get(mac_addr.lower())
+            if light_id is None:
+                light_id = f"light{next_number}"
+                next_number += 1
+                self.lights[light_id] = self.make_light(mac_addr, info['ip_addr'], info['port'])
+                added += 1
+            else:
+                light = self.lights[light_id]
+                if (light.ip_addr, light.port) != (info['ip_addr'], info['port']):
+                    light.ip_addr, light.port = info['ip_addr'], info['port']
+                    moved += 1
+            if info.get('label'):
+                self.state_cache.update(light_id, label=info['label'])
+            self.remember_light(light_id, label=info.get('label'), firmware=info.get('firmware'))
+        return added, moved
+
     def remove_light(self, light_id):
         """Remove a light from the controller."""
         try:
             if light_id in self.lights:
-                del self.lights[light_id]
-                self.save_lights_config()
+                light = self.lights.pop(light_id)
+                self.state_cache.remove(light_id)
+                self.state_cache.changed()  # Even if we never heard from it, watchers must drop it
+                self.health.forget(light.mac_addr)
+                self.groups.drop_light(light_id)
+                self.config.remove(light_id)
                 return True, f"Light {light_id} removed successfully!"
             return False, f"Light {light_id} not found."
         except Exception as e:
             return False, f"Error removing light: {str(e)}"
 
     def get_light_info(self, light_id):
-        """Get information about a specific light."""
+        """Get information about a specific light, refreshing it from the bulb."""
         try:
             if light_id in self.lights:
-                light = self.lights[light_id]
-                return {
-                    'id': light_id,
-                    'label': light.get_label(),
-                    'power': light.get_power(),
-                    'ip_addr': light.ip_addr,
-                    'mac_addr': light.mac_addr
-                }
+                self.refresh_light_state(light_id)
+                return self.get_cached_light_info(light_id)
             return None
         except Exception as e:
             print(f"Error getting light info: {str(e)}")
             return None
 
+    def refresh_light_state(self, light_id):
+        """Fetch label, power and color in a single round trip and store them in the cache."""
+        light = self.lights[light_id]
+        requested_at = time.monotonic()
+        hsbk = light.get_color()  # LightGet answers with color, power and label together
+        label = light.label
+        if isinstance(label, bytes):
+            label = label.decode('utf-8', errors='replace')
+        if label is not None:
+            label = label.rstrip('\x00')
+        self.state_cache.report(light_id, requested_at, label=label, power=light.power_level, hsbk=hsbk)
+        # Keep the saved address and label current; only lights from the config are saved
+        self.config.update(light_id, ip_addr=light.ip_addr, **({'label': label} if label else {}))
+
+    def get_cached_light_info(self, light_id):
+        """Get information about a light from the state cache without touching the network."""
+        if light_id not in self.lights:
+            return None
+        light = self.lights[light_id]
+        info = {
+            'id': light_id,
+            'ip_addr': light.ip_addr,
+            'mac_addr': light.mac_addr,
+            'groups': self.groups.groups_of(light_id)
+        }
+        state = self.state_cache.get(light_id)
+        if state is not None:
+            for field in ('label', 'power', 'hsbk', 'last_seen'):
+                if state[field] is not None:
+                    info[field] = state[field]
+        health = self.health.snapshot(light.mac_addr)
+        if health is not None:
+            info['health'] = health
+        return info
+
+    def refresh_stale_lights(self):
+        """Refresh stale cache entries in the background, one in-flight refresh per light.
+
+        Lights that stopped answering are skipped until their next health probe is due,
+        when the refresh itself is the probe.
+        """
+        lights = list(self.lights.items())
+        available = [light_id for light_id, light in lights if self.health.available(light.mac_addr)]
+        probes = [light_id for light_id, light in lights if self.health.probe_due(light.mac_addr)]
+        for light_id in self.state_cache.stale_ids(available) + probes:
+            with self._refresh_lock:
+                if light_id in self._refreshing:
+                    continue
+                self._refreshing.add(light_id)
+            self.dispatcher.executor.submit(self._refresh_in_background, light_id)
+
+    def _refresh_in_background(self, light_id):
+        try:
+            if light_id in self.lights:
+                self.refresh_light_state(light_id)
+        except Exception:
+            # Leave the entry stale; it will be retried on the next read
+            pass
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(light_id)
+
     def turn_all_on(self):
         """Turn on all lights with bright white."""
+        def turn_on(light_id, light):
+            light.set_power(True)
+            light.set_color([0, 0, 65535, 5500])  # Full brightness, 5500K white
+            self.state_cache.update(light_id, power=65535, hsbk=[0, 0, 65535, 5500])
+
         results = []
-        for light_id, light in self.lights.items():
-            try:
-                light.set_power(True)
-                light.set_color([0, 0, 65535, 5500])  # Full brightness, 5500K white
+        for light_id, error in self.dispatcher.run(self.lights, turn_on):
+            if error is None:
                 results.append((True, f"Successfully turned on {light_id}"))
-            except Exception as e:
-                results.append((False, f"Failed to turn on {light_id}: {str(e)}"))
+            else:
+                results.append((False, f"Failed to turn on {light_id}: {str(error)}"))
         return results
 
     def turn_all_off(self):
         """Turn off all lights."""
+        def turn_off(light_id, light):
+            light.set_power(False)
+            self.state_cache.update(light_id, power=0)
+
         results = []
-        for light_id, light in self.lights.items():
-            try:
-                light.set_power(False)
+        for light_id, error in self.dispatcher.run(self.lights, turn_off):
+            if error is None:
                 results.append((True, f"Successfully turned off {light_id}"))
-            except Exception as e:
-                results.append((False, f"Failed to turn off {light_id}: {str(e)}"))
+            else:
+                results.append((False, f"Failed to turn off {light_id}: {str(error)}"))
+        return results
+
+    def add_to_group(self, light_id, group):
+        """Put a light in a group (creating the group if needed)."""
+        if light_id not in self.lights:
+            return False, f"Light {light_id} not found"
+        self.groups.add(light_id, group)
+        self.config.update(light_id, groups=self.groups.groups_of(light_id))
+        self.state_cache.changed()
+        return True, f"Added {light_id} to {group}"
+
+    def remove_from_group(self, light_id, group):
+        """Take a light out of a group."""
+        if not self.groups.discard(light_id, group):
+            return False, f"Light {light_id} is not in {group}"
+        self.config.update(light_id, groups=self.groups.groups_of(light_id) or None)
+        self.state_cache.changed()
+        return True, f"Removed {light_id} from {group}"
+
+    def group_lights(self, group):
+        """The lights in a group, or every light when group is None."""
+        if group is None:
+            return dict(self.lights)
+        return {light_id: self.lights[light_id] for light_id in self.groups.lights_in(group)
+                if light_id in self.lights}
+
+    def set_group_power(self, group, power_state):
+        """Switch every light in a group on or off, in parallel."""
+        def set_power(light_id, light):
+            light.set_power(power_state)
+            self.state_cache.update(light_id, power=65535 if power_state else 0)
+
+        return self._run_on_group(group, set_power, f"Turned {'on' if power_state else 'off'}")
+
+    def set_group_color(self, group, hsbk):
+        """Set every light in a group to one color, in parallel."""
+        def set_color(light_id, light):
+            light.set_color(hsbk)
+            self.state_cache.update(light_id, hsbk=list(hsbk))
+
+        return self._run_on_group(group, set_color, "Set color for")
+
+    def _run_on_group(self, group, operation, done):
+        targets = self.group_lights(group)
+        if not targets:
+            return [(False, f"Group {group} has no lights")]
+        results = []
+        for light_id, error in self.dispatcher.run(targets, operation):
+            if error is None:
+                results.append((True, f"{done} {light_id}"))
+            else:
+                results.append((False, f"Failed on {light_id}: {str(error)}"))
         return results
 
     def set_light_color(self, light_id, hsbk):
@@ -96,29 +295,78 @@ class LightController:
             if light_id in self.lights:
                 light = self.lights[light_id]
                 light.set_color(hsbk)
+                self.state_cache.update(light_id, hsbk=hsbk)
                 return True, f"Color set for {light_id}"
             return False, f"Light {light_id} not found"
         except Exception as e:
             return False, f"Error setting color for {light_id}: {str(e)}"
 
     def set_light_brightness(self, light_id, brightness):
-        """Set brightness for a specific light."""
+        """Set brightness for a specific light with a single packet."""
         try:
             if light_id in self.lights:
                 light = self.lights[light_id]
-                current_color = light.get_color()
+                current_color = self.known_color(light_id)
                 current_color[2] = brightness  # Update brightness
-                light.set_color(current_color)
+                self.state_cache.update(light_id, hsbk=current_color)
+                try:
+                    light.set_color(current_color)
+                except Exception:
+                    self.state_cache.invalidate(light_id)  # Re-read what the bulb really has
+                    raise
                 return True, f"Brightness set for {light_id}"
             return False, f"Light {light_id} not found"
         except Exception as e:
             return False, f"Error setting brightness for {light_id}: {str(e)}"
 
+    def queue_light_brightness(self, light_id, brightness):
+        """Set brightness without waiting; rapid changes coalesce so only the latest is sent."""
+        try:
+            if light_id in self.lights:
+                current_color = self.known_color(light_id)
+                current_color[2] = brightness
+                self.state_cache.update(light_id, hsbk=current_color)
+                self.command_queue.put((light_id, 'color'), current_color)
+                return True, f"Brightness queued for {light_id}"
+            return False, f"Light {light_id} not found"
+        except Exception as e:
+            return False, f"Error setting brightness for {light_id}: {str(e)}"
+
+    def known_color(self, light_id):
+        """The light's color from the state store, reading it from the bulb only if never seen."""
+        state = self.state_cache.get(light_id)
+        if state is None or state['hsbk'] is None:
+            self.refresh_light_state(light_id)
+            state = self.state_cache.get(light_id)
+        return list(state['hsbk'])
+
+    def _send_queued(self, batch):
+        """Send a drained batch of queued commands, each light's in order and the lights in parallel."""
+        commands = {}
+        for (light_id, kind), value in batch:
+            commands.setdefault(light_id, []).append((kind, value))
+        targets = {light_id: self.lights[light_id] for light_id in commands if light_id in self.lights}
+
+        def send(light_id, light):
+            try:
+                for kind, value in commands[light_id]:
+                    if kind == 'color':
+                        light.set_color(value)
+                    elif kind == 'power':
+                        light.set_power(value)
+            except Exception:
+                self.state_cache.invalidate(light_id)
+                raise
+
+        errors = dict(self.dispatcher.run(targets, send))
+        return [(key, errors.get(key[0])) for key, _ in batch if key[0] in targets]
+
     def get_all_lights(self):
-        """Get information about all lights."""
+        """Get information about all lights from the cache, refreshing stale ones in the background."""
+        self.refresh_stale_lights()
         lights_info = {}
-        for light_id in self.lights:
-            info = self.get_light_info(light_id)
+        for light_id in list(self.lights):
+            info = self.get_cached_light_info(light_id)
             if info:
                 lights_info[light_id] = info
         return lights_info
@@ -128,8 +376,17 @@ class LightController:
         try:
             if light_id in self.lights:
                 light = self.lights[light_id]
-                current_power = light.get_power()
-                light.set_power(not current_power)
+                state = self.state_cache.get(light_id)
+                if state is None or state['power'] is None:
+                    current_power = light.get_power()
+                else:
+                    current_power = state['power']
+                self.state_cache.update(light_id, power=0 if current_power else 65535)
+                try:
+                    light.set_power(not current_power)
+                except Exception:
+                    self.state_cache.invalidate(light_id)
+                    raise
                 state = "on" if not current_power else "off"
                 return True, f"Toggled {light_id} {state}"
             return False, f"Light {light_id} not found"
@@ -142,6 +399,7 @@ class LightController:
             if light_id in self.lights:
                 light = self.lights[light_id]
                 light.set_power(power_state)
+                self.state_cache.update(light_id, power=65535 if power_state else 0)
                 state = "on" if power_state else "off"
                 return True, f"Turned {light_id} {state}"
             return False, f"Light {light_id} not found"
@@ -0,0 +1,12 @@
+import os
+
+def default_socket_path():
+    """Where the daemon listens: $LIFX_TUI_SOCKET, else a per-user socket in the runtime dir."""
+    path = os.environ.get('LIFX_TUI_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir:
+        import tempfile
+        runtime_dir = tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"lifx-tui-{os.getuid()}.sock")
@@ -0,0 +1,54 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+class StatePoller:
+    """Worker thread that keeps the light state cache fresh and runs queued light I/O.
+
+    The UI thread never talks to the bulbs directly: it submits jobs here and reads
+    results back from the state cache or the returned futures.
+    """
+
+    def __init__(self, light_controller, interval=DEFAULT_POLL_INTERVAL):
+        self.light_controller = light_controller
+        self.interval = interval
+        self._jobs = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="lifx-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._jobs.put(None)  # Wake the thread if it is waiting for work
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) on the worker and return a Future for its result."""
+        future = Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = self._jobs.get(timeout=self.interval)
+            except queue.Empty:
+                job = None
+            if job is not None:
+                future, fn, args, kwargs = job
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except Exception as e:
+                        future.set_exception(e)
+            if not self._stop.is_set():
+                self.light_controller.refresh_stale_lights()
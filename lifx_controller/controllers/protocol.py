@@ -0,0 +1,56 @@
+# Minimal LIFX LAN packet encoding with struct, for paths that can't afford to import lifxlan
+import struct
+
+HEADER = struct.Struct('<HHI8s6sBBQHH')
+HEADER_SIZE = HEADER.size  # 36 bytes
+PROTOCOL = 1024
+ADDRESSABLE = 1 << 12
+TAGGED = 1 << 13
+BROADCAST_MAC = "00:00:00:00:00:00"
+
+ACKNOWLEDGEMENT = 45
+LIGHT_GET = 101
+LIGHT_SET_COLOR = 102
+LIGHT_STATE = 107
+LIGHT_SET_POWER = 117
+
+_SET_COLOR = struct.Struct('<B4HI')
+_SET_POWER = struct.Struct('<HI')
+_LIGHT_STATE = struct.Struct('<4HhH32sQ')
+
+def mac_to_bytes(mac_addr):
+    return bytes(int(part, 16) for part in mac_addr.split(':')) + b'\x00\x00'
+
+def bytes_to_mac(target):
+    return ':'.join(f'{b:02x}' for b in target[:6])
+
+def pack_message(msg_type, mac_addr, source_id, seq_num, payload=b'',
+                 ack_requested=False, response_requested=False):
+    """Build a complete LIFX packet; a broadcast MAC sets the tagged flag as lifxlan does."""
+    flags = PROTOCOL | ADDRESSABLE | (TAGGED if mac_addr == BROADCAST_MAC else 0)
+    response_flags = (2 if ack_requested else 0) | (1 if response_requested else 0)
+    header = HEADER.pack(HEADER_SIZE + len(payload), flags, source_id, mac_to_bytes(mac_addr),
+                         b'\x00' * 6, response_flags, seq_num, 0, msg_type, 0)
+    return header + payload
+
+def set_color_payload(hsbk, duration=0):
+    return _SET_COLOR.pack(0, *[int(value) for value in hsbk], int(duration))
+
+def set_power_payload(on, duration=0):
+    return _SET_POWER.pack(65535 if on else 0, int(duration))
+
+def unpack_header(data):
+    """Return (msg_type, mac_addr, source_id, seq_num, payload), or None if data is too short."""
+    if len(data) < HEADER_SIZE:
+        return None
+    _, _, source_id, target, _, _, seq_num, _, msg_type, _ = HEADER.unpack_from(data)
+    return msg_type, bytes_to_mac(target), source_id, seq_num, data[HEADER_SIZE:]
+
+def unpack_light_state(payload):
+    """Decode a LightState payload into {'hsbk', 'power', 'label'}."""
+    hue, saturation, brightness, kelvin, _, power, label, _ = _LIGHT_STATE.unpack_from(payload)
+    return {
+        'hsbk': [hue, saturation, brightness, kelvin],
+        'power': power,
+        'label': label.split(b'\x00', 1)[0].decode('utf-8', errors='replace'),
+    }
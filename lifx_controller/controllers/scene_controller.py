@@ -1,23 +1,121 @@
-from config.scenes import SCENES
-from ui.color_utils import hex_to_hsbk
+from config.scene_store import SceneStore, validate_dynamic_scenes
+from config.scenes import DYNAMIC_SCENES
+from controllers.animation import AnimationScheduler
 
 class SceneController:
-    def __init__(self):
-        self.scenes = SCENES
-
-    def apply_scene(self, scene_name, light_controller):
-        if scene_name not in self.scenes:
-            return False
-
-        scene = self.scenes[scene_name]
-        for light_id, settings in scene.items():
-            if light_id in light_controller.lights:
-                light = light_controller.lights[light_id]
-                try:
-                    light.set_power(True)
-                    hsbk_color = hex_to_hsbk(settings['color'])
-                    hsbk_color[2] = settings['brightness']
-                    light.set_color(hsbk_color)
-                except Exception as e:
-                    print(f"Failed to process {light_id}: {str(e)}")
-        return True
+    def __init__(self, store=None):
+        self.store = store if store is not None else SceneStore()
+        self.dynamic_scenes = validate_dynamic_scenes(DYNAMIC_SCENES, "DYNAMIC_SCENES")
+        self.animation = None
+
+    @property
+    def scenes(self):
+        """Compiled scenes, reloaded from the scene files when they change."""
+        return self.store.scenes
+
+    @property
+    def scene_error(self):
+        return self.store.error
+
+    @property
+    def animation_error(self):
+        """The latest packet the playing dynamic scene failed to send, if any."""
+        return self.animation.last_error if self.animation is not None else None
+
+    def apply_scene(self, scene_name, light_controller, group=None):
+        """Apply a scene with acknowledged packets; returns (success, message)."""
+        scene = self.scenes.get(scene_name)
+        if scene is None:
+            return False, f"Scene {scene_name} not found"
+
+        lights = light_controller.group_lights(group)
+        targets = {light_id: lights[light_id] for light_id in scene if light_id in lights}
+
+        def apply(light_id, light):
+            light.set_power(True)
+            hsbk_color = list(scene.hsbk[light_id])
+            light.set_color(hsbk_color)
+            light_controller.state_cache.update(light_id, power=65535, hsbk=hsbk_color)
+
+        failed = {light_id: error for light_id, error in light_controller.dispatcher.run(targets, apply)
+                  if error is not None}
+        return scene_outcome(scene_name, failed)
+
+    def start_dynamic_scene(self, scene_name, light_controller):
+        """Start playing a dynamic scene in the background, stopping any that is playing."""
+        if scene_name not in self.dynamic_scenes:
+            return False, f"Dynamic scene {scene_name} not found"
+        if self.animation is None or self.animation.light_controller is not light_controller:
+            self.stop_dynamic_scene()
+            self.animation = AnimationScheduler(light_controller)
+        return self.animation.start(scene_name, self.dynamic_scenes[scene_name])
+
+    def stop_dynamic_scene(self):
+        if self.animation is not None:
+            self.animation.stop()
+
+    def apply_scene_batched(self, scene_name, light_controller, verify=False, group=None):
+        """Apply a scene with one unacknowledged color packet and one power packet per light.
+
+        Nothing waits for the bulbs, so the scene lands in a single round of packets.
+        With verify, every light is read back afterwards and any that missed the update
+        is resent with acknowledgement. With group, only the scene's lights in that group
+        change. Returns (success, message); without verify, success only means the
+        packets were sent.
+        """
+        scene = self.scenes.get(scene_name)
+        if scene is None:
+            return False, f"Scene {scene_name} not found"
+
+        lights = light_controller.group_lights(group)
+        targets = {light_id: list(hsbk_color) for light_id, hsbk_color in scene.hsbk.items()
+                   if light_id in lights}
+
+        try:
+            # Color goes out before power so bulbs don't flash their previous color. Every
+            # packet is addressed to one of our lights: a tagged broadcast would also change
+            # bulbs on the LAN that were never added to lights_config.json
+            for light_id, hsbk_color in targets.items():
+                light_controller.lights[light_id].set_color(hsbk_color, rapid=True)
+            for light_id in targets:
+                light_controller.lights[light_id].set_power(True, rapid=True)
+        except Exception as e:
+            return False, f"Failed to send scene {scene_name}: {str(e)}"
+
+        for light_id, hsbk_color in targets.items():
+            light_controller.state_cache.update(light_id, power=65535, hsbk=hsbk_color)
+
+        failed = self.verify_scene(targets, light_controller) if verify else {}
+        return scene_outcome(scene_name, failed)
+
+    def verify_scene(self, targets, light_controller):
+        """Read every light back and resend, with acknowledgement, to any that missed the update.
+
+        Returns {light_id: error} for the lights that could not be read or corrected.
+        """
+        def check(light_id, light):
+            hsbk_color = targets[light_id]
+            if not (hsbk_matches(light.get_color(), hsbk_color) and light.power_level):
+                light.set_color(hsbk_color)
+                light.set_power(True)
+
+        lights = {light_id: light_controller.lights[light_id] for light_id in targets}
+        return {light_id: error for light_id, error in light_controller.dispatcher.run(lights, check)
+                if error is not None}
+
+def scene_outcome(scene_name, failed):
+    """(success, message) for a scene whose {light_id: error} failures are known."""
+    if not failed:
+        return True, f"Scene {scene_name} applied"
+    light_ids = sorted(failed)
+    first = light_ids[0]
+    return False, (f"Scene {scene_name}: {', '.join(light_ids)} did not respond "
+                   f"({first}: {str(failed[first])})")
+
+def hsbk_matches(actual, expected, tolerance=655):
+    """Compare two HSBK colors, allowing for the rounding bulbs apply (~1%)."""
+    hue_delta = abs(actual[0] - expected[0])
+    hue_delta = min(hue_delta, 65536 - hue_delta)  # Hue wraps around
+    if expected[1] and expected[2] and hue_delta > tolerance:
+        return False
+    return all(abs(a - e) <= tolerance for a, e in zip(actual[1:3], expected[1:3]))
@@ -0,0 +1,90 @@
+import threading
+import time
+
+DEFAULT_TTL = 10.0
+
+class LightStateCache:
+    """In-memory label/power/HSBK per light so the UI can render without the network.
+
+    Entries are considered stale once they are older than the TTL. The cache is the
+    authoritative copy of what we last told each bulb: our own set_* calls write
+    through optimistically, and bulb reports are reconciled with report(), which
+    never lets a read that was already in flight undo a newer local write.
+    """
+
+    FIELDS = ('label', 'power', 'hsbk')
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.version = 0  # Bumped on every change so readers can tell when to redraw
+
+    def get(self, light_id):
+        """Return a copy of the cached state for a light, or None if never seen."""
+        with self._lock:
+            entry = self._entries.get(light_id)
+            return dict(entry) if entry is not None else None
+
+    def update(self, light_id, **fields):
+        """Record a local write of fields (label, power, hsbk) and mark the entry fresh."""
+        with self._lock:
+            entry = self._merge(light_id, fields)
+            if 'power' in fields or 'hsbk' in fields:
+                entry['written'] = entry['updated']
+
+    def report(self, light_id, requested_at, **fields):
+        """Reconcile with state read back from a bulb.
+
+        requested_at is the time.monotonic() at which the read was sent. Power and
+        color are only taken from the report if we have not written them since then;
+        otherwise the bulb answered before our newer command reached it.
+        """
+        with self._lock:
+            entry = self._entries.get(light_id)
+            if entry is not None and entry.get('written') is not None and entry['written'] > requested_at:
+                fields = {field: value for field, value in fields.items() if field not in ('power', 'hsbk')}
+            self._merge(light_id, fields)
+
+    def _merge(self, light_id, fields):
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown light state fields: {', '.join(sorted(unknown))}")
+        entry = self._entries.setdefault(light_id, {field: None for field in self.FIELDS})
+        for field, value in fields.items():
+            entry[field] = list(value) if field == 'hsbk' and value is not None else value
+        entry['last_seen'] = time.time()
+        entry['updated'] = time.monotonic()
+        self.version += 1
+        return entry
+
+    def invalidate(self, light_id=None):
+        """Force a refresh of one light (or all lights) on the next read."""
+        with self._lock:
+            entries = self._entries.values() if light_id is None else \
+                [self._entries[light_id]] if light_id in self._entries else []
+            for entry in entries:
+                entry['updated'] = None
+
+    def changed(self):
+        """Bump the version for a change shown alongside the state but kept elsewhere (e.g. health)."""
+        with self._lock:
+            self.version += 1
+
+    def remove(self, light_id):
+        with self._lock:
+            if self._entries.pop(light_id, None) is not None:
+                self.version += 1
+
+    def is_stale(self, light_id):
+        with self._lock:
+            entry = self._entries.get(light_id)
+            if entry is None or entry['updated'] is None:
+                return True
+            if any(entry[field] is None for field in self.FIELDS):
+                return True  # Written through before we ever heard from the bulb
+            return time.monotonic() - entry['updated'] > self.ttl
+
+    def stale_ids(self, light_ids):
+        """Return the subset of light_ids that need refreshing from the bulbs."""
+        return [light_id for light_id in light_ids if self.is_stale(light_id)]
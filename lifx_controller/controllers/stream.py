@@ -0,0 +1,209 @@
+import threading
+import time
+from controllers.animation import MAX_MESSAGES_PER_SECOND
+from controllers.latency import LatencyWindow
+from ui.color_utils import rgbs_to_hsbk
+
+DEFAULT_FPS = 20
+
+def parse_hex_frame(line):
+    """One line of text input ("FF8800 #00FF00 ...") as the bytes R, G, B, R, G, B, ..."""
+    tokens = line.split()
+    if any(len(token.lstrip(b'#')) != 6 for token in tokens):
+        raise ValueError("expected colors like FF8800")
+    return bytes.fromhex(b''.join(token.lstrip(b'#') for token in tokens).decode('ascii'))
+
+class LatestFrame:
+    """One-frame mailbox between the reader and the sender.
+
+    A frame put before the sender took the previous one replaces it, so when the
+    input outruns the bulbs the stale frames are dropped rather than queued.
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.dropped = 0
+        self.closed = False
+        self._frame = None
+        self._condition = threading.Condition()
+
+    def put(self, frame):
+        with self._condition:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self.received += 1
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+    def take(self, timeout=None):
+        """The newest frame not yet taken, or None if there was none within timeout."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None or self.closed, timeout)
+            frame, self._frame = self._frame, None
+            return frame
+
+class FrameStreamer:
+    """Streams frames of RGB samples to the lights, one sample per light.
+
+    A reader thread reads frames from a binary stream: lines of hex colors, or with
+    raw, 3 bytes (R, G, B) per light. The sender thread wakes at most fps times a
+    second, takes only the newest frame, converts it to HSBK in one pass and sends
+    each light whose color changed a fire-and-forget packet that fades over one frame
+    interval, so the bulbs blend between frames. A frame shorter than the number of
+    lights is repeated across them. Latency is measured from when a frame finished
+    arriving to when its last packet was handed to the socket.
+    """
+
+    def __init__(self, light_controller, fps=DEFAULT_FPS, kelvin=3500):
+        self.light_controller = light_controller
+        self.fps = min(fps, MAX_MESSAGES_PER_SECOND)  # Each light gets at most one packet a frame
+        self.kelvin = kelvin
+        self.light_ids = list(light_controller.lights)
+        self.slot = LatestFrame()
+        self.frames_sent = 0
+        self.packets_sent = 0
+        self.send_errors = 0
+        self.bad_frames = 0
+        self.last_error = None
+        self._latencies = LatencyWindow()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def frame_size(self):
+        return 3 * len(self.light_ids)
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self, stream, raw=False, pace=None):
+        """Start reading frames from stream and sending them.
+
+        pace plays a recording back at one frame per pace seconds instead of reading
+        it as fast as possible (which would drop all but the last frames).
+        """
+        self.stop()
+        self.slot = LatestFrame()
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._read, args=(stream, raw, pace), name="lifx-stream-reader", daemon=True),
+            threading.Thread(target=self._send, name="lifx-stream", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.slot.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)  # The reader may be stuck in a blocking read
+        self._threads = []
+
+    def wait(self, timeout=None):
+        """Block until the input ends and its last frame has been sent."""
+        if len(self._threads) == 2:
+            self._threads[1].join(timeout)
+
+    def _read(self, stream, raw, pace):
+        start = time.monotonic()
+        count = 0
+        try:
+            while not self._stop.is_set():
+                if raw:
+                    data = stream.read(self.frame_size)
+                    if len(data) < self.frame_size:
+                        return  # End of input; a partial frame is ignored
+                    samples = data
+                else:
+                    line = stream.readline()
+                    if not line:
+                        return
+                    if not line.strip():
+                        continue
+                    try:
+                        samples = parse_hex_frame(line)
+                    except ValueError:
+                        self.bad_frames += 1
+                        continue
+                self.slot.put((time.monotonic(), samples))
+                count += 1
+                if pace:
+                    self._stop.wait(max(0.0, start + count * pace - time.monotonic()))
+        except (OSError, ValueError) as e:  # ValueError: the stream was closed under us
+            self.last_error = e
+        finally:
+            self.slot.close()
+
+    def _send(self):
+        lights = self.light_controller.lights
+        for light_id in self.light_ids:
+            try:
+                lights[light_id].set_power(True, rapid=True)
+            except Exception as e:
+                self.send_errors += 1
+                self.last_error = e
+
+        interval = 1.0 / self.fps
+        last_sent = {}
+        next_send = time.monotonic()
+        while not self._stop.is_set():
+            # Rate limit first and take the frame after, so it is the newest one
+            self._stop.wait(max(0.0, next_send - time.monotonic()))
+            frame = self.slot.take(timeout=0.5)
+            if frame is None:
+                if self.slot.closed:
+                    return
+                continue
+            next_send = max(next_send + interval, time.monotonic())
+            self.send_frame(frame, last_sent, int(interval * 1000))
+
+    def send_frame(self, frame, last_sent, duration):
+        """Send the lights whose color changed since last_sent; returns the packets sent."""
+        received_at, samples = frame
+        if not samples:
+            return 0
+        colors = rgbs_to_hsbk(samples[0::3], samples[1::3], samples[2::3], self.kelvin)
+        lights = self.light_controller.lights
+        sent = 0
+        for index, light_id in enumerate(self.light_ids):
+            hsbk = colors[index % len(colors)]
+            light = lights.get(light_id)
+            if light is None or last_sent.get(light_id) == hsbk:
+                continue
+            try:
+                light.set_color(hsbk, duration=duration, rapid=True)
+            except OSError as e:  # e.g. socket buffer full; the next frame carries a newer color
+                self.send_errors += 1
+                self.last_error = e
+                continue
+            last_sent[light_id] = hsbk
+            sent += 1
+        latency = time.monotonic() - received_at
+        with self._lock:
+            self.frames_sent += 1
+            self.packets_sent += sent
+            if sent:
+                self._latencies.add(latency)
+        return sent
+
+    def metrics(self):
+        """Frame and packet counters, and frame-in to packet-out latency percentiles in milliseconds."""
+        with self._lock:
+            metrics = {
+                'frames_in': self.slot.received,
+                'frames_dropped': self.slot.dropped,
+                'frames_sent': self.frames_sent,
+                'bad_frames': self.bad_frames,
+                'packets_sent': self.packets_sent,
+                'send_errors': self.send_errors,
+            }
+            metrics.update(self._latencies.metrics())
+        return metrics
@@ -0,0 +1,84 @@
+import functools
+import json
+import os
+import threading
+import time
+
+MAX_SPANS = 200000  # Oldest spans are dropped beyond this so a long session can't grow forever
+TRACE_ENV = 'LIFX_TUI_TRACE'  # Set to a file name to trace the TUI or daemon into it
+
+class Tracer:
+    """Times calls to chosen methods and exports them as a Chrome trace.
+
+    Nothing is timed until instrument() wraps an object's methods, and only that
+    instance is changed, so the hooks cost nothing unless asked for. The exported
+    file opens in chrome://tracing or https://ui.perfetto.dev, where calls made from
+    inside other traced calls nest under them on each thread.
+    """
+
+    def __init__(self, path=None, max_spans=MAX_SPANS):
+        self.path = path
+        self.max_spans = max_spans
+        self.spans = []  # (name, thread id, start, end) in time.perf_counter() seconds
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def instrument(self, obj, names=None, prefix=None):
+        """Time the given methods of obj (by default every public one); returns obj."""
+        prefix = prefix or type(obj).__name__
+        if names is None:
+            names = [name for name in dir(type(obj))
+                     if not name.startswith('_') and callable(getattr(type(obj), name, None))]
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, self.wrap(method, f"{prefix}.{name}"))
+        return obj
+
+    def wrap(self, fn, name):
+        @functools.wraps(fn)
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, start, time.perf_counter())
+        return traced
+
+    def record(self, name, start, end):
+        with self._lock:
+            self.spans.append((name, threading.get_ident(), start, end))
+            if len(self.spans) > self.max_spans:
+                del self.spans[:len(self.spans) - self.max_spans]
+
+    def durations(self):
+        """{name: [seconds, ...]} for every span recorded so far."""
+        with self._lock:
+            spans = list(self.spans)
+        durations = {}
+        for name, _, start, end in spans:
+            durations.setdefault(name, []).append(end - start)
+        return durations
+
+    def instrument_controllers(self, light_controller, scene_controller):
+        """Trace both controllers, plus the packet transport when the bulbs are local."""
+        self.instrument(light_controller)
+        self.instrument(scene_controller)
+        if hasattr(light_controller, 'transport'):
+            self.instrument(light_controller.transport, ['request', 'fire_and_forget'])
+
+    def export(self, path=None):
+        """Write the spans as Chrome trace-event JSON (to self.path by default); returns the span count."""
+        path = path or self.path
+        with self._lock:
+            spans = list(self.spans)
+        events = [{'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': thread_id,
+                   'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6}
+                  for name, thread_id, start, end in spans]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+def tracer_from_env():
+    """A Tracer writing to $LIFX_TUI_TRACE, or None when tracing wasn't asked for."""
+    path = os.environ.get(TRACE_ENV)
+    return Tracer(path) if path else None
@@ -0,0 +1,220 @@
+from controllers.latency import LatencyWindow
+from lifxlan import Light
+from lifxlan.device import UDP_BROADCAST_IP_ADDRS
+from lifxlan.errors import WorkflowException
+from lifxlan.message import BROADCAST_MAC
+from lifxlan.msgtypes import Acknowledgement
+from lifxlan.unpack import unpack_lifx_message
+import random
+import select
+import socket
+import threading
+import time
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_TIMEOUT = 1.0  # Seconds to wait for each attempt, as lifxlan does
+
+class _Pending:
+    """A request waiting for its response."""
+
+    def __init__(self, mac_addr, response_types):
+        self.mac_addr = mac_addr
+        self.response_types = response_types
+        self.response = None
+        self.sender = None
+        self.done = threading.Event()
+
+class Transport:
+    """A few shared non-blocking UDP sockets that carry every light's traffic.
+
+    lifxlan opens and closes a socket for every request. Here requests are spread over
+    a small fixed pool instead, and a single receiver thread hands each reply to the
+    request waiting for it, matched by socket and sequence number.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, health=None):
+        self.pool_size = pool_size
+        self.health = health  # Optional HealthTracker told about every request to a single light
+        self.source_id = random.randrange(2, 1 << 32)
+        self._sockets = []
+        self._sequence = []
+        self._pending = {}  # (socket index, seq_num) -> _Pending
+        self._next_socket = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._latencies = LatencyWindow()
+        self.sockets_opened = 0
+        self.requests = 0
+        self.packets_sent = 0
+        self.retries = 0
+        self.timeouts = 0
+
+    def _ensure_open(self):
+        with self._lock:
+            if self._sockets:
+                return
+            for _ in range(self.pool_size):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                sock.bind(("", 0))
+                sock.setblocking(False)
+                self._sockets.append(sock)
+                self._sequence.append(0)
+                self.sockets_opened += 1
+            self._thread = threading.Thread(target=self._receive, name="lifx-transport", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        with self._lock:
+            sockets, self._sockets, self._sequence = self._sockets, [], []
+        for sock in sockets:
+            sock.close()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _reserve(self, pending):
+        """Pick the next socket round-robin and a sequence number not already in flight there."""
+        with self._lock:
+            for _ in range(256 * len(self._sockets)):
+                index = self._next_socket
+                self._next_socket = (self._next_socket + 1) % len(self._sockets)
+                seq_num = self._sequence[index]
+                self._sequence[index] = (seq_num + 1) % 256
+                if (index, seq_num) not in self._pending:
+                    if pending is not None:
+                        self._pending[(index, seq_num)] = pending
+                    return index, seq_num
+        raise WorkflowException("WorkflowException: too many requests in flight")
+
+    def _send(self, index, packet, ip_addr, port):
+        sock = self._sockets[index]
+        addresses = [ip_addr] if ip_addr else UDP_BROADCAST_IP_ADDRS
+        for address in addresses:
+            sock.sendto(packet, (address, port))
+            with self._lock:
+                self.packets_sent += 1
+
+    def fire_and_forget(self, light, msg_type, payload, num_repeats=1):
+        """Send without asking for an acknowledgement."""
+        self._ensure_open()
+        index, seq_num = self._reserve(None)
+        msg = msg_type(light.mac_addr, self.source_id, seq_num=seq_num, payload=payload,
+                       ack_requested=False, response_requested=False)
+        for repeat in range(num_repeats):
+            self._send(index, msg.packed_message, light.ip_addr, light.port)
+            if repeat < num_repeats - 1 and num_repeats > 20:
+                time.sleep(0.05)  # Bulbs handle at most 20 messages a second
+
+    def request(self, light, msg_type, response_types, payload,
+                timeout=DEFAULT_TIMEOUT, max_attempts=1):
+        """Send a request and block until one of response_types arrives from the light."""
+        tracked = self.health is not None and light.ip_addr and light.mac_addr != BROADCAST_MAC
+        if tracked:
+            self.health.acquire(light.mac_addr)  # Fails fast for a light that stopped answering
+        try:
+            pending, latency = self._request(light, msg_type, response_types, payload, timeout, max_attempts)
+        except Exception as e:
+            if tracked:
+                self.health.failure(light.mac_addr, e)
+            raise
+        if pending.response is None:
+            with self._lock:
+                self.timeouts += 1
+            if tracked:
+                self.health.failure(light.mac_addr, f"no response within {timeout * max_attempts:g}s")
+            raise WorkflowException("WorkflowException: Did not receive {} from {} (Name: {}) in response to {}".format(
+                str(response_types), str(light.mac_addr), str(light.label), str(msg_type)))
+        if tracked:
+            self.health.success(light.mac_addr, latency)
+        light.ip_addr = pending.sender
+        return pending.response
+
+    def _request(self, light, msg_type, response_types, payload, timeout, max_attempts):
+        """Send (and resend) the packet; returns the _Pending, answered or not, and the latency."""
+        self._ensure_open()
+        pending = _Pending(light.mac_addr, response_types)
+        index, seq_num = self._reserve(pending)
+        ack_only = response_types == [Acknowledgement]
+        msg = msg_type(light.mac_addr, self.source_id, seq_num=seq_num, payload=payload,
+                       ack_requested=ack_only, response_requested=not ack_only)
+        start = time.monotonic()
+        try:
+            with self._lock:
+                self.requests += 1
+            for attempt in range(max_attempts):
+                if attempt:
+                    with self._lock:
+                        self.retries += 1
+                self._send(index, msg.packed_message, light.ip_addr, light.port)
+                if pending.done.wait(timeout):
+                    break
+        finally:
+            with self._lock:
+                self._pending.pop((index, seq_num), None)
+
+        latency = time.monotonic() - start
+        if pending.response is not None:
+            with self._lock:
+                self._latencies.add(latency)
+        return pending, latency
+
+    def _receive(self):
+        while True:
+            sockets = list(self._sockets)
+            if not sockets:
+                return
+            try:
+                ready, _, _ = select.select(sockets, [], [], 0.5)
+            except (OSError, ValueError):
+                return  # Closed underneath us
+            for sock in ready:
+                try:
+                    data, (ip_addr, _) = sock.recvfrom(1024)
+                    response = unpack_lifx_message(data)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError:
+                    return
+                except Exception:
+                    continue  # Not a LIFX packet
+                if response.source_id != self.source_id:
+                    continue
+                with self._lock:
+                    index = sockets.index(sock)
+                    pending = self._pending.get((index, response.seq_num))
+                if pending is None or type(response) not in pending.response_types:
+                    continue
+                if response.target_addr not in (pending.mac_addr, BROADCAST_MAC):
+                    continue
+                pending.response = response
+                pending.sender = ip_addr
+                pending.done.set()
+
+    def metrics(self):
+        """Counters and request latency percentiles (in milliseconds) since startup."""
+        with self._lock:
+            metrics = {
+                'sockets_opened': self.sockets_opened,
+                'requests': self.requests,
+                'packets_sent': self.packets_sent,
+                'retries': self.retries,
+                'timeouts': self.timeouts,
+            }
+            metrics.update(self._latencies.metrics())
+        return metrics
+
+class PooledLight(Light):
+    """lifxlan Light whose packets go through a shared Transport instead of private sockets."""
+
+    def __init__(self, mac_addr, ip_addr, transport, port=56700):
+        super().__init__(mac_addr, ip_addr, port=port, source_id=transport.source_id)
+        self.transport = transport
+
+    def fire_and_forget(self, msg_type, payload={}, timeout_secs=DEFAULT_TIMEOUT, num_repeats=1):
+        self.transport.fire_and_forget(self, msg_type, payload, num_repeats)
+
+    def req_with_resp(self, msg_type, response_type, payload={}, timeout_secs=DEFAULT_TIMEOUT, max_attempts=1):
+        if not isinstance(response_type, list):
+            response_type = [response_type]
+        return self.transport.request(self, msg_type, response_type, payload, timeout_secs, max_attempts)
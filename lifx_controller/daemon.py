@@ -0,0 +1,473 @@
+from controllers.paths import default_socket_path
+from controllers.state_cache import LightStateCache
+import collections
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+
+WATCH_INTERVAL = 0.05  # Seconds between checks for state changes to push to watchers
+
+class DaemonError(Exception):
+    pass
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class _Connection(socketserver.StreamRequestHandler):
+    """One client connection speaking newline-delimited JSON."""
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+
+    def handle(self):
+        daemon = self.server.light_daemon
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    self.send({'error': "Malformed request"})
+                    continue
+                if request.get('method') == 'watch':
+                    daemon.add_watcher(self, request.get('id'))
+                    continue
+                self.send(daemon.dispatch(request))
+        finally:
+            daemon.remove_watcher(self)
+
+    def send(self, message):
+        with self.write_lock:
+            self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+class LightDaemon:
+    """Long-running owner of the controllers, the state cache and the open sockets.
+
+    Clients send {"id", "method", "params"} lines over a Unix socket and get back
+    {"id", "result"} or {"id", "error"}. A client that sends "watch" is sent every
+    light in a {"event": "lights", "lights": {...}} line and is then pushed
+    {"event": "changes", "lights": {...}, "removed": [...]} with just the lights that
+    changed, so any number of TUIs can share one live view.
+    """
+
+    def __init__(self, light_controller, scene_controller, socket_path=None):
+        self.light_controller = light_controller
+        self.scene_controller = scene_controller
+        self.socket_path = socket_path or default_socket_path()
+        self.methods = {
+            'turn_all_on': light_controller.turn_all_on,
+            'turn_all_off': light_controller.turn_all_off,
+            'set_light_power': light_controller.set_light_power,
+            'set_light_color': light_controller.set_light_color,
+            'set_light_brightness': light_controller.set_light_brightness,
+            'queue_light_brightness': light_controller.queue_light_brightness,
+            'toggle_light': light_controller.toggle_light,
+            'get_all_lights': light_controller.get_all_lights,
+            'add_light': light_controller.add_light,
+            'remove_light': light_controller.remove_light,
+            'discover_lights': light_controller.discover_lights,
+            'add_to_group': light_controller.add_to_group,
+            'remove_from_group': light_controller.remove_from_group,
+            'set_group_power': light_controller.set_group_power,
+            'set_group_color': light_controller.set_group_color,
+            'list_groups': lambda: {group: light_controller.groups.lights_in(group)
+                                    for group in light_controller.groups.names()},
+            'metrics': light_controller.transport.metrics,
+            'list_scenes': lambda: {'scenes': self.scene_controller.scenes,
+                                    'dynamic_scenes': sorted(self.scene_controller.dynamic_scenes),
+                                    'version': self.scene_controller.store.version,
+                                    'error': self.scene_controller.scene_error},
+            'scene_version': self.scene_controller.store.check,
+            'apply_scene': self.apply_scene,
+            'start_dynamic_scene': lambda scene_name: self.scene_controller.start_dynamic_scene(
+                scene_name, self.light_controller),
+            'stop_dynamic_scene': self.scene_controller.stop_dynamic_scene,
+            'animation_error': lambda: self.scene_controller.animation_error,
+            'ping': lambda: 'pong',
+        }
+        self._watchers = {}  # connection -> the lights as last sent to it
+        self._watch_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self._poller = None
+
+    def apply_scene(self, scene_name, verify=True, group=None):
+        return self.scene_controller.apply_scene_batched(scene_name, self.light_controller,
+                                                         verify=verify, group=group)
+
+    def dispatch(self, request):
+        method = self.methods.get(request.get('method'))
+        if method is None:
+            return {'id': request.get('id'), 'error': f"Unknown method {request.get('method')!r}"}
+        try:
+            return {'id': request.get('id'), 'result': method(**request.get('params', {}))}
+        except Exception as e:
+            return {'id': request.get('id'), 'error': str(e)}
+
+    def light_infos(self):
+        """Every light's info from the state cache; the poller, not us, refreshes stale lights."""
+        infos = {}
+        for light_id in list(self.light_controller.lights):
+            info = self.light_controller.get_cached_light_info(light_id)
+            if info:
+                infos[light_id] = info
+        return infos
+
+    def snapshot_event(self):
+        return {'event': 'lights', 'lights': self.light_infos()}
+
+    def add_watcher(self, connection, request_id=None):
+        """Acknowledge a watch and send every light, then include the connection in pushes.
+
+        Done under the watch lock so no push can reach the connection ahead of its snapshot.
+        """
+        with self._watch_lock:
+            event = self.snapshot_event()
+            connection.send({'id': request_id, 'result': True})
+            connection.send(event)
+            self._watchers[connection] = event['lights']
+
+    def remove_watcher(self, connection):
+        with self._watch_lock:
+            self._watchers.pop(connection, None)
+
+    def _push_changes(self):
+        """Send each watcher the lights that changed since it was last sent them."""
+        version = self.light_controller.state_cache.version
+        while not self._stop.wait(WATCH_INTERVAL):
+            if self.light_controller.state_cache.version == version:
+                continue
+            version = self.light_controller.state_cache.version
+            lights = self.light_infos()
+            with self._watch_lock:
+                for connection, pushed in list(self._watchers.items()):
+                    changed = {light_id: info for light_id, info in lights.items()
+                               if pushed.get(light_id) != info}
+                    removed = [light_id for light_id in pushed if light_id not in lights]
+                    if not changed and not removed:
+                        continue
+                    try:
+                        connection.send({'event': 'changes', 'lights': changed, 'removed': removed})
+                    except (OSError, ValueError):  # ValueError: the client hung up mid-push
+                        del self._watchers[connection]
+                        continue
+                    self._watchers[connection] = lights
+
+    def start(self):
+        """Bind the socket and serve on background threads."""
+        from controllers.poller import StatePoller
+
+        if os.path.exists(self.socket_path):
+            if DaemonClient.available(self.socket_path):
+                raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # Left behind by a daemon that died
+        self._server = _Server(self.socket_path, _Connection)
+        os.chmod(self.socket_path, 0o600)
+        self._server.light_daemon = self
+        self._stop.clear()
+        self._poller = StatePoller(self.light_controller)
+        self._poller.start()
+        threading.Thread(target=self._server.serve_forever, name="lifx-daemon", daemon=True).start()
+        threading.Thread(target=self._push_changes, name="lifx-daemon-watch", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        if self._poller is not None:
+            self._poller.stop()
+            self._poller = None
+        self.scene_controller.stop_dynamic_scene()
+        self.light_controller.close()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self._stop.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+class DaemonClient:
+    """Blocking client for LightDaemon; one request at a time per client."""
+
+    def __init__(self, socket_path=None, timeout=30.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(self.socket_path)
+        self.rfile = self.sock.makefile('rb')
+        self.events = collections.deque()  # Pushed events read while waiting for a reply
+        self.next_id = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def available(cls, socket_path=None):
+        try:
+            cls(socket_path, timeout=1.0).close()
+            return True
+        except OSError:
+            return False
+
+    @classmethod
+    def connect(cls, socket_path=None):
+        """Return a connected client, or None if no daemon is running."""
+        path = socket_path or default_socket_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except OSError:
+            return None
+
+    def call(self, method, **params):
+        with self.lock:
+            self.next_id += 1
+            request = {'id': self.next_id, 'method': method, 'params': params}
+            self.sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    raise DaemonError("Daemon closed the connection")
+                response = json.loads(line)
+                if response.get('id') == self.next_id:
+                    break
+                if 'event' in response:
+                    self.events.append(response)
+        if 'error' in response:
+            raise DaemonError(response['error'])
+        return response['result']
+
+    def watch(self, callback):
+        """Call callback(lights, removed) from a background thread whenever the daemon reports changes.
+
+        The first call has every light and removed None; later ones have only the lights
+        that changed and the ids of any that were removed.
+        """
+        self.call('watch')
+
+        def handle(event):
+            if event.get('event') == 'lights':
+                callback(event['lights'], None)
+            elif event.get('event') == 'changes':
+                callback(event['lights'], event['removed'])
+
+        def read_events():
+            try:
+                while self.events:
+                    handle(self.events.popleft())
+                for line in self.rfile:
+                    handle(json.loads(line))
+            except (OSError, ValueError):  # ValueError: closed by close() mid-read
+                pass
+
+        threading.Thread(target=read_events, name="lifx-daemon-events", daemon=True).start()
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)  # Ends a watch thread's read, which holds rfile's lock
+        except OSError:
+            pass
+        self.rfile.close()
+        self.sock.close()
+
+class ThreadClients:
+    """Hands each calling thread its own DaemonClient, created on first use.
+
+    A DaemonClient serves one request at a time, so sharing one between the UI and
+    the poller thread would leave the UI waiting out a slow discover or scene. The
+    thread that creates this keeps using first.
+    """
+
+    def __init__(self, first):
+        self.socket_path = first.socket_path
+        self._clients = [first]
+        self._local = threading.local()
+        self._local.client = first
+        self._lock = threading.Lock()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = DaemonClient(self.socket_path)
+            with self._lock:
+                self._clients.append(client)
+            self._local.client = client
+        return client
+
+    def call(self, method, **params):
+        return self._client().call(method, **params)
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+
+class RemoteLightController:
+    """Stands in for LightController inside the TUI, forwarding everything to the daemon.
+
+    Light state arrives over a watch connection and is mirrored into a local
+    LightStateCache, so the TUI renders and detects changes exactly as it does locally.
+    """
+
+    def __init__(self, client, watch_client):
+        self.client = client
+        self.watch_client = watch_client
+        self.state_cache = LightStateCache(ttl=float('inf'))
+        self.lights = {}
+        watch_client.watch(self._mirror)
+
+    def _mirror(self, lights, removed=None):
+        if removed is None:  # A full snapshot: anything not in it is gone
+            removed = set(self.lights) - set(lights)
+        for light_id in removed:
+            self.lights.pop(light_id, None)
+            self.state_cache.remove(light_id)
+        for light_id, info in lights.items():
+            previous = self.lights.get(light_id, {})
+            self.lights[light_id] = info
+            fields = {field: info[field] for field in LightStateCache.FIELDS if field in info}
+            state = self.state_cache.get(light_id)
+            if state is None or any(state[field] != value for field, value in fields.items()):
+                self.state_cache.update(light_id, **fields)
+            elif previous.get('health', {}).get('circuit') != info.get('health', {}).get('circuit'):
+                self.state_cache.changed()
+
+    def refresh_stale_lights(self):
+        pass  # The daemon keeps its own cache fresh
+
+    def close(self):
+        self.client.close()
+        self.watch_client.close()
+
+    def get_all_lights(self):
+        lights_info = {}
+        for light_id, info in list(self.lights.items()):
+            lights_info[light_id] = dict(info)
+        return lights_info
+
+    def _call(self, method, **params):
+        return tuple(self.client.call(method, **params))
+
+    def add_light(self, light_id, mac_addr, ip_addr):
+        return self._call('add_light', light_id=light_id, mac_addr=mac_addr, ip_addr=ip_addr)
+
+    def remove_light(self, light_id):
+        return self._call('remove_light', light_id=light_id)
+
+    def discover_lights(self):
+        return self._call('discover_lights')
+
+    def set_light_power(self, light_id, power_state):
+        return self._call('set_light_power', light_id=light_id, power_state=power_state)
+
+    def set_light_color(self, light_id, hsbk):
+        return self._call('set_light_color', light_id=light_id, hsbk=hsbk)
+
+    def set_light_brightness(self, light_id, brightness):
+        return self._call('set_light_brightness', light_id=light_id, brightness=brightness)
+
+    def queue_light_brightness(self, light_id, brightness):
+        return self._call('queue_light_brightness', light_id=light_id, brightness=brightness)
+
+    def toggle_light(self, light_id):
+        return self._call('toggle_light', light_id=light_id)
+
+    def add_to_group(self, light_id, group):
+        return self._call('add_to_group', light_id=light_id, group=group)
+
+    def remove_from_group(self, light_id, group):
+        return self._call('remove_from_group', light_id=light_id, group=group)
+
+    def set_group_power(self, group, power_state):
+        return [tuple(result) for result in self.client.call('set_group_power', group=group,
+                                                             power_state=power_state)]
+
+    def set_group_color(self, group, hsbk):
+        return [tuple(result) for result in self.client.call('set_group_color', group=group, hsbk=hsbk)]
+
+    def turn_all_on(self):
+        return [tuple(result) for result in self.client.call('turn_all_on')]
+
+    def turn_all_off(self):
+        return [tuple(result) for result in self.client.call('turn_all_off')]
+
+class RemoteSceneController:
+    """Stands in for SceneController inside the TUI, applying scenes through the daemon.
+
+    The daemon's scene table is fetched and compiled locally, and fetched again when
+    the daemon reports that its scene files changed.
+    """
+
+    def __init__(self, client, check_interval=None):
+        from config.scene_store import CHECK_INTERVAL
+
+        self.client = client
+        self.check_interval = CHECK_INTERVAL if check_interval is None else check_interval
+        self.version = None
+        self.scene_error = None
+        self.animation_error = None
+        self._scenes = {}
+        self._checked_at = float('-inf')
+        self._fetch()
+
+    def _fetch(self):
+        from config.scene_store import compile_scenes
+
+        listing = self.client.call('list_scenes')
+        self._scenes = compile_scenes(listing['scenes'])
+        self.dynamic_scenes = listing['dynamic_scenes']
+        self.version = listing['version']
+        self.scene_error = listing['error']
+
+    @property
+    def scenes(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            if self.client.call('scene_version') != self.version:
+                self._fetch()
+            self.animation_error = self.client.call('animation_error')
+        return self._scenes
+
+    def apply_scene(self, scene_name, light_controller, group=None):
+        return tuple(self.client.call('apply_scene', scene_name=scene_name, verify=False, group=group))
+
+    def apply_scene_batched(self, scene_name, light_controller, verify=False, group=None):
+        return tuple(self.client.call('apply_scene', scene_name=scene_name, verify=verify, group=group))
+
+    def start_dynamic_scene(self, scene_name, light_controller):
+        return tuple(self.client.call('start_dynamic_scene', scene_name=scene_name))
+
+    def stop_dynamic_scene(self):
+        self.client.call('stop_dynamic_scene')
+
+def run_daemon(socket_path=None):
+    """Run the daemon in the foreground until interrupted."""
+    from controllers.light_controller import LightController
+    from controllers.scene_controller import SceneController
+    from controllers.tracing import tracer_from_env
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # Clean up the socket on kill too
+    light_controller, scene_controller = LightController(), SceneController()
+    tracer = tracer_from_env()
+    if tracer is not None:
+        tracer.instrument_controllers(light_controller, scene_controller)
+    daemon = LightDaemon(light_controller, scene_controller, socket_path)
+    print(f"Listening on {daemon.socket_path}")
+    try:
+        daemon.serve_forever()
+    finally:
+        if tracer is not None:
+            tracer.export()
@@ -1,26 +1,40 @@
-from controllers.light_controller import LightController
-from controllers.scene_controller import SceneController
-from ui.tui import TUI
-import curses
 import sys
 
 def main():
-    light_controller = LightController()
-    scene_controller = SceneController()
-    tui = TUI(light_controller, scene_controller)
-
     if len(sys.argv) > 1:
-        command = sys.argv[1].lower()
-        if command == "on":
-            light_controller.turn_all_on()
-        elif command == "off":
-            light_controller.turn_all_off()
-        elif len(sys.argv) == 3 and sys.argv[2].lower() == "on":
-            scene_controller.apply_scene(command, light_controller)
-        else:
-            print("Invalid command")
+        # One-shot commands skip curses, the TUI and lifxlan entirely
+        from cli import run_cli
+        sys.exit(run_cli(sys.argv[1:]))
+
+    import curses
+    from controllers.tracing import tracer_from_env
+    from daemon import DaemonClient, RemoteLightController, RemoteSceneController, ThreadClients
+    from ui.tui import TUI
+
+    client = DaemonClient.connect()
+    if client is not None:
+        # Attach to the running daemon as one more watcher instead of owning the bulbs;
+        # the poller thread gets its own connection so its calls never stall the UI
+        clients = ThreadClients(client)
+        light_controller = RemoteLightController(clients, DaemonClient(client.socket_path))
+        scene_controller = RemoteSceneController(clients)
     else:
+        from controllers.light_controller import LightController
+        from controllers.scene_controller import SceneController
+        light_controller = LightController()
+        scene_controller = SceneController()
+    tracer = tracer_from_env()
+    if tracer is not None:
+        tracer.instrument_controllers(light_controller, scene_controller)
+    tui = TUI(light_controller, scene_controller)
+    if tracer is not None:
+        tracer.instrument(tui, ['draw_menu'])
+    try:
         curses.wrapper(tui.run)
+    finally:
+        light_controller.close()
+        if tracer is not None:
+            tracer.export()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
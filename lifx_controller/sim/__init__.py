@@ -0,0 +1,4 @@
+from .fake_bulb import FakeBulb, FakeBulbServer
+from .fleet import fleet_controller
+
+__all__ = ['FakeBulb', 'FakeBulbServer', 'fleet_controller']
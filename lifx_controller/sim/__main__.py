@@ -0,0 +1,34 @@
+import argparse
+import json
+import threading
+
+from sim.fake_bulb import FakeBulbServer
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m sim",
+                                     description="Serve a fleet of fake LIFX bulbs on localhost.")
+    parser.add_argument('--bulbs', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds before each reply")
+    parser.add_argument('--loss', type=float, default=0.0, help="fraction of packets dropped")
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--config', help="write a lights_config.json for the fleet here "
+                                         "(printed to stdout otherwise)")
+    args = parser.parse_args()
+
+    with FakeBulbServer(args.bulbs, port=args.port, latency=args.latency, loss=args.loss) as server:
+        config = {light_id: {'mac_addr': light.mac_addr, 'ip_addr': light.ip_addr, 'port': light.port}
+                  for light_id, light in server.make_lights().items()}
+        if args.config:
+            with open(args.config, 'w') as f:
+                json.dump(config, f, indent=4)
+            print(f"Wrote {args.config}")
+        else:
+            print(json.dumps(config, indent=4))
+        print(f"{args.bulbs} fake bulbs listening on {server.host}:{server.port}; Ctrl-C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
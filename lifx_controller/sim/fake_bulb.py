@@ -0,0 +1,187 @@
+from collections import Counter
+from lifxlan import Light
+from lifxlan.message import BROADCAST_MAC
+from lifxlan.msgtypes import Acknowledgement, GetHostFirmware, GetLabel, GetPower, GetService, LightGet, \
+    LightGetPower, LightSetColor, LightSetPower, LightState, LightStatePower, SetPower, StateHostFirmware, \
+    StateLabel, StatePower, StateService
+from lifxlan.unpack import unpack_lifx_message
+import heapq
+import itertools
+import random
+import socket
+import threading
+import time
+
+class FakeBulb:
+    """State of one emulated bulb."""
+
+    def __init__(self, mac_addr, label):
+        self.mac_addr = mac_addr
+        self.label = label
+        self.color = [0, 0, 65535, 3500]
+        self.power_level = 0
+        self.firmware = (3 << 16) | 70  # Reported as 3.70
+
+class FakeBulbServer:
+    """Local UDP stand-in for a set of LIFX bulbs that share one address.
+
+    Every packet received is counted, so callers can measure how many messages an
+    operation costs. Unicast packets are answered by the bulb whose MAC they target;
+    tagged (broadcast) packets are applied to every bulb. To look like a real network,
+    replies can be held back by latency seconds and a loss fraction of the packets
+    received can be dropped before any bulb sees them (seed makes the losses repeatable).
+    """
+
+    def __init__(self, count=0, host='127.0.0.1', port=0, latency=0.0, loss=0.0, seed=None):
+        self.host = host
+        self.latency = latency
+        self.loss = loss
+        self.dropped = 0
+        self.bulbs = {}
+        self.packets = Counter()
+        self.first_packet_at = None  # time.monotonic() of the first packet since reset_counts()
+        self._lock = threading.Lock()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.1)
+        self.port = self._sock.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread = None
+        self._random = random.Random(seed)
+        self._delayed = []  # Heap of (send at, sequence, packet, addr)
+        self._sequence = itertools.count()  # Keeps replies due at the same moment in order
+        self._delay_condition = threading.Condition()
+        self._delay_thread = None
+        for i in range(count):
+            self.add_bulb(f"d0:73:d5:{i >> 16 & 0xff:02x}:{i >> 8 & 0xff:02x}:{i & 0xff:02x}",
+                          f"Fake {i + 1}")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def add_bulb(self, mac_addr, label):
+        self.bulbs[mac_addr] = FakeBulb(mac_addr, label)
+        return self.bulbs[mac_addr]
+
+    def make_lights(self, factory=None):
+        """Return {light_id: light} pointing at this server, one per bulb.
+
+        factory(mac_addr, ip_addr, port) builds each light; by default a plain lifxlan.Light.
+        """
+        if factory is None:
+            factory = lambda mac_addr, ip_addr, port: Light(mac_addr, ip_addr, port=port)
+        return {f"light{i + 1}": factory(mac_addr, self.host, self.port)
+                for i, mac_addr in enumerate(self.bulbs)}
+
+    def packet_count(self):
+        with self._lock:
+            return sum(self.packets.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.packets.clear()
+            self.first_packet_at = None
+            self.dropped = 0
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, name="fake-bulbs", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._delay_condition:
+            self._delay_condition.notify()
+        for thread in (self._thread, self._delay_thread):
+            if thread is not None:
+                thread.join()
+        self._thread = self._delay_thread = None
+        self._sock.close()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                data, addr = self._sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                message = unpack_lifx_message(data)
+            except Exception:
+                continue
+            with self._lock:
+                self.packets[type(message).__name__] += 1
+                if self.first_packet_at is None:
+                    self.first_packet_at = time.monotonic()
+                if self.loss and self._random.random() < self.loss:
+                    self.dropped += 1
+                    continue
+            self.handle(message, addr)
+
+    def handle(self, message, addr):
+        if message.target_addr == BROADCAST_MAC:
+            targets = list(self.bulbs.values())
+        elif message.target_addr in self.bulbs:
+            targets = [self.bulbs[message.target_addr]]
+        else:
+            return
+
+        for bulb in targets:
+            if isinstance(message, LightSetColor):
+                bulb.color = list(message.color)
+            elif isinstance(message, (LightSetPower, SetPower)):
+                bulb.power_level = message.power_level
+
+            if message.ack_requested:
+                self.reply(Acknowledgement(bulb.mac_addr, message.source_id, message.seq_num), addr)
+            if isinstance(message, GetService):
+                self.reply(StateService(bulb.mac_addr, message.source_id, message.seq_num,
+                                        {"service": 1, "port": self.port}), addr)
+            elif isinstance(message, GetLabel):
+                self.reply(StateLabel(bulb.mac_addr, message.source_id, message.seq_num,
+                                      {"label": bulb.label}), addr)
+            elif isinstance(message, GetHostFirmware):
+                self.reply(StateHostFirmware(bulb.mac_addr, message.source_id, message.seq_num,
+                                             {"build": 0, "reserved1": 0, "version": bulb.firmware}), addr)
+            elif isinstance(message, (LightGetPower, GetPower)):
+                reply_type = LightStatePower if isinstance(message, LightGetPower) else StatePower
+                self.reply(reply_type(bulb.mac_addr, message.source_id, message.seq_num,
+                                      {"power_level": bulb.power_level}), addr)
+            elif isinstance(message, LightGet):
+                self.reply(LightState(bulb.mac_addr, message.source_id, message.seq_num, {
+                    "color": bulb.color, "reserved1": 0, "power_level": bulb.power_level,
+                    "label": bulb.label, "reserved2": 0}), addr)
+
+    def reply(self, message, addr):
+        if self.latency <= 0:
+            self._sock.sendto(message.packed_message, addr)
+            return
+        with self._delay_condition:
+            heapq.heappush(self._delayed, (time.monotonic() + self.latency, next(self._sequence),
+                                           message.packed_message, addr))
+            if self._delay_thread is None:
+                self._delay_thread = threading.Thread(target=self._send_delayed, name="fake-bulbs-delay",
+                                                      daemon=True)
+                self._delay_thread.start()
+            self._delay_condition.notify()
+
+    def _send_delayed(self):
+        while True:
+            with self._delay_condition:
+                while not self._stop.is_set():
+                    now = time.monotonic()
+                    if self._delayed and self._delayed[0][0] <= now:
+                        break
+                    self._delay_condition.wait(self._delayed[0][0] - now if self._delayed else None)
+                if self._stop.is_set():
+                    return
+                _, _, packet, addr = heapq.heappop(self._delayed)
+            try:
+                self._sock.sendto(packet, addr)
+            except OSError:
+                return
@@ -0,0 +1,26 @@
+import contextlib
+import os
+import tempfile
+
+from controllers.light_controller import LightController
+
+@contextlib.contextmanager
+def fleet_controller(server, config_dir=None):
+    """A LightController driving every bulb of server, with discovery pointed at it too.
+
+    Its lights_config.json goes in config_dir, or in a temporary directory that is
+    removed afterwards, so a user's real config is never read or written. The
+    controller is closed on exit.
+    """
+    with contextlib.ExitStack() as stack:
+        if config_dir is None:
+            config_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        light_controller = LightController(config_file=os.path.join(config_dir, "lights_config.json"))
+        light_controller.lights = server.make_lights(light_controller.make_light)
+        light_controller.broadcast_addr = server.host
+        light_controller.broadcast_port = server.port
+        try:
+            yield light_controller
+        finally:
+            light_controller.close()
+            light_controller.dispatcher.shutdown()
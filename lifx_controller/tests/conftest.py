@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The code imports its packages from the lifx_controller directory, as main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
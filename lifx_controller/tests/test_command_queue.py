@@ -0,0 +1,39 @@
+import threading
+
+from controllers.command_queue import CoalescingQueue
+
+
+def test_queued_commands_coalesce_and_go_out_as_one_batch():
+    batches = []
+    started, release = threading.Event(), threading.Event()
+
+    def send_batch(batch):
+        started.set()
+        release.wait(1.0)  # Hold the worker so later puts pile up behind the first
+        batches.append(batch)
+        return [(key, None) for key, _ in batch]
+
+    queue = CoalescingQueue(send_batch)
+    queue.put(('light1', 'color'), 1)
+    assert started.wait(1.0)
+    for value in range(2, 6):
+        for light_id in ('light1', 'light2', 'light3'):
+            queue.put((light_id, 'color'), value)
+    release.set()
+
+    assert queue.flush(timeout=2.0)
+    queue.stop()
+    assert batches[-1] == [(('light1', 'color'), 5), (('light2', 'color'), 5), (('light3', 'color'), 5)]
+    assert len(batches) == 2
+    assert queue.sent == 4
+
+
+def test_failed_commands_are_recorded():
+    error = OSError("no route")
+    queue = CoalescingQueue(lambda batch: [(key, error) for key, _ in batch])
+    queue.put(('light1', 'power'), True)
+
+    assert queue.flush(timeout=1.0)
+    queue.stop()
+    assert queue.sent == 0
+    assert queue.last_error is error
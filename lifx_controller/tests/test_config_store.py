@@ -0,0 +1,100 @@
+import json
+import os
+import time
+
+import pytest
+
+from controllers.config_store import LightConfigStore
+
+DELAY = 0.05
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "lights_config.json")
+
+
+@pytest.fixture
+def store(path):
+    store = LightConfigStore(path, delay=DELAY, max_delay=10 * DELAY)
+    yield store
+    store.close()
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def wait_for_writes(store, count, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while store.writes < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(2 * DELAY)  # Catch any writes beyond the expected count
+
+
+def test_several_changes_are_written_once(store, path):
+    store.put("light1", mac_addr="d0:73:d5:00:00:01", ip_addr="192.168.1.10")
+    store.put("light2", mac_addr="d0:73:d5:00:00:02", ip_addr="192.168.1.11")
+    store.update("light1", label="Desk")
+    store.remove("light2")
+
+    wait_for_writes(store, 1)
+
+    assert store.writes == 1
+    assert not store.dirty
+    assert read(path) == {"light1": {"mac_addr": "d0:73:d5:00:00:01", "ip_addr": "192.168.1.10",
+                                     "label": "Desk"}}
+
+
+def test_unchanged_fields_do_not_dirty_the_store(store, path):
+    store.put("light1", label="Desk")
+    assert store.flush()
+
+    assert not store.put("light1", label="Desk")
+    assert not store.update("light9", label="Nowhere")
+    assert not store.dirty
+    assert store.writes == 1
+
+
+def test_close_writes_pending_changes(path):
+    store = LightConfigStore(path, delay=60, max_delay=60)
+    store.put("light1", label="Desk", groups=["den"])
+
+    assert store.close()
+
+    assert store.writes == 1
+    assert read(path) == {"light1": {"label": "Desk", "groups": ["den"]}}
+
+
+def test_flush_writes_at_once_and_load_reads_it_back(path):
+    store = LightConfigStore(path, delay=60, max_delay=60)
+    store.put("light1", label="Desk")
+
+    assert store.flush()
+    assert read(path) == {"light1": {"label": "Desk"}}
+    assert LightConfigStore(path).load() == {"light1": {"label": "Desk"}}
+    store.close()
+
+
+def test_failed_write_leaves_the_old_file_and_keeps_changes_pending(store, path, tmp_path, monkeypatch):
+    store.put("light1", label="Desk")
+    assert store.flush()
+
+    def interrupted(src, dst):
+        raise OSError("disk full")
+
+    store.delay = store.max_delay = 60  # Keep the writer thread out of the way
+    monkeypatch.setattr(os, 'replace', interrupted)
+    store.put("light1", label="Kitchen")
+
+    assert not store.flush()
+
+    assert read(path) == {"light1": {"label": "Desk"}}
+    assert os.listdir(tmp_path) == ["lights_config.json"]  # No temporary file left behind
+    assert str(store.last_error) == "disk full"
+    assert store.dirty
+
+    monkeypatch.undo()
+    assert store.flush()
+    assert read(path) == {"light1": {"label": "Kitchen"}}
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from controllers.scene_controller import SceneController
+from daemon import DaemonClient, LightDaemon, RemoteLightController
+from sim import FakeBulbServer, fleet_controller
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Never near a real lights_config.json
+    with FakeBulbServer(3) as server, fleet_controller(server, str(tmp_path)) as light_controller:
+        daemon = LightDaemon(light_controller, SceneController(), str(tmp_path / "daemon.sock"))
+        daemon.start()
+        yield daemon
+        daemon.stop()
+
+
+@pytest.fixture
+def remote(daemon):
+    client = DaemonClient(daemon.socket_path)
+    remote = RemoteLightController(client, DaemonClient(daemon.socket_path))
+    yield remote
+    remote.close()
+
+
+def test_watchers_are_pushed_only_the_lights_that_changed(daemon, remote):
+    assert wait_until(lambda: len(remote.lights) == 3 and all('power' in info for info in remote.lights.values()))
+    events = []
+    watcher = DaemonClient(daemon.socket_path)
+    watcher.watch(lambda lights, removed: events.append((set(lights), removed)))
+    assert wait_until(lambda: events)
+    assert events[0] == ({'light1', 'light2', 'light3'}, None)  # Everything, once
+
+    remote.set_light_power('light2', True)
+
+    assert wait_until(lambda: len(events) > 1)
+    assert events[1] == ({'light2'}, [])
+    assert remote.lights['light2']['power'] == 65535
+    watcher.close()
+
+
+def test_removed_lights_are_pushed_and_dropped_from_the_mirror(daemon, remote):
+    assert wait_until(lambda: 'light3' in remote.lights)
+
+    remote.remove_light('light3')
+
+    assert wait_until(lambda: 'light3' not in remote.lights)
+    assert remote.state_cache.get('light3') is None
+    assert set(remote.lights) == {'light1', 'light2'}
+
+
+def test_events_read_while_waiting_for_a_reply_are_kept_for_watch(daemon):
+    client = DaemonClient(daemon.socket_path)
+    client.sock.sendall(b'{"id": 99, "method": "watch"}\n')  # Events start before our next reply
+    time.sleep(0.1)
+    assert client.call('ping') == 'pong'
+    assert [event['event'] for event in client.events] == ['lights']
+
+    received = threading.Event()
+    client.watch(lambda lights, removed: received.set())  # The buffered snapshot is delivered
+
+    assert received.wait(1.0)
+    client.close()
@@ -0,0 +1,37 @@
+import threading
+import time
+
+from controllers.dispatcher import Dispatcher
+
+
+def test_concurrent_fan_outs_of_different_sizes_share_the_pool():
+    dispatcher = Dispatcher()
+    errors = []
+
+    def fan_out(count):
+        try:
+            results = dispatcher.run({i: None for i in range(count)}, lambda i, light: time.sleep(0.001))
+            assert all(error is None for _, error in results)
+        except Exception as e:
+            errors.append(e)
+
+    for _ in range(50):
+        threads = [threading.Thread(target=fan_out, args=(count,)) for count in (2, 50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    dispatcher.shutdown()
+    assert errors == []
+
+
+def test_calls_queued_past_the_timeout_fail_without_waiting():
+    dispatcher = Dispatcher(max_workers=1, timeout=0.2)
+    start = time.monotonic()
+
+    results = dispatcher.run({i: None for i in range(5)}, lambda i, light: time.sleep(0.15))
+
+    assert time.monotonic() - start < 0.5
+    assert results[0] == (0, None)
+    assert all(isinstance(error, TimeoutError) for _, error in results[1:])
+    dispatcher.shutdown()
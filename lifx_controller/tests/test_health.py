@@ -0,0 +1,129 @@
+import pytest
+
+from controllers.health import HealthTracker, LightUnavailable
+
+MAC = "D0:73:D5:00:00:01"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def changes():
+    return []
+
+
+@pytest.fixture
+def tracker(clock, changes):
+    return HealthTracker(threshold=3, first_backoff=2.0, max_backoff=5.0,
+                         on_change=lambda: changes.append(True), clock=clock)
+
+
+def fail(tracker, times=1):
+    for _ in range(times):
+        tracker.acquire(MAC)
+        tracker.failure(MAC, "no response within 1s")
+
+
+def test_unknown_lights_are_available(tracker):
+    tracker.acquire(MAC)
+    assert tracker.available(MAC)
+    assert not tracker.probe_due(MAC)
+    assert tracker.snapshot(MAC) is None
+
+
+def test_circuit_opens_after_threshold_consecutive_failures(tracker, changes):
+    fail(tracker, 2)
+    assert tracker.snapshot(MAC)['circuit'] == 'closed'
+    assert changes == []
+
+    fail(tracker)
+
+    assert tracker.snapshot(MAC)['circuit'] == 'open'
+    assert not tracker.available(MAC)
+    assert changes == [True]
+    with pytest.raises(LightUnavailable, match="next try in 2s"):
+        tracker.acquire(MAC)
+
+
+def test_a_success_resets_the_failure_count(tracker):
+    fail(tracker, 2)
+    tracker.success(MAC, 0.01)
+    fail(tracker, 2)
+    assert tracker.snapshot(MAC)['circuit'] == 'closed'
+    assert tracker.snapshot(MAC)['consecutive_failures'] == 2
+
+
+def test_one_probe_is_let_through_once_the_backoff_passes(tracker, clock):
+    fail(tracker, 3)
+    clock.now += 1.9
+    assert not tracker.probe_due(MAC)
+    with pytest.raises(LightUnavailable):
+        tracker.acquire(MAC)
+
+    clock.now += 0.1
+    assert tracker.probe_due(MAC)
+    tracker.acquire(MAC)  # The probe
+
+    assert tracker.snapshot(MAC)['circuit'] == 'half-open'
+    assert not tracker.probe_due(MAC)
+    with pytest.raises(LightUnavailable, match="checking now"):
+        tracker.acquire(MAC)  # Everything else waits for the probe's answer
+
+
+def test_a_successful_probe_closes_the_circuit(tracker, clock, changes):
+    fail(tracker, 3)
+    clock.now += 2.0
+    tracker.acquire(MAC)
+
+    tracker.success(MAC, 0.02)
+
+    snapshot = tracker.snapshot(MAC)
+    assert snapshot['circuit'] == 'closed'
+    assert snapshot['consecutive_failures'] == 0
+    assert snapshot['retry_at'] is None
+    assert tracker.available(MAC)
+    assert changes == [True, True]  # Opened, then closed
+
+
+def test_a_failed_probe_reopens_with_doubled_backoff_up_to_the_maximum(tracker, clock):
+    fail(tracker, 3)
+    for backoff in (4.0, 5.0, 5.0):
+        clock.now += 10.0
+        fail(tracker)  # The probe fails
+        assert tracker.snapshot(MAC)['circuit'] == 'open'
+        clock.now += backoff - 0.1
+        assert not tracker.probe_due(MAC)
+        clock.now += 0.1
+        assert tracker.probe_due(MAC)
+        clock.now -= backoff  # Back to when the probe failed
+
+
+def test_success_after_reopening_resets_the_backoff(tracker, clock):
+    fail(tracker, 3)
+    clock.now += 2.0
+    fail(tracker)  # Probe fails; backoff doubles to 4s
+    clock.now += 4.0
+    tracker.acquire(MAC)
+    tracker.success(MAC, 0.01)
+
+    fail(tracker, 3)
+    clock.now += 2.0
+    assert tracker.probe_due(MAC)
+
+
+def test_keys_ignore_case_and_forget_drops_the_light(tracker):
+    fail(tracker, 3)
+    assert not tracker.available(MAC.lower())
+    tracker.forget(MAC.lower())
+    assert tracker.available(MAC)
@@ -0,0 +1,50 @@
+import pytest
+from lifxlan.msgtypes import LightGet, LightSetColor, LightSetPower, LightState
+
+from controllers import protocol
+
+MAC = "d0:73:d5:01:02:03"
+SOURCE_ID = 0x12345678
+SEQ = 42
+HSBK = [21845, 65535, 32768, 3500]
+
+
+@pytest.mark.parametrize('ack, response', [(False, False), (True, False), (False, True)])
+def test_set_color_matches_lifxlan(ack, response):
+    packed = protocol.pack_message(protocol.LIGHT_SET_COLOR, MAC, SOURCE_ID, SEQ,
+                                   protocol.set_color_payload(HSBK, 250),
+                                   ack_requested=ack, response_requested=response)
+    expected = LightSetColor(MAC, SOURCE_ID, SEQ, {'color': HSBK, 'duration': 250},
+                             ack_requested=ack, response_requested=response).packed_message
+    assert packed == expected
+
+
+@pytest.mark.parametrize('on', [True, False])
+def test_set_power_matches_lifxlan(on):
+    packed = protocol.pack_message(protocol.LIGHT_SET_POWER, MAC, SOURCE_ID, SEQ,
+                                   protocol.set_power_payload(on, 1000), ack_requested=True)
+    expected = LightSetPower(MAC, SOURCE_ID, SEQ, {'power_level': 65535 if on else 0, 'duration': 1000},
+                             ack_requested=True).packed_message
+    assert packed == expected
+
+
+@pytest.mark.parametrize('mac', [MAC, protocol.BROADCAST_MAC])
+def test_get_matches_lifxlan(mac):
+    packed = protocol.pack_message(protocol.LIGHT_GET, mac, SOURCE_ID, SEQ, response_requested=True)
+    expected = LightGet(mac, SOURCE_ID, SEQ, {}, response_requested=True).packed_message
+    assert packed == expected
+
+
+def test_light_state_round_trip():
+    payload = {'color': HSBK, 'reserved1': 0, 'power_level': 65535,
+               'label': "Living Room", 'reserved2': 0}
+    data = LightState(MAC, SOURCE_ID, SEQ, payload).packed_message
+
+    msg_type, mac_addr, source_id, seq_num, body = protocol.unpack_header(data)
+
+    assert (msg_type, mac_addr, source_id, seq_num) == (protocol.LIGHT_STATE, MAC, SOURCE_ID, SEQ)
+    assert protocol.unpack_light_state(body) == {'hsbk': HSBK, 'power': 65535, 'label': "Living Room"}
+
+
+def test_unpack_header_rejects_short_packets():
+    assert protocol.unpack_header(b'\x00' * (protocol.HEADER_SIZE - 1)) is None
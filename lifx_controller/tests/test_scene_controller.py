@@ -0,0 +1,134 @@
+import time
+
+import pytest
+
+from config.scene_store import SceneError, SceneStore, validate_dynamic_scenes
+from config.scenes import DYNAMIC_SCENES, SCENES
+from controllers.scene_controller import SceneController
+from sim import FakeBulbServer, fleet_controller
+
+SCENE = 'sunset'
+
+
+def wait_for_packets(server, count, timeout=1.0):
+    """Fire-and-forget packets are counted when they land; wait until count have."""
+    deadline = time.monotonic() + timeout
+    while server.packet_count() < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)  # Catch any packets beyond the expected count
+    return server.packets
+
+
+@pytest.fixture
+def server():
+    with FakeBulbServer(3) as server:
+        yield server
+
+
+@pytest.fixture
+def controllers(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Never near a real lights_config.json
+    with fleet_controller(server, str(tmp_path)) as light_controller:
+        yield light_controller, SceneController(SceneStore(paths=(), builtin={SCENE: SCENES[SCENE]}))
+
+
+def assert_scene_on_bulbs(server, scene_controller):
+    hsbk = scene_controller.scenes[SCENE].hsbk
+    for light_id, bulb in zip(('light1', 'light2', 'light3'), server.bulbs.values()):
+        assert bulb.color == list(hsbk[light_id])
+        assert bulb.power_level == 65535
+
+
+def test_apply_scene_sends_acknowledged_color_and_power_per_light(server, controllers):
+    light_controller, scene_controller = controllers
+    server.reset_counts()
+
+    assert scene_controller.apply_scene(SCENE, light_controller) == (True, f"Scene {SCENE} applied")
+
+    packets = server.packets
+    assert packets['LightSetColor'] == 3
+    assert packets['SetPower'] + packets['LightSetPower'] == 3
+    assert server.packet_count() == 6
+    assert_scene_on_bulbs(server, scene_controller)
+
+
+def test_apply_scene_batched_sends_two_packets_per_light(server, controllers):
+    light_controller, scene_controller = controllers
+    server.reset_counts()
+
+    assert scene_controller.apply_scene_batched(SCENE, light_controller) == (True, f"Scene {SCENE} applied")
+
+    packets = wait_for_packets(server, 6)
+    assert packets['LightSetColor'] == 3
+    assert packets['SetPower'] + packets['LightSetPower'] == 3
+    assert server.packet_count() == 6
+    assert_scene_on_bulbs(server, scene_controller)
+
+
+def test_apply_scene_batched_leaves_unconfigured_bulbs_alone(server, controllers):
+    light_controller, scene_controller = controllers
+    stranger = server.add_bulb("d0:73:d5:ff:ff:ff", "Neighbour")  # On the LAN but not configured
+    server.reset_counts()
+
+    scene_controller.apply_scene_batched(SCENE, light_controller)
+
+    wait_for_packets(server, 6)
+    assert stranger.color == [0, 0, 65535, 3500]
+    assert stranger.power_level == 0
+
+
+def test_verify_resends_only_to_lights_that_missed_the_scene(server, controllers):
+    light_controller, scene_controller = controllers
+    missed = light_controller.lights['light2']
+    send_color = missed.set_color
+    # Lose light2's unacknowledged color packet, as a busy network would
+    missed.set_color = lambda hsbk, *args, rapid=False, **kwargs: \
+        None if rapid else send_color(hsbk, *args, rapid=rapid, **kwargs)
+    server.reset_counts()
+
+    assert scene_controller.apply_scene_batched(SCENE, light_controller, verify=True)[0]
+
+    packets = wait_for_packets(server, 3 + 3 + 3 + 2)
+    assert packets['LightGet'] == 3
+    assert packets['LightSetColor'] == 2 + 1  # Two batched, one acknowledged resend
+    assert packets['SetPower'] + packets['LightSetPower'] == 3 + 1
+    assert_scene_on_bulbs(server, scene_controller)
+
+
+def test_apply_scene_batched_reports_lights_that_do_not_respond(server, controllers):
+    light_controller, scene_controller = controllers
+    light_controller.lights['light2'] = light_controller.make_light("d0:73:d5:00:00:99", server.host, server.port)
+
+    success, message = scene_controller.apply_scene_batched(SCENE, light_controller, verify=True)
+
+    assert not success
+    assert "light2" in message and "light1" not in message
+
+
+def test_apply_scene_reports_unknown_scene(controllers):
+    light_controller, scene_controller = controllers
+    assert scene_controller.apply_scene_batched("nope", light_controller) == (False, "Scene nope not found")
+    assert scene_controller.apply_scene("nope", light_controller) == (False, "Scene nope not found")
+
+
+def test_dynamic_scenes_are_validated_when_loaded():
+    assert validate_dynamic_scenes(DYNAMIC_SCENES) == DYNAMIC_SCENES
+    bad = {'pulse': {'easing': 'linear', 'keyframes': [
+        {'at': 0.0, 'lights': {'light1': {'color': 'EEAF61', 'brightness': 65535}}},
+        {'at': 4.0, 'lights': {'light1': {'color': 'nope', 'brightness': 8000}}}]}}
+    with pytest.raises(SceneError, match="scene 'pulse', keyframe 1, light 'light1': color"):
+        validate_dynamic_scenes(bad)
+
+
+def test_dynamic_scene_send_failures_are_recorded(controllers):
+    light_controller, scene_controller = controllers
+
+    def unplugged(*args, **kwargs):
+        raise OSError("network unreachable")
+    light_controller.lights['light2'].set_color = unplugged
+
+    assert scene_controller.start_dynamic_scene('cycle', light_controller)[0]
+    scene_controller.stop_dynamic_scene()
+
+    assert scene_controller.animation.send_errors >= 1
+    assert scene_controller.animation_error == "Failed to update light2: network unreachable"
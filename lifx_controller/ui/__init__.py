@@ -1,4 +1,16 @@
-from .tui import TUI
-from .color_utils import hex_to_rgb, rgb_to_256, hex_to_hsbk
+import importlib
+from .color_utils import hex_to_rgb, rgb_to_256, hex_to_hsbk, hexes_to_hsbk, hexes_to_terminal
 
-__all__ = ['TUI', 'hex_to_rgb', 'rgb_to_256', 'hex_to_hsbk']
+# Loaded on first use so importing the color helpers doesn't pull in curses
+_EXPORTS = {
+    'TUI': '.tui',
+    'Palette': '.palette',
+}
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ['TUI', 'Palette', 'hex_to_rgb', 'rgb_to_256', 'hex_to_hsbk',
+           'hexes_to_hsbk', 'hexes_to_terminal']
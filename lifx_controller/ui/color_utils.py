@@ -15,14 +15,154 @@ def hex_to_rgb(hex_color):
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
+def _srgb_to_linear(channel):
+    channel /= 255.0
+    return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+def _lab_f(t):
+    return t ** (1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+def rgb_to_lab(r, g, b):
+    """Convert 8-bit sRGB to CIELAB (D65), where distance tracks perceived difference."""
+    r, g, b = _srgb_to_linear(r), _srgb_to_linear(g), _srgb_to_linear(b)
+    fx = _lab_f((0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047)
+    fy = _lab_f(0.2126 * r + 0.7152 * g + 0.0722 * b)
+    fz = _lab_f((0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+def _cube_index(channel):
+    """Index of the xterm cube level closest to an 8-bit channel value."""
+    return min(range(6), key=lambda i: abs(CUBE_LEVELS[i] - channel))
+
+def _xterm_palette():
+    """RGB values of xterm colors 16-255 (the 6x6x6 cube and the gray ramp).
+
+    Colors 0-15 are left out because terminals theme them differently.
+    """
+    palette = {16 + 36 * r + 6 * g + b: (CUBE_LEVELS[r], CUBE_LEVELS[g], CUBE_LEVELS[b])
+               for r in range(6) for g in range(6) for b in range(6)}
+    palette.update({232 + i: (8 + 10 * i,) * 3 for i in range(24)})
+    return palette
+
+XTERM_LAB = {number: rgb_to_lab(*rgb) for number, rgb in _xterm_palette().items()}
+_CUBE_INDEX = [_cube_index(channel) for channel in range(256)]
+
+# Nearest xterm color per 15-bit RGB bucket, filled in on first use (0 = not yet computed)
+_NEAREST_256 = bytearray(1 << 15)
+
+def _candidates(r, g, b):
+    """Palette entries worth comparing: the cube cells around the color plus nearby grays."""
+    ri, gi, bi = _CUBE_INDEX[r], _CUBE_INDEX[g], _CUBE_INDEX[b]
+    numbers = [16 + 36 * rr + 6 * gg + bb
+               for rr in range(max(ri - 1, 0), min(ri + 2, 6))
+               for gg in range(max(gi - 1, 0), min(gi + 2, 6))
+               for bb in range(max(bi - 1, 0), min(bi + 2, 6))]
+    gray = min(max(round(((r + g + b) / 3 - 8) / 10), 0), 23)
+    numbers.extend(232 + i for i in range(max(gray - 2, 0), min(gray + 3, 24)))
+    return numbers
+
 def rgb_to_256(r, g, b):
-    if r == g == b:
-        if r < 8: return 16
-        if r > 248: return 231
-        return round(((r - 8) / 247) * 24) + 232
-
-    r_index = round(r / 255 * 5)
-    g_index = round(g / 255 * 5)
-    b_index = round(b / 255 * 5)
-    
-    return 16 + (36 * r_index) + (6 * g_index) + b_index
+    """Map an RGB color to the perceptually nearest xterm-256 color."""
+    key = (r >> 3) << 10 | (g >> 3) << 5 | (b >> 3)
+    color_number = _NEAREST_256[key]
+    if not color_number:
+        l, a, b_ = rgb_to_lab(r, g, b)
+        best_distance = None
+        for number in _candidates(r, g, b):
+            pl, pa, pb = XTERM_LAB[number]
+            distance = (l - pl) ** 2 + (a - pa) ** 2 + (b_ - pb) ** 2
+            if best_distance is None or distance < best_distance:
+                color_number, best_distance = number, distance
+        _NEAREST_256[key] = color_number
+    return color_number
+
+def rgb_to_truecolor(r, g, b):
+    """Direct-color terminals take the 24-bit value itself as the color number."""
+    return r << 16 | g << 8 | b
+
+def supports_truecolor():
+    """True when curses was started on a direct-color terminal (e.g. TERM=xterm-direct)."""
+    import curses
+    try:
+        return curses.COLORS >= 1 << 24
+    except AttributeError:  # start_color() has not been called
+        return False
+
+def _rgb_to_hsb(value):
+    """Hue, saturation and brightness (0-65535) of a 24-bit RGB value.
+
+    Same arithmetic as colorsys.rgb_to_hsv so results match hex_to_hsbk exactly.
+    """
+    r, g, b = (value >> 16) / 255.0, (value >> 8 & 0xff) / 255.0, (value & 0xff) / 255.0
+    high, low = max(r, g, b), min(r, g, b)
+    if high == low:
+        hue = saturation = 0.0
+    else:
+        spread = high - low
+        saturation = spread / high
+        rc, gc, bc = (high - r) / spread, (high - g) / spread, (high - b) / spread
+        if r == high:
+            hue = bc - gc
+        elif g == high:
+            hue = 2.0 + rc - bc
+        else:
+            hue = 4.0 + gc - rc
+        hue = (hue / 6.0) % 1.0
+    return int(hue * 65535), int(saturation * 65535), int(high * 65535)
+
+def hexes_to_hsbk(hex_colors, kelvin=3500):
+    """Convert many hex colors to HSBK in one pass, converting each distinct color once."""
+    converted = {}
+    results = []
+    for hex_color in hex_colors:
+        hsbk = converted.get(hex_color)
+        if hsbk is None:
+            hsbk = converted[hex_color] = _rgb_to_hsb(int(hex_color.lstrip('#'), 16)) + (kelvin,)
+        results.append(list(hsbk))
+    return results
+
+# HSB of every 24-bit color streamed so far; frames of a live feed mostly repeat colors
+_STREAM_HSB = {}
+STREAM_CACHE_SIZE = 1 << 16
+
+def rgbs_to_hsbk(reds, greens, blues, kelvin=3500):
+    """Convert a frame of RGB samples, given as three channel sequences, to HSBK tuples.
+
+    The channels are typically slices of one bytes object (frame[0::3], frame[1::3],
+    frame[2::3]), so splitting a frame costs three C-level copies rather than a Python
+    loop, and each distinct color is converted once and remembered across frames.
+    """
+    if len(_STREAM_HSB) > STREAM_CACHE_SIZE:
+        _STREAM_HSB.clear()
+    results = []
+    for r, g, b in zip(reds, greens, blues):
+        value = r << 16 | g << 8 | b
+        hsb = _STREAM_HSB.get(value)
+        if hsb is None:
+            hsb = _STREAM_HSB[value] = _rgb_to_hsb(value)
+        results.append(hsb + (kelvin,))
+    return results
+
+def rgbs_to_terminal(rgbs, truecolor=False):
+    """Map many RGB tuples to terminal color numbers; truecolor skips quantization."""
+    if truecolor:
+        return [r << 16 | g << 8 | b for r, g, b in rgbs]
+    return [rgb_to_256(r, g, b) for r, g, b in rgbs]
+
+def hexes_to_terminal(hex_colors, truecolor=False):
+    """Map many hex colors to terminal color numbers, converting each distinct color once."""
+    converted = {}
+    results = []
+    for hex_color in hex_colors:
+        color_number = converted.get(hex_color)
+        if color_number is None:
+            value = int(hex_color.lstrip('#'), 16)
+            if truecolor:
+                color_number = value
+            else:
+                color_number = rgb_to_256(value >> 16, value >> 8 & 0xff, value & 0xff)
+            converted[hex_color] = color_number
+        results.append(color_number)
+    return results
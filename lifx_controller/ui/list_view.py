@@ -0,0 +1,140 @@
+import curses
+
+class ListView:
+    """Selection, scrolling and type-to-filter state for a list too long for the screen.
+
+    The view never draws anything itself: window() returns just the entries that fit
+    in the rows available, so drawing costs the same for ten entries or ten thousand.
+    Filtering is incremental: while the query grows only the previous matches are
+    searched again, and matches for shorter queries are kept for backspacing.
+    """
+
+    def __init__(self, items=(), text=str, key=None):
+        self.text = text
+        self.key = key or text
+        self.items = []
+        self.query = ""
+        self.filtering = False
+        self.selected = 0  # Index into matches
+        self.top = 0  # First visible match
+        self.page = 1  # Entries that fit on screen at the last window() call
+        self._lowered = []
+        self._matches = {"": []}  # query -> indices of matching items
+        self.set_items(items)
+
+    def set_items(self, items):
+        """Replace the entries, keeping the selection on the same entry where possible."""
+        items = list(items)
+        if items == self.items:
+            return
+        current = self.selected_item
+        self.items = items
+        self._lowered = [self.text(item).lower() for item in items]
+        self._matches = {"": list(range(len(items)))}
+        if self.query:
+            self._matches[self.query.lower()] = self._search(self.query.lower())
+        self.selected = 0
+        if current is not None:
+            current_key = self.key(current)
+            for position, index in enumerate(self.matches):
+                if self.key(items[index]) == current_key:
+                    self.selected = position
+                    break
+        self._clamp()
+
+    @property
+    def matches(self):
+        return self._matches[self.query.lower()]
+
+    def __len__(self):
+        return len(self.matches)
+
+    @property
+    def selected_item(self):
+        matches = self._matches.get(self.query.lower(), [])
+        if not matches:
+            return None
+        return self.items[matches[min(self.selected, len(matches) - 1)]]
+
+    def _search(self, query):
+        # Reuse the longest cached prefix of the query; a longer query only narrows it
+        for length in range(len(query) - 1, -1, -1):
+            base = self._matches.get(query[:length])
+            if base is not None:
+                break
+        return [index for index in base if query in self._lowered[index]]
+
+    def set_query(self, query):
+        lowered = query.lower()
+        if lowered not in self._matches:
+            self._matches[lowered] = self._search(lowered)
+        self.query = query
+        self.selected = 0
+        self.top = 0
+
+    def _clamp(self):
+        self.selected = max(0, min(self.selected, len(self.matches) - 1))
+        self.top = max(0, min(self.top, self.selected))
+
+    def move(self, delta):
+        self.selected += delta
+        self._clamp()
+
+    def handle_key(self, key):
+        """Apply a navigation or filter key; returns False for keys the list doesn't use."""
+        if key == curses.KEY_UP:
+            self.move(-1)
+        elif key == curses.KEY_DOWN:
+            self.move(1)
+        elif key == curses.KEY_PPAGE:
+            self.move(-self.page)
+        elif key == curses.KEY_NPAGE:
+            self.move(self.page)
+        elif key == curses.KEY_HOME:
+            self.move(-len(self.items))
+        elif key == curses.KEY_END:
+            self.move(len(self.items))
+        elif not self.filtering:
+            return False
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            self.set_query(self.query[:-1])
+        elif 32 <= key < 127:
+            self.set_query(self.query + chr(key))
+        else:
+            return False
+        return True
+
+    def start_filter(self):
+        self.filtering = True
+
+    def stop_filter(self, clear=False):
+        """Leave filter mode, optionally dropping the query and keeping the selected entry."""
+        self.filtering = False
+        if clear and self.query:
+            current = self.selected_item
+            self.set_query("")
+            if current is not None:
+                self.selected = self.items.index(current)
+            self._clamp()
+
+    def window(self, capacity):
+        """Scroll so the selection is visible in capacity entries; returns [(item, is_selected)]."""
+        self.page = max(1, capacity)
+        if capacity <= 0:
+            return []
+        matches = self.matches
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + self.page:
+            self.top = self.selected - self.page + 1
+        self.top = max(0, min(self.top, len(matches) - self.page))
+        return [(self.items[index], position == self.selected)
+                for position, index in enumerate(matches[self.top:self.top + self.page], self.top)]
+
+    @property
+    def hidden_above(self):
+        return self.top
+
+    @property
+    def hidden_below(self):
+        return max(0, len(self.matches) - self.top - self.page)
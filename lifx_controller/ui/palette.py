@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import curses
+from ui.color_utils import hex_to_rgb, rgb_to_256, rgb_to_truecolor, supports_truecolor
+
+MAX_PAIRS = 32767  # Largest pair number init_pair accepts without extended colors
+
+class Palette:
+    """Resolves hex colors to curses color pairs once and hands out cached attributes.
+
+    Pairs are shared between hex colors that land on the same terminal color, and
+    when the terminal runs out of pairs the least recently used one is recycled.
+    """
+
+    def __init__(self, max_pairs=None, truecolor=None):
+        self.max_pairs = max_pairs
+        self.truecolor = truecolor  # None: detect from the terminal on first use
+        self._colors = {}  # hex -> terminal color number
+        self._pairs = OrderedDict()  # terminal color number -> pair number, in LRU order
+        self._attrs = {}  # hex -> curses attribute for drawing in that color
+
+    @property
+    def capacity(self):
+        """Number of pairs available to us (pair 0 is reserved by curses)."""
+        limit = self.max_pairs if self.max_pairs is not None else curses.COLOR_PAIRS
+        return max(0, min(limit, MAX_PAIRS) - 1)
+
+    def load(self, hex_colors):
+        """Resolve and allocate pairs for a batch of colors, e.g. every color of every scene."""
+        for hex_color in hex_colors:
+            self.attr_for(hex_color)
+
+    def attr_for(self, hex_color, terminal=None):
+        """Return the curses attribute that draws a solid block in hex_color.
+
+        terminal is an optional precomputed (256-color, truecolor) pair of color numbers
+        for hex_color, as the scene store provides, which saves converting it here.
+        """
+        attr = self._attrs.get(hex_color)
+        if attr is not None:
+            self._pairs.move_to_end(self._colors[hex_color])
+            return attr
+
+        color_number = self._colors.get(hex_color)
+        if color_number is None:
+            if self.truecolor is None:
+                self.truecolor = supports_truecolor()
+            if terminal is not None:
+                color_number = terminal[1] if self.truecolor else terminal[0]
+            else:
+                to_terminal = rgb_to_truecolor if self.truecolor else rgb_to_256
+                color_number = to_terminal(*hex_to_rgb(hex_color))
+            self._colors[hex_color] = color_number
+        pair_number = self._allocate(color_number)
+        attr = curses.color_pair(pair_number)
+        self._attrs[hex_color] = attr
+        return attr
+
+    def _allocate(self, color_number):
+        pair_number = self._pairs.get(color_number)
+        if pair_number is not None:
+            self._pairs.move_to_end(color_number)
+            return pair_number
+
+        if len(self._pairs) < self.capacity:
+            pair_number = len(self._pairs) + 1
+        else:
+            # Recycle the least recently used pair; colors still pointing at it
+            # are re-resolved the next time they are drawn
+            evicted, pair_number = self._pairs.popitem(last=False)
+            for hex_color, number in self._colors.items():
+                if number == evicted:
+                    self._attrs.pop(hex_color, None)
+        curses.init_pair(pair_number, color_number, color_number)
+        self._pairs[color_number] = pair_number
+        return pair_number
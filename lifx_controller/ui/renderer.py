@@ -0,0 +1,71 @@
+import curses
+
+class Renderer:
+    """Retained-mode drawing surface that repaints only the rows that changed.
+
+    Drawing code calls addstr/attron/attroff on the renderer exactly as it would on a
+    curses window. Nothing reaches the terminal until commit(), which compares the
+    new frame with the one on screen row by row, rewrites just the rows that differ
+    and flushes them with a single noutrefresh/doupdate.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.rows = {}  # y -> segments currently on screen
+        self.frame = {}  # y -> segments being drawn for the next commit
+        self.attr = curses.A_NORMAL
+        self.size = None
+
+    def getmaxyx(self):
+        return self.window.getmaxyx()
+
+    def attron(self, attr):
+        self.attr |= attr
+
+    def attroff(self, attr):
+        self.attr &= ~attr
+
+    def addstr(self, y, x, text, attr=None):
+        height, width = self.window.getmaxyx()
+        if not 0 <= y < height or x >= width:
+            raise curses.error("addstr() returned ERR")
+        attr = self.attr if attr is None else attr
+        self.frame.setdefault(y, []).append((x, text, attr))
+
+    def begin(self):
+        """Start a new frame."""
+        self.frame = {}
+        self.attr = curses.A_NORMAL
+
+    def invalidate(self):
+        """Forget what is on screen so the next commit repaints everything."""
+        self.rows = {}
+        self.size = None
+
+    def commit(self):
+        """Write rows that differ from the previous frame and return how many changed."""
+        size = self.window.getmaxyx()
+        if size != self.size:
+            # Resized or invalidated: the terminal contents are unknown
+            self.window.erase()
+            self.rows = {}
+            self.size = size
+
+        changed = 0
+        for y in sorted(set(self.rows) | set(self.frame)):
+            segments = self.frame.get(y)
+            if self.rows.get(y) == segments:
+                continue
+            changed += 1
+            self.window.move(y, 0)
+            self.window.clrtoeol()
+            for x, text, attr in segments or ():
+                try:
+                    self.window.addstr(y, x, text, attr)
+                except curses.error:
+                    pass  # Writing the bottom-right cell raises after drawing it
+        self.rows = self.frame
+        self.frame = {}
+        self.window.noutrefresh()
+        curses.doupdate()
+        return changed
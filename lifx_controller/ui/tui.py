@@ -1,34 +1,49 @@
 import curses
-from ui.color_utils import hex_to_rgb, rgb_to_256
+from controllers.poller import StatePoller
+from ui.color_utils import hex_to_hsbk
+from ui.list_view import ListView
+from ui.palette import Palette
+from ui.renderer import Renderer
+
+FRAME_MS = 50  # Longest the loop waits for a key before checking for new light state
+BRIGHTNESS_STEP = 6554  # About 10% per +/- keypress
+SCENE_ROWS = 3  # Two rows of color boxes and a gap per scene
+FLAKY_RATE = 0.9  # Lights answering less often than this show their reply rate
 
 class TUI:
     def __init__(self, light_controller, scene_controller):
         self.light_controller = light_controller
         self.scene_controller = scene_controller
-        self.current_selection = 0
+        self.scene_list = ListView()
+        self.light_list = ListView(text=lambda entry: entry[2], key=lambda entry: entry[:2])
+        self.focus = self.scene_list  # The list that arrow keys, filtering and Enter act on
+        self.poller = StatePoller(light_controller)
+        self.status_message = ""
+        self.target_group = None  # Group that scenes and brightness apply to; None for every light
+        self.renderer = None
+        self.palette = Palette()
 
     def center_text(self, stdscr, text, y_position):
-        """Helper function to center text horizontally."""
+        """Helper function to center text horizontally, cutting it to fit; rows off screen are skipped."""
         height, width = stdscr.getmaxyx()
-        x_position = (width - len(text)) // 2
+        if not 0 <= y_position < height:
+            return
+        text = text[:max(0, width - 1)]
+        x_position = max(0, (width - len(text)) // 2)
         stdscr.addstr(y_position, x_position, text)
 
-    def draw_color_box(self, window, y, x, width, height, color_hex):
+    def draw_color_box(self, window, y, x, width, height, color_hex, terminal=None):
         """Draw a colored box using block characters with 256 colors."""
         try:
-            r, g, b = hex_to_rgb(color_hex)
-            color_number = rgb_to_256(r, g, b)
-            pair_number = color_number + 1  # avoid pair 0
-            curses.init_pair(pair_number, color_number, color_number)
-            
+            attr = self.palette.attr_for(color_hex, terminal)
             for i in range(height):
-                window.addstr(y + i, x, "█" * width, curses.color_pair(pair_number))
+                window.addstr(y + i, x, "█" * width, attr)
         except Exception as e:
             for i in range(height):
                 window.addstr(y + i, x, "■" * width, curses.A_NORMAL)
 
     def draw_scene_preview(self, window, scene_name, y_pos):
-        """Draw a preview of a scene with its three light colors."""
+        """Draw a preview of a scene with one color box per light, as many as fit."""
         height, width = window.getmaxyx()
         scene = self.scene_controller.scenes[scene_name]
         
@@ -36,61 +51,349 @@ class TUI:
         name_width = 15
         color_width = 8
         color_spacing = 2
-        total_width = name_width + (3 * (color_width + color_spacing))
+        light_ids = list(scene)[:max(0, (width - name_width) // (color_width + color_spacing))]
+        total_width = name_width + (len(light_ids) * (color_width + color_spacing))
         
         # Calculate starting x position to center the entire preview
-        start_x = (width - total_width) // 2
+        start_x = max(0, (width - total_width) // 2)
         
         # Draw scene name
-        window.addstr(y_pos, start_x, f"{scene_name.capitalize():<{name_width}}")
+        window.addstr(y_pos, start_x, f"{scene_name.capitalize():<{name_width}}"[:max(0, width - 1)])
         
-        # Draw three color boxes for each light
-        for i, light in enumerate(['light1', 'light2', 'light3']):
-            if light in scene:
-                color = scene[light]['color']
-                x_pos = start_x + name_width + (i * (color_width + color_spacing))
-                self.draw_color_box(window, y_pos, x_pos, color_width, 2, color)
+        # Draw a color box for each light
+        for i, light_id in enumerate(light_ids):
+            color = scene[light_id]['color']
+            x_pos = start_x + name_width + (i * (color_width + color_spacing))
+            self.draw_color_box(window, y_pos, x_pos, color_width, 2, color, scene.terminal.get(light_id))
 
     def draw_menu(self, stdscr):
-        """Draw the main menu with scenes and options."""
-        stdscr.clear()
-        height, width = stdscr.getmaxyx()
+        """Draw the main menu with scenes and options, repainting only rows that changed.
+
+        Both lists are laid out from the current size on every draw and only their
+        visible windows are drawn, so nothing is written off screen however many
+        scenes or lights there are.
+        """
+        if self.renderer is None or self.renderer.window is not stdscr:
+            self.renderer = Renderer(stdscr)
+        screen = self.renderer
+        screen.begin()
+        height, width = screen.getmaxyx()
         
         # Draw title
         title = "LIFX Light Controller"
-        self.center_text(stdscr, title, 1)
+        self.center_text(screen, title, 1)
         
         # Draw instructions
-        instructions = "↑/↓: Navigate | Enter: Select | q: Quit | a: Add New Light | r: Remove Light"
-        self.center_text(stdscr, instructions, 3)
+        instructions = "↑/↓ PgUp/PgDn: Navigate | Tab: Scenes/Lights | /: Filter | Enter: Select | q: Quit"
+        self.center_text(screen, instructions, 2)
+        commands = ("a/r: Add/Remove Light | d: Discover | +/-: Brightness | g: Group | "
+                    "o: On/Off | c: Color | m: Members")
+        self.center_text(screen, commands, 3)
         
-        # Draw scenes
-        scenes_list = list(self.scene_controller.scenes.keys())
+        self.scene_list.set_items(self.scene_controller.scenes)
+        lights_info = self.light_controller.get_all_lights()
+        self.light_list.set_items(self.light_entries(lights_info))
+
+        # Scenes take the rows they need, but leave the lights up to half the screen
         start_y = 5
-        for idx, scene in enumerate(scenes_list):
-            if idx == self.current_selection:
-                stdscr.attron(curses.A_REVERSE)
-            self.draw_scene_preview(stdscr, scene, start_y + idx * 3)
-            if idx == self.current_selection:
-                stdscr.attroff(curses.A_REVERSE)
+        status_y = height - 2
+        available = max(0, status_y - 1 - start_y)
+        lights_needed = 2 + len(self.light_list)
+        scene_rows = min(len(self.scene_list) * SCENE_ROWS,
+                         max(SCENE_ROWS, available - min(lights_needed, available // 2)))
+
+        # Draw scenes
+        visible = self.scene_list.window(min(scene_rows, available) // SCENE_ROWS)
+        self.draw_list_header(screen, self.scene_list, "Scenes", start_y - 1)
+        for idx, (scene, selected) in enumerate(visible):
+            highlight = selected and self.focus is self.scene_list
+            if highlight:
+                screen.attron(curses.A_REVERSE)
+            self.draw_scene_preview(screen, scene, start_y + idx * SCENE_ROWS)
+            if highlight:
+                screen.attroff(curses.A_REVERSE)
+        if self.scene_list.hidden_below and visible:
+            self.center_text(screen, f"↓ {self.scene_list.hidden_below} more",
+                             start_y + len(visible) * SCENE_ROWS - 1)
         
         # Draw connected lights section
-        lights_y = start_y + len(scenes_list) * 3 + 2
-        self.center_text(stdscr, "Connected Lights:", lights_y)
+        lights_y = start_y + scene_rows + 1
+        if lights_y < status_y - 1:
+            if self.target_group is None:
+                header = "Connected Lights"
+            else:
+                header = f"Connected Lights (controlling {self.target_group})"
+            visible = self.light_list.window(status_y - 1 - (lights_y + 1))
+            self.draw_list_header(screen, self.light_list, header, lights_y)
+            for i, (entry, selected) in enumerate(visible):
+                highlight = selected and self.focus is self.light_list
+                if highlight:
+                    screen.attron(curses.A_REVERSE)
+                self.center_text(screen, entry[2], lights_y + 1 + i)
+                if highlight:
+                    screen.attroff(curses.A_REVERSE)
+
+        if self.status_message:
+            self.center_text(screen, self.status_message, status_y)
         
-        # Get and display light information
+        return screen.commit()
+
+    def draw_list_header(self, screen, view, name, y):
+        """Show the filter being typed, or which part of a long list is on screen."""
+        if view.filtering or view.query:
+            cursor = "_" if view.filtering else ""
+            self.center_text(screen, f"{name} filter: {view.query}{cursor} "
+                                     f"({len(view)} of {len(view.items)})", y)
+        elif view.hidden_above or view.hidden_below:
+            last = len(view) - view.hidden_below
+            self.center_text(screen, f"{name} {view.hidden_above + 1}-{last} of {len(view)}:", y)
+        elif view is self.light_list:
+            self.center_text(screen, f"{name}:", y)
+
+    def light_entries(self, lights_info):
+        """Rows for the lights list: a summary per group, then each ungrouped light.
+
+        Entries are (kind, key, text) with kind 'group' or 'light'.
+        """
+        entries = []
+        for group, light_ids in self.group_members(lights_info).items():
+            marker = "> " if group == self.target_group else ""
+            entries.append(('group', group, f"{marker}{group}: {self.summarize(lights_info, light_ids)}"))
+        for light_id, info in lights_info.items():
+            if info.get('groups'):
+                continue
+            entries.append(('light', light_id,
+                            f"{light_id}: {info.get('label', 'Unknown')} ({self.light_status(info)})"))
+        return entries
+
+    def light_status(self, info):
+        """e.g. "Connected", "Off", or "Not responding" once the light's circuit is open."""
+        health = info.get('health', {})
+        if health.get('circuit') == 'open':
+            return "Not responding"
+        if health.get('circuit') == 'half-open':
+            return "Retrying..."
+        if 'power' not in info:
+            return "Checking..."  # Not heard from the bulb yet
+        status = "Connected" if info.get('power') else "Off"
+        if health.get('success_rate', 1.0) < FLAKY_RATE:
+            status += f", {health['success_rate']:.0%} replies"
+        return status
+
+    def group_members(self, lights_info):
+        """{group: [light_id, ...]} for every group the lights belong to."""
+        grouped = {}
+        for light_id, info in lights_info.items():
+            for group in info.get('groups', ()):
+                grouped.setdefault(group, []).append(light_id)
+        return dict(sorted(grouped.items()))
+
+    def summarize(self, lights_info, light_ids):
+        """e.g. "4 lights, 3 on, 1 not responding" for a group's status line."""
+        on = sum(1 for light_id in light_ids if lights_info[light_id].get('power'))
+        down = {light_id for light_id in light_ids
+                if lights_info[light_id].get('health', {}).get('circuit') in ('open', 'half-open')}
+        checking = sum(1 for light_id in light_ids
+                       if 'power' not in lights_info[light_id] and light_id not in down)
+        summary = f"{len(light_ids)} light{'s' if len(light_ids) != 1 else ''}, {on} on"
+        summary += f", {checking} checking" if checking else ""
+        return summary + (f", {len(down)} not responding" if down else "")
+
+    def select_light_entry(self, entry):
+        """Enter on a group makes it the target (or clears it); on a light, toggles it."""
+        kind, key, _ = entry
+        if kind == 'group':
+            self.target_group = None if self.target_group == key else key
+            self.status_message = f"Controlling {self.target_group or 'every light'}"
+        else:
+            self.status_message = f"Toggling {key}..."
+            future = self.poller.submit(self.light_controller.toggle_light, key)
+            future.add_done_callback(self.light_toggled)
+
+    def light_toggled(self, future):
+        if future.exception() is not None:
+            self.status_message = f"Error toggling light: {future.exception()}"
+        else:
+            self.status_message = future.result()[1]
+
+    def selected_target(self):
+        """(kind, key) of the selected row in the lights list, else ('group', target group).
+
+        A target group of None stands for every light.
+        """
+        if self.focus is self.light_list and self.light_list.selected_item is not None:
+            kind, key, _ = self.light_list.selected_item
+            return kind, key
+        return 'group', self.target_group
+
+    def toggle_power(self):
+        """Switch the selected light or group: a group goes on unless all of it is on already."""
+        kind, key = self.selected_target()
+        if kind == 'light':
+            self.select_light_entry(self.light_list.selected_item)
+            return
         lights_info = self.light_controller.get_all_lights()
-        for i, (light_id, info) in enumerate(lights_info.items()):
-            status = "Connected" if info.get('power') else "Off"
-            light_text = f"{light_id}: {info.get('label', 'Unknown')} ({status})"
-            self.center_text(stdscr, light_text, lights_y + i + 1)
-        
-        stdscr.refresh()
+        light_ids = list(lights_info) if key is None else self.group_members(lights_info).get(key, [])
+        power_state = not all(lights_info[light_id].get('power') for light_id in light_ids)
+        name = key or 'every light'
+        self.status_message = f"Turning {name} {'on' if power_state else 'off'}..."
+        future = self.poller.submit(self.light_controller.set_group_power, key, power_state)
+        future.add_done_callback(
+            lambda f: self.group_changed(f"Turned {name} {'on' if power_state else 'off'}", f))
+
+    def set_color(self, stdscr):
+        """Ask for a hex color and set the selected light or group to it."""
+        kind, key = self.selected_target()
+        if key is None:
+            self.status_message = "Select a light or group to color (Tab, then ↑/↓)"
+            return
+        value = self.prompt(stdscr, f"Color for {key} (e.g. ff8800): ", 7)
+        if value is None:
+            return
+        hex_color = value.strip().lstrip('#')
+        if len(hex_color) != 6 or any(c not in '0123456789abcdefABCDEF' for c in hex_color):
+            self.status_message = f"Invalid color {value}: expected a hex color like ff8800"
+            return
+        hsbk = hex_to_hsbk(hex_color)
+        self.status_message = f"Setting {key} to #{hex_color}..."
+        if kind == 'light':
+            future = self.poller.submit(self.light_controller.set_light_color, key, hsbk)
+            future.add_done_callback(self.light_toggled)
+        else:
+            future = self.poller.submit(self.light_controller.set_group_color, key, hsbk)
+            future.add_done_callback(lambda f: self.group_changed(f"Set {key} to #{hex_color}", f))
+
+    def group_changed(self, done, future):
+        """Report a group command's per-light results (runs on the worker thread)."""
+        if future.exception() is not None:
+            self.status_message = f"Error: {future.exception()}"
+            return
+        failures = [message for success, message in future.result() if not success]
+        if not failures:
+            self.status_message = done
+        elif len(failures) == 1:
+            self.status_message = failures[0]
+        else:
+            self.status_message = f"{len(failures)} lights failed; {failures[0]}"
+
+    def edit_members(self, stdscr):
+        """Choose a group's lights, or put the selected ungrouped light in a group."""
+        kind, key = self.selected_target()
+        if kind == 'light':
+            group = self.prompt(stdscr, f"Add {key} to group: ", 20)
+            if group and group.strip():
+                self.status_message = self.light_controller.add_to_group(key, group.strip())[1]
+        elif key is None:
+            self.status_message = "Select a group to edit (Tab, then ↑/↓), or a light to group"
+        else:
+            self.choose_members(stdscr, key)
+
+    def choose_members(self, stdscr, group):
+        """A checklist of every light; Enter puts the highlighted one in or out of group."""
+        lights = self.light_controller.get_all_lights()
+        members = {light_id for light_id, info in lights.items() if group in info.get('groups', ())}
+
+        def describe(light_id):
+            mark = "x" if light_id in members else " "
+            return f"[{mark}] {light_id}: {lights[light_id].get('label', 'Unknown')}"
+
+        def toggle(light_id):
+            if light_id in members:
+                success, message = self.light_controller.remove_from_group(light_id, group)
+                if success:
+                    members.discard(light_id)
+            else:
+                success, message = self.light_controller.add_to_group(light_id, group)
+                if success:
+                    members.add(light_id)
+            return False, message
+
+        self.pick_light(stdscr, f"Lights in {group}:", "Enter to add/remove, ESC when done",
+                        lights, describe, toggle)
+
+    def pick_light(self, stdscr, title, action, lights, describe, on_select):
+        """A filterable list of lights; Enter calls on_select(light_id) until ESC or it is done.
+
+        on_select returns (done, message). The message is shown below the list, or
+        returned once done; None means ESC closed the list.
+        """
+        stdscr.timeout(-1)  # Forms block on input
+        # Typing filters the list straight away; there are no other letter commands here
+        light_list = ListView(lights, text=describe, key=lambda light_id: light_id)
+        light_list.start_filter()
+        message = ""
+
+        while True:
+            # Laid out again on every pass, so a resize just redraws from the list we have
+            height, width = stdscr.getmaxyx()
+            stdscr.erase()
+            self.center_text(stdscr, title, 2)
+            self.center_text(stdscr, f"Arrows/PgUp/PgDn to select, type to filter, {action}", 4)
+            if light_list.query:
+                self.center_text(stdscr, f"Filter: {light_list.query} "
+                                         f"({len(light_list)} of {len(lights)})", 5)
+            for i, (light_id, selected) in enumerate(light_list.window(height - 10)):
+                if selected:
+                    stdscr.attron(curses.A_REVERSE)
+                self.center_text(stdscr, light_list.text(light_id), 6 + i)
+                if selected:
+                    stdscr.attroff(curses.A_REVERSE)
+            if message:
+                self.center_text(stdscr, message, height - 2)
+
+            stdscr.refresh()
+            key = stdscr.getch()
+
+            if key == 27:  # ESC
+                return None
+            elif key == 10:  # Enter
+                light_id = light_list.selected_item
+                if light_id is None:
+                    continue
+                done, message = on_select(light_id)
+                if done:
+                    return message
+            else:
+                light_list.handle_key(key)
+
+    def prompt(self, stdscr, label, max_len):
+        """Read a line of text on the status row; returns None if ESC cancels it."""
+        height, width = stdscr.getmaxyx()
+        y = max(0, height - 2)
+        stdscr.timeout(-1)  # Forms block on input
+        curses.curs_set(1)
+        value = ""
+        try:
+            while True:
+                stdscr.move(y, 0)
+                stdscr.clrtoeol()
+                text = (label + value)[:max(0, width - 1)]
+                stdscr.addstr(y, 0, text)
+                stdscr.refresh()
+                ch = stdscr.getch()
+                if ch == 27:  # ESC
+                    return None
+                elif ch == 10:  # Enter
+                    return value
+                elif ch in (curses.KEY_BACKSPACE, 127):  # Backspace
+                    value = value[:-1]
+                elif 32 <= ch < 127 and len(value) < max_len:
+                    value += chr(ch)
+        finally:
+            curses.curs_set(0)
+
+    def cycle_target_group(self):
+        """Step the target through every light, then each group in turn."""
+        targets = [None] + list(self.group_members(self.light_controller.get_all_lights()))
+        index = targets.index(self.target_group) if self.target_group in targets else 0
+        self.target_group = targets[(index + 1) % len(targets)]
+        self.status_message = f"Controlling {self.target_group or 'every light'}"
 
     def add_new_light(self, stdscr):
         """Display form to add a new light."""
         height, width = stdscr.getmaxyx()
         stdscr.clear()
+        stdscr.timeout(-1)  # Forms block on input
         curses.echo()
         curses.curs_set(1)
         
@@ -150,69 +453,70 @@ class TUI:
 
     def remove_light(self, stdscr):
         """Display interface to remove a light."""
-        height, width = stdscr.getmaxyx()
-        stdscr.clear()
+        stdscr.timeout(-1)  # Forms block on input
         
         lights = self.light_controller.get_all_lights()
         if not lights:
+            height, width = stdscr.getmaxyx()
+            stdscr.clear()
             self.center_text(stdscr, "No lights available to remove", height // 2)
             self.center_text(stdscr, "Press any key to continue...", height // 2 + 2)
             stdscr.refresh()
             stdscr.getch()
             return
         
-        self.center_text(stdscr, "Select light to remove:", 2)
-        self.center_text(stdscr, "Use arrow keys to select, Enter to confirm, ESC to cancel", 4)
-        
-        current_selection = 0
-        light_ids = list(lights.keys())
-        
-        while True:
-            for i, light_id in enumerate(light_ids):
-                if i == current_selection:
-                    stdscr.attron(curses.A_REVERSE)
-                self.center_text(stdscr, light_id, 6 + i)
-                if i == current_selection:
-                    stdscr.attroff(curses.A_REVERSE)
-            
+        def describe(light_id):
+            return f"{light_id}: {lights[light_id].get('label', 'Unknown')}"
+
+        def remove(light_id):
+            return True, self.light_controller.remove_light(light_id)[1]
+
+        message = self.pick_light(stdscr, "Select light to remove:", "Enter to confirm, ESC to cancel",
+                                  lights, describe, remove)
+        if message is not None:
+            height, width = stdscr.getmaxyx()
+            self.center_text(stdscr, message, height - 4)
+            self.center_text(stdscr, "Press any key to continue...", height - 2)
             stdscr.refresh()
-            key = stdscr.getch()
-            
-            if key == 27:  # ESC
-                break
-            elif key == curses.KEY_UP and current_selection > 0:
-                current_selection -= 1
-            elif key == curses.KEY_DOWN and current_selection < len(light_ids) - 1:
-                current_selection += 1
-            elif key == 10:  # Enter
-                success, message = self.light_controller.remove_light(light_ids[current_selection])
-                self.center_text(stdscr, message, height - 4)
-                self.center_text(stdscr, "Press any key to continue...", height - 2)
-                stdscr.refresh()
-                stdscr.getch()
-                break
+            stdscr.getch()
 
     def apply_scene(self, stdscr, scene_name):
-        """Apply selected scene with visual feedback."""
-        height, width = stdscr.getmaxyx()
-        stdscr.clear()
-        
-        # Show applying message
-        self.center_text(stdscr, f"Applying scene: {scene_name}", height // 3)
-        stdscr.refresh()
-        
-        # Apply the scene
-        success = self.scene_controller.apply_scene(scene_name, self.light_controller)
-        
-        # Show result
-        if success:
-            self.center_text(stdscr, "Scene applied successfully!", height // 2)
+        """Apply selected scene on the worker thread and report progress in the status line."""
+        self.status_message = f"Applying scene: {scene_name}..."
+        future = self.poller.submit(self.scene_controller.apply_scene_batched, scene_name,
+                                    self.light_controller, verify=True, group=self.target_group)
+        future.add_done_callback(lambda f: self.scene_applied(scene_name, f))
+
+    def scene_applied(self, scene_name, future):
+        """Record the outcome of a scene application (runs on the worker thread)."""
+        if future.exception() is not None:
+            self.status_message = f"Failed to apply scene {scene_name}: {future.exception()}"
         else:
-            self.center_text(stdscr, "Failed to apply scene", height // 2)
-        
-        self.center_text(stdscr, "Press any key to continue...", height // 2 + 2)
-        stdscr.refresh()
-        stdscr.getch()
+            self.status_message = future.result()[1]
+
+    def discover_lights(self):
+        """Discover lights on the worker thread and report the outcome in the status line."""
+        self.status_message = "Discovering lights..."
+        future = self.poller.submit(self.light_controller.discover_lights)
+        future.add_done_callback(self.discovery_finished)
+
+    def discovery_finished(self, future):
+        if future.exception() is not None:
+            self.status_message = f"Error discovering lights: {future.exception()}"
+        else:
+            self.status_message = future.result()[1]
+
+    def adjust_brightness(self, delta):
+        """Step the brightness of every targeted light we know the color of, without waiting on the bulbs."""
+        lights_info = self.light_controller.get_all_lights()
+        for light_id, info in lights_info.items():
+            if self.target_group is not None and self.target_group not in info.get('groups', ()):
+                continue
+            state = self.light_controller.state_cache.get(light_id)
+            if state is None or state['hsbk'] is None:
+                continue  # Reading it now would block the UI; the poller will fill it in
+            brightness = max(0, min(65535, state['hsbk'][2] + delta))
+            self.light_controller.queue_light_brightness(light_id, brightness)
 
     def run(self, stdscr):
         """Main TUI loop."""
@@ -224,24 +528,90 @@ class TUI:
         
         curses.curs_set(0)
         stdscr.keypad(True)
-        
+
+        # Allocate a pair for every scene color up front; the store already converted them
+        for scene in self.scene_controller.scenes.values():
+            for light_id, settings in scene.items():
+                self.palette.attr_for(settings['color'], scene.terminal.get(light_id))
+
+        self.poller.start()
+        try:
+            self.event_loop(stdscr)
+        finally:
+            self.poller.stop()
+
+    def event_loop(self, stdscr):
+        """Handle keys as they arrive and redraw only when something on screen changed."""
+        last_frame = None
+        scene_error = None
+        animation_error = None
         while True:
-            self.draw_menu(stdscr)
+            stdscr.timeout(FRAME_MS)
+            scenes = self.scene_controller.scenes  # A new table whenever the scene files change
+            if self.scene_controller.scene_error != scene_error:
+                scene_error = self.scene_controller.scene_error
+                if scene_error:
+                    self.status_message = f"Scene file error: {scene_error}"
+            if self.scene_controller.animation_error != animation_error:
+                animation_error = self.scene_controller.animation_error
+                if animation_error:
+                    self.status_message = f"Dynamic scene error: {animation_error}"
+            frame = (self.light_controller.state_cache.version, self.status_message,
+                     stdscr.getmaxyx(), id(scenes))
+            if frame != last_frame:
+                self.draw_menu(stdscr)
+                last_frame = frame
+
             key = stdscr.getch()
+            if key == -1:  # No input this frame
+                continue
+            last_frame = None  # Any key may move the selection; unchanged rows aren't repainted
+
+            if self.focus.filtering:
+                if key == 27:  # ESC drops the filter
+                    self.focus.stop_filter(clear=True)
+                elif key == 10:  # Enter keeps it and goes back to commands
+                    self.focus.stop_filter()
+                else:
+                    self.focus.handle_key(key)
+                continue
             
             if key == ord('q'):
                 break
+            elif key == curses.KEY_RESIZE:
+                pass  # Redrawn at the new size from the data already on hand
+            elif key == ord('\t'):
+                self.focus = self.light_list if self.focus is self.scene_list else self.scene_list
+            elif key == ord('/'):
+                self.focus.start_filter()
+            elif key == 27 and self.focus.query:
+                self.focus.stop_filter(clear=True)
             elif key == ord('a'):
                 self.add_new_light(stdscr)
+                self.renderer.invalidate()  # The form drew over the menu
+            elif key in (ord('+'), ord('=')):
+                self.adjust_brightness(BRIGHTNESS_STEP)
+            elif key == ord('-'):
+                self.adjust_brightness(-BRIGHTNESS_STEP)
+            elif key == ord('d'):
+                self.discover_lights()
+            elif key == ord('g'):
+                self.cycle_target_group()
+            elif key == ord('o'):
+                self.toggle_power()
+            elif key == ord('c'):
+                self.set_color(stdscr)
+                self.renderer.invalidate()  # The prompt drew over the status row
+            elif key == ord('m'):
+                self.edit_members(stdscr)
+                self.renderer.invalidate()
             elif key == ord('r'):
                 self.remove_light(stdscr)
-            elif key == curses.KEY_UP and self.current_selection > 0:
-                self.current_selection -= 1
-            elif key == curses.KEY_DOWN:
-                scenes_list = list(self.scene_controller.scenes.keys())
-                if self.current_selection < len(scenes_list) - 1:
-                    self.current_selection += 1
+                self.renderer.invalidate()
             elif key == 10:  # Enter
-                scenes_list = list(self.scene_controller.scenes.keys())
-                selected_scene = scenes_list[self.current_selection]
-                self.apply_scene(stdscr, selected_scene)
\ No newline at end of file
+                if self.focus is self.scene_list and self.scene_list.selected_item is not None:
+                    self.apply_scene(stdscr, self.scene_list.selected_item)
+                elif self.focus is self.light_list and self.light_list.selected_item is not None:
+                    self.select_light_entry(self.light_list.selected_item)
+            else:
+                self.focus.handle_key(key)